@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.core.exceptions import ValidationError
 from django import forms
+from app.moderation import admin_actions
+
 from .models import About, Team, SocialMedia, TeamSocialMedia, Contact, Slider, Gallery, Video, Testimonial
 
 class SliderAdminForm(forms.ModelForm):
@@ -24,6 +26,7 @@ class SliderAdmin(admin.ModelAdmin):
     list_filter = ('active', 'action')
     search_fields = ('title', 'subtitle')
     readonly_fields = ('created_at', 'updated_at')
+    actions = admin_actions(Slider)
     
     def save_model(self, request, obj, form, change):
         try:
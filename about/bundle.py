@@ -0,0 +1,81 @@
+import hashlib
+from urllib.parse import urljoin
+
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from app.cache import get_cache, get_versions
+from app.routers import use_primary
+from .views import (
+    AboutViewSet, ContactViewSet, SocialMediaViewSet,
+    TeamViewSet, TeamSocialMediaViewSet, SliderViewSet,
+    GalleryViewSet, VideoViewSet, TestimonialViewSet
+)
+
+# Sections of the landing page bundle, built exactly as their endpoints serve them
+SECTIONS = [
+    ('about', AboutViewSet),
+    ('contact', ContactViewSet),
+    ('social_media', SocialMediaViewSet),
+    ('team', TeamViewSet),
+    ('team_social_media', TeamSocialMediaViewSet),
+    ('sliders', SliderViewSet),
+    ('gallery', GalleryViewSet),
+    ('videos', VideoViewSet),
+    ('testimonials', TestimonialViewSet),
+]
+
+ORIGINS_KEY = 'about:bundle:origins'
+
+
+class OriginRequest:
+    """Stands in for a request when building absolute media URLs outside a request."""
+
+    def __init__(self, origin):
+        self.origin = origin
+
+    def build_absolute_uri(self, location=None):
+        return urljoin(self.origin + '/', location or '')
+
+
+def bundle_models():
+    return [viewset.queryset.model for _, viewset in SECTIONS]
+
+
+def bundle_key(origin):
+    versions = '|'.join(get_versions(bundle_models()))
+    return f'about:bundle:{origin}:' + hashlib.md5(versions.encode()).hexdigest()
+
+
+def build_bundle(origin):
+    """Serialize every section and store the rendered bytes for ``origin``."""
+    key = bundle_key(origin)
+    context = {'request': OriginRequest(origin)}
+    data = {}
+    # Stored under the current version stamps, so never read from a lagging replica
+    with use_primary():
+        for name, viewset in SECTIONS:
+            serializer = viewset.serializer_class(viewset.queryset.all(), many=True, context=context)
+            data[name] = serializer.data
+    content = JSONRenderer().render(data)
+    bundle = {'content': content, 'etag': '"%s"' % hashlib.md5(content).hexdigest()}
+    cache = get_cache()
+    cache.set(key, bundle, timeout=None)
+    origins = cache.get(ORIGINS_KEY, set())
+    if origin not in origins:
+        cache.set(ORIGINS_KEY, origins | {origin}, timeout=None)
+    return bundle
+
+
+def get_bundle(origin):
+    return get_cache().get(bundle_key(origin)) or build_bundle(origin)
+
+
+def rebuild_all():
+    for origin in get_cache().get(ORIGINS_KEY, set()):
+        build_bundle(origin)
+
+
+def rebuild_bundles(**kwargs):
+    # Queued after the version stamp bump, so bundles land under the new key
+    transaction.on_commit(rebuild_all)
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 05:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('about', '0011_alter_socialmedia_name_alter_teamsocialmedia_name'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='slider',
+            index=models.Index(condition=models.Q(('active', True)), fields=['-created_at'], name='about_slide_created_ee62d9_idx'),
+        ),
+    ]
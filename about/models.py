@@ -143,6 +143,9 @@ class Slider(models.Model):
         verbose_name_plural = 'Sliders'
         verbose_name = 'Slider'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], condition=models.Q(active=True), name='about_slide_created_ee62d9_idx'),
+        ]
 
 class Gallery(models.Model):
     title = models.CharField(max_length=100)
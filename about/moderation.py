@@ -0,0 +1,6 @@
+from app.moderation import register
+
+from .models import Slider
+
+register(Slider, 'activate', 'Activate', {'active': True})
+register(Slider, 'deactivate', 'Deactivate', {'active': False})
@@ -1,22 +1,23 @@
 from rest_framework import serializers
+from app.serializers import ImageRenditionsMixin, SparseFieldsMixin
 from .models import (
     About, Contact, SocialMedia, Team, TeamSocialMedia,
     Slider, Gallery, Video, Testimonial
 )
 
-class AboutSerializer(serializers.ModelSerializer):
+class AboutSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = About
         fields = '__all__'
         read_only_fields = ['created_at', 'updated_at']
 
 
-class TeamSocialMediaSerializer(serializers.ModelSerializer):
+class TeamSocialMediaSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = TeamSocialMedia
         fields = '__all__'
 
-class TeamSerializer(serializers.ModelSerializer):
+class TeamSerializer(SparseFieldsMixin, ImageRenditionsMixin, serializers.ModelSerializer):
     social_links = TeamSocialMediaSerializer(many=True, read_only=True)
     
     class Meta:
@@ -24,7 +25,7 @@ class TeamSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class SocialMediaSerializer(serializers.ModelSerializer):
+class SocialMediaSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     name_display = serializers.CharField(source='get_name_display', read_only=True)
 
     class Meta:
@@ -32,28 +33,28 @@ class SocialMediaSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ['created_at', 'updated_at']
 
-class ContactSerializer(serializers.ModelSerializer):
+class ContactSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Contact
         fields = '__all__'
         read_only_fields = ['created_at', 'updated_at']
 
-class SliderSerializer(serializers.ModelSerializer):
+class SliderSerializer(SparseFieldsMixin, ImageRenditionsMixin, serializers.ModelSerializer):
     class Meta:
         model = Slider
         fields = '__all__'
 
-class GallerySerializer(serializers.ModelSerializer):
+class GallerySerializer(SparseFieldsMixin, ImageRenditionsMixin, serializers.ModelSerializer):
     class Meta:
         model = Gallery
         fields = '__all__'
 
-class VideoSerializer(serializers.ModelSerializer):
+class VideoSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Video
         fields = '__all__'
 
-class TestimonialSerializer(serializers.ModelSerializer):
+class TestimonialSerializer(SparseFieldsMixin, ImageRenditionsMixin, serializers.ModelSerializer):
     class Meta:
         model = Testimonial
         fields = '__all__'
\ No newline at end of file
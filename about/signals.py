@@ -0,0 +1,23 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from app.bulk import bulk_changed
+from app.cache import bump_version
+from app.signals import track_versions
+from .bundle import bundle_models, rebuild_bundles
+
+track_versions(bundle_models())
+
+for model in bundle_models():
+    uid = f'rebuild_bundle_{model._meta.label_lower}'
+    post_save.connect(rebuild_bundles, sender=model, dispatch_uid=uid)
+    post_delete.connect(rebuild_bundles, sender=model, dispatch_uid=uid)
+
+
+def bulk_saved(sender, **kwargs):
+    if sender in bundle_models():
+        transaction.on_commit(lambda: bump_version(sender))
+        rebuild_bundles()
+
+
+bulk_changed.connect(bulk_saved, dispatch_uid='about_bulk_saved')
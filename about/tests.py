@@ -1,3 +1,82 @@
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from app.models import User
+from app.tests import LocalCacheMixin
+from .models import About, Slider, Team, TeamSocialMedia
+
+
+@override_settings(ALLOWED_HOSTS=['*'])
+class SiteBundleTests(LocalCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        About.objects.create(title='Urugo', description='Hello')
+
+    def test_sections_match_their_endpoints(self):
+        team = Team.objects.create(name='Aline', role='Chef')
+        TeamSocialMedia.objects.create(name='instagram', link='https://instagram.com/aline', team_member=team)
+        bundle = self.client.get('/about/bundle/').json()
+        for name, path in [('about', 'about'), ('team', 'team'), ('team_social_media', 'team-social-media')]:
+            with self.subTest(section=name):
+                self.assertEqual(bundle[name], self.client.get(f'/about/{path}/').json()['results'])
+
+    def test_served_without_queries(self):
+        response = self.client.get('/about/bundle/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['about'][0]['description'], 'Hello')
+        with CaptureQueriesContext(connection) as queries:
+            again = self.client.get('/about/bundle/')
+            not_modified = self.client.get('/about/bundle/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(again.content, response.content)
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_rebuilt_after_changes(self):
+        etag = self.client.get('/about/bundle/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Team.objects.create(name='Aline', role='Chef')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/about/bundle/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([member['name'] for member in response.json()['team']], ['Aline'])
+
+    def test_origins_are_kept_apart(self):
+        Team.objects.create(name='Aline', role='Chef', image='team/aline.png')
+        local = self.client.get('/about/bundle/', HTTP_HOST='localhost').json()
+        public = self.client.get('/about/bundle/', HTTP_HOST='urugo.example.com').json()
+        self.assertTrue(local['team'][0]['image'].startswith('http://localhost/'))
+        self.assertTrue(public['team'][0]['image'].startswith('http://urugo.example.com/'))
+
+
+@override_settings(ALLOWED_HOSTS=['*'])
+class SliderModerationTests(LocalCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_user(email='admin@example.com', password='secret123', is_staff=True)
+        self.slider = Slider.objects.create(title='Welcome', subtitle='Urugo', image='sliders/welcome.png')
+        self.api = APIClient()
+        self.api.force_authenticate(self.admin)
+
+    def moderate(self, action):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.api.post('/about/sliders/moderate/', {'action': action, 'ids': [self.slider.pk]},
+                                     format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['changed']
+
+    def titles(self):
+        return [row['title'] for row in self.client.get('/about/sliders/').json()['results']]
+
+    def test_inactive_sliders_can_be_reactivated(self):
+        self.assertEqual(self.titles(), ['Welcome'])
+        self.assertEqual(self.moderate('deactivate'), 1)
+        self.assertEqual(self.titles(), [])
+        self.assertEqual(self.client.get('/about/bundle/').json()['sliders'], [])
+
+        # Hidden from the list, but still reachable by id
+        self.assertEqual(self.moderate('activate'), 1)
+        self.assertEqual(self.titles(), ['Welcome'])
+        self.assertEqual(self.moderate('activate'), 0)
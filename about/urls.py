@@ -3,7 +3,8 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     AboutViewSet, ContactViewSet, SocialMediaViewSet,
     TeamViewSet, TeamSocialMediaViewSet, SliderViewSet,
-    GalleryViewSet, VideoViewSet, TestimonialViewSet
+    GalleryViewSet, VideoViewSet, TestimonialViewSet,
+    SiteBundleView
 )
 
 # Create router instance
@@ -19,5 +20,6 @@ router.register(r'videos', VideoViewSet)
 router.register(r'testimonials', TestimonialViewSet)
 
 urlpatterns = [
+    path('bundle/', SiteBundleView.as_view(), name='site-bundle'),
     path('', include(router.urls)),
 ]
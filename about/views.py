@@ -1,5 +1,9 @@
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
 from rest_framework import viewsets
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.permissions import AllowAny, IsAuthenticatedOrReadOnly
+from rest_framework.views import APIView
+from app.mixins import ConditionalGetMixin, DeferFieldsMixin, ModerationMixin, QueryBudgetMixin
 from .models import (
     About, Contact, SocialMedia, Team, TeamSocialMedia,
     Slider, Gallery, Video, Testimonial
@@ -10,52 +14,78 @@ from .serializers import (
     GallerySerializer, VideoSerializer, TestimonialSerializer
 )
 
-class AboutViewSet(viewsets.ModelViewSet):
+class AboutViewSet(QueryBudgetMixin, ConditionalGetMixin, DeferFieldsMixin, viewsets.ModelViewSet):
     """Handles CRUD operations for About section"""
     queryset = About.objects.all()
     serializer_class = AboutSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    query_budget = {'list': 3, 'retrieve': 2}
 
-class ContactViewSet(viewsets.ModelViewSet):
+class ContactViewSet(QueryBudgetMixin, ConditionalGetMixin, DeferFieldsMixin, viewsets.ModelViewSet):
     """Handles CRUD operations for Contact section"""
     queryset = Contact.objects.all()
     serializer_class = ContactSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    query_budget = {'list': 3, 'retrieve': 2}
 
-class TeamViewSet(viewsets.ModelViewSet):
+class TeamViewSet(QueryBudgetMixin, ConditionalGetMixin, DeferFieldsMixin, viewsets.ModelViewSet):
     """Handles CRUD operations for Team members"""
-    queryset = Team.objects.all()
+    queryset = Team.objects.prefetch_related('social_links')
     serializer_class = TeamSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    cache_models = (TeamSocialMedia,)
+    query_budget = {'list': 5, 'retrieve': 4}
 
-class SocialMediaViewSet(viewsets.ModelViewSet):
+class SocialMediaViewSet(QueryBudgetMixin, ConditionalGetMixin, DeferFieldsMixin, viewsets.ModelViewSet):
     """Handles CRUD operations for general Social Media links"""
     queryset = SocialMedia.objects.all()
     serializer_class = SocialMediaSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    query_budget = {'list': 3, 'retrieve': 2}
 
-class TeamSocialMediaViewSet(viewsets.ModelViewSet):
+class TeamSocialMediaViewSet(QueryBudgetMixin, ConditionalGetMixin, DeferFieldsMixin, viewsets.ModelViewSet):
     """Handles CRUD operations for Team members' Social Media links"""
     queryset = TeamSocialMedia.objects.all()
     serializer_class = TeamSocialMediaSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    query_budget = {'list': 3, 'retrieve': 2}
 
-class SliderViewSet(viewsets.ModelViewSet):
+class SliderViewSet(QueryBudgetMixin, ModerationMixin, ConditionalGetMixin, DeferFieldsMixin, viewsets.ModelViewSet):
     queryset = Slider.objects.filter(active=True)
     serializer_class = SliderSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    query_budget = {'list': 4, 'retrieve': 3, 'moderate': 5}
 
-class GalleryViewSet(viewsets.ModelViewSet):
+class GalleryViewSet(QueryBudgetMixin, ConditionalGetMixin, DeferFieldsMixin, viewsets.ModelViewSet):
     queryset = Gallery.objects.all()
     serializer_class = GallerySerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    query_budget = {'list': 4, 'retrieve': 3}
 
-class VideoViewSet(viewsets.ModelViewSet):
+class VideoViewSet(QueryBudgetMixin, ConditionalGetMixin, DeferFieldsMixin, viewsets.ModelViewSet):
     queryset = Video.objects.all()
     serializer_class = VideoSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    query_budget = {'list': 3, 'retrieve': 2}
 
-class TestimonialViewSet(viewsets.ModelViewSet):
+class TestimonialViewSet(QueryBudgetMixin, ConditionalGetMixin, DeferFieldsMixin, viewsets.ModelViewSet):
     queryset = Testimonial.objects.all()
     serializer_class = TestimonialSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    query_budget = {'list': 4, 'retrieve': 3}
+
+
+class SiteBundleView(APIView):
+    """Serves every landing page section in one prebuilt payload"""
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        from .bundle import get_bundle
+
+        bundle = get_bundle(f'{request.scheme}://{request.get_host()}')
+        response = get_conditional_response(request, etag=bundle['etag'])
+        if response is None:
+            response = HttpResponse(bundle['content'], content_type='application/json')
+        response['ETag'] = bundle['etag']
+        return response
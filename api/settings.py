@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import copy
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -49,6 +51,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'app.routers.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -125,13 +128,113 @@ WSGI_APPLICATION = 'api.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
+# DB_ENGINE=postgresql switches to PostgreSQL (psycopg 3); SQLite stays the
+# default for development.
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite3')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'urugo'),
+            'USER': os.environ.get('DB_USER', 'urugo'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'OPTIONS': {},
+        }
+    }
+    if os.environ.get('DB_POOL', '1') == '1':
+        # One pool per gunicorn worker process, sized to its threads, so the
+        # server holds at most workers * GUNICORN_THREADS connections.
+        # Pooling requires CONN_MAX_AGE = 0; the pool keeps connections open.
+        # CONN_HEALTH_CHECKS makes Django give the pool its check, so a
+        # connection killed by a database restart or failover is replaced
+        # when it is handed out instead of failing the request.
+        DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+        pool_size = int(os.environ.get('DB_POOL_SIZE', os.environ.get('GUNICORN_THREADS', '4')))
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': 1,
+            'max_size': pool_size,
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', '10')),
+            'max_idle': 300,
+            'max_lifetime': 1800,
+        }
+    else:
+        # Persistent per-thread connections, checked before reuse
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', '600'))
+        DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+        }
+    }
+    if os.environ.get('SQLITE_PROFILE', '') == '1':
+        # Several gunicorn workers on one SQLite file: writes take the lock
+        # when their transaction begins instead of failing on upgrade, and
+        # connections stay open so the page cache and mmap are reused.
+        # The pragmas are applied on connection_created (see app/signals.py).
+        DATABASES['default']['OPTIONS'] = {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 5,
+        }
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', '600'))
+        DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+        SQLITE_PRAGMAS = {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout': 5000,
+            'mmap_size': 256 * 1024 * 1024,
+            'cache_size': -64 * 1024,
+            'temp_store': 'MEMORY',
+        }
+
+# Read replicas of the primary, as comma-separated host[:port] entries.
+# Safe requests read from a random replica; see app/routers.py.
+DATABASE_REPLICAS = []
+
+for number, address in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), 1):
+    host, _, port = address.strip().partition(':')
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        **copy.deepcopy(DATABASES['default']),
+        'HOST': host,
+        'PORT': port or DATABASES['default'].get('PORT', ''),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['app.routers.ReplicaRouter']
+
+# How long a client that wrote keeps reading from the primary; should
+# exceed the usual replication lag
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', '10'))
+
+# Cookie that pins anonymous writers, who have no session to key the pin on
+REPLICA_PIN_COOKIE = 'replica_pin'
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Shared between gunicorn workers so version stamps invalidate every process
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
     }
 }
 
+# Cached responses are invalidated by version stamps; the timeout only
+# bounds how long superseded entries occupy the cache.
+RESPONSE_CACHE_TIMEOUT = 60 * 60 * 24
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -167,10 +270,23 @@ REST_FRAMEWORK = {
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'app.pagination.KeysetPagination',
     'PAGE_SIZE': 10,
 }
 
+# Raise instead of logging when a viewset action exceeds its query_budget
+# (enable in tests and benchmarks)
+QUERY_BUDGET_ENFORCE = os.environ.get('QUERY_BUDGET_ENFORCE', '') == '1'
+
+
+# Background jobs (app/jobs.py), run by `manage.py run_jobs`.
+# JOBS_INLINE=1 runs them in-process after commit instead, for development
+# without a worker.
+JOBS_INLINE = os.environ.get('JOBS_INLINE', '') == '1'
+# First retry delay in seconds, doubled on every further attempt
+JOB_RETRY_DELAY = 30
+# A running job not finished after this many seconds is assumed orphaned
+JOB_LOCK_TIMEOUT = 60 * 10
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
@@ -216,4 +332,43 @@ STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'static'
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = BASE_DIR / 'media' 
\ No newline at end of file
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Uploads are stored once per distinct content (see app/storage.py)
+STORAGES = {
+    'default': {
+        'BACKEND': 'app.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# How media and static files are delivered (app/files.py):
+#   sendfile    FileResponse, sent by gunicorn with sendfile(); Range supported
+#   x-accel     nginx serves the file from an internal location, e.g.
+#               location /internal/media/ { internal; alias /app/media/; }
+#   x-sendfile  Apache mod_xsendfile / lighttpd
+FILE_SERVE_MODE = os.environ.get('FILE_SERVE_MODE', 'sendfile')
+MEDIA_ACCEL_PREFIX = '/internal/media/'
+STATIC_ACCEL_PREFIX = '/internal/static/'
+# Cache lifetime of files that are not content-addressed (those are immutable)
+FILE_CACHE_CONTROL = 'public, max-age=3600'
+# Media directories served only to staff; others use the API download actions
+PRIVATE_MEDIA_DIRS = ['documents/', 'partial/']
+# Lifetime of signed download links, in seconds
+DOWNLOAD_URL_MAX_AGE = int(os.environ.get('DOWNLOAD_URL_MAX_AGE', 3600))
+
+# Resumable document uploads (app/uploads.py). Partial files live under
+# MEDIA_ROOT so finalizing is a rename, not a copy
+UPLOAD_SESSION_DIR = MEDIA_ROOT / 'partial'
+UPLOAD_MAX_SIZE = int(os.environ.get('UPLOAD_MAX_SIZE', 2 * 1024 ** 3))
+UPLOAD_CHUNK_MAX_SIZE = 16 * 1024 ** 2
+# Unfinished sessions older than this are removed by purge_uploads
+UPLOAD_SESSION_TTL = 24 * 3600
+
+# Largest batch accepted by the bulk/ endpoints (app/mixins.BulkMixin)
+BULK_MAX_ROWS = 500
+
+# Widths of the WebP/JPEG copies generated for every uploaded image
+IMAGE_RENDITION_WIDTHS = [320, 640, 1280] 
\ No newline at end of file
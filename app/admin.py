@@ -1,8 +1,107 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import Dining, DiningBooking, User, Listing, Order, OrderItem, Post, Donation, Partner, Document
-class DocumentAdmin(admin.ModelAdmin):
-    exclude = ('file_type',)
+from .models import (
+    Dining, DiningBooking, User, Listing, Order, OrderItem, Post, Donation, Partner, Document, Job, MediaBlob,
+    Reservation,
+)
+from .moderation import admin_actions
+
+# Changelists stay usable on large tables: related rows are joined rather
+# than fetched per row, FK widgets never list a whole table, the unfiltered
+# total is not counted and date hierarchies use indexed columns.
+# check_admin_queries verifies the query count does not grow with the page.
+class ScalableAdmin(admin.ModelAdmin):
+    show_full_result_count = False
+    list_per_page = 50
+
+
+class ListingAdmin(ScalableAdmin):
+    list_display = ('title', 'type', 'category', 'price', 'available', 'in_use', 'created_at')
+    list_filter = ('type', 'available', 'in_use')
+    search_fields = ('title', 'slug')
+    date_hierarchy = 'created_at'
+    actions = admin_actions(Listing)
+
+
+class PostAdmin(ScalableAdmin):
+    list_display = ('title', 'type', 'status', 'published', 'published_by', 'created_at')
+    list_filter = ('type', 'status', 'published')
+    list_select_related = ('published_by',)
+    search_fields = ('title', 'slug')
+    autocomplete_fields = ('published_by',)
+    date_hierarchy = 'created_at'
+    actions = admin_actions(Post)
+
+
+class DiningAdmin(ScalableAdmin):
+    list_display = ('title', 'location', 'capacity', 'in_use', 'created_at')
+    search_fields = ('title', 'slug')
+
+
+class DonationAdmin(ScalableAdmin):
+    list_display = ('names', 'email', 'amount', 'donated_at')
+    search_fields = ('names', 'email')
+    date_hierarchy = 'donated_at'
+
+
+class OrderItemInline(admin.TabularInline):
+    model = OrderItem
+    raw_id_fields = ('item',)
+    extra = 0
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('item')
+
+
+class OrderAdmin(ScalableAdmin):
+    list_display = ('id', 'user', 'status', 'total_price', 'created_at')
+    list_filter = ('status',)
+    list_select_related = ('user',)
+    search_fields = ('user__email',)
+    autocomplete_fields = ('user',)
+    date_hierarchy = 'created_at'
+    inlines = [OrderItemInline]
+    actions = admin_actions(Order)
+
+
+class DiningBookingAdmin(ScalableAdmin):
+    list_display = ('dining', 'user', 'guests', 'booking_time', 'status')
+    list_filter = ('status',)
+    list_select_related = ('dining', 'user')
+    search_fields = ('user__email', 'dining__title')
+    autocomplete_fields = ('dining', 'user')
+    date_hierarchy = 'booking_time'
+
+
+class ReservationAdmin(ScalableAdmin):
+    list_display = ('listing', 'user', 'check_in', 'check_out', 'status')
+    list_filter = ('status',)
+    list_select_related = ('listing', 'user')
+    search_fields = ('user__email', 'listing__title')
+    autocomplete_fields = ('listing', 'user')
+
+
+class DocumentAdmin(ScalableAdmin):
+    exclude = ('file_type', 'size', 'sha256')
+    readonly_fields = ('original_name',)
+    list_display = ('file_name', 'original_name', 'document_type', 'visibility', 'uploaded_by', 'uploaded_at')
+    list_filter = ('document_type', 'visibility')
+    list_select_related = ('uploaded_by',)
+    search_fields = ('file_name', 'original_name')
+    autocomplete_fields = ('uploaded_by',)
+    date_hierarchy = 'uploaded_at'
+
+
+class MediaBlobAdmin(ScalableAdmin):
+    list_display = ('original_name', 'path', 'size', 'created_at')
+    search_fields = ('original_name', 'digest')
+    readonly_fields = ('path', 'digest', 'size', 'original_name', 'created_at')
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'run_after', 'updated_at')
+    list_filter = ('status', 'name')
+    readonly_fields = ('name', 'payload', 'attempts', 'locked_at', 'last_error', 'created_at', 'updated_at')
 
 from django.contrib.auth.models import Group
 from rest_framework_simplejwt.token_blacklist.models import (
@@ -11,6 +110,8 @@ from rest_framework_simplejwt.token_blacklist.models import (
 )
 class CustomUserAdmin(UserAdmin):
     model = User
+    show_full_result_count = False
+    list_per_page = 50
     list_display = ('email', 'first_name', 'last_name', 'role', 'is_active', 'is_staff', 'is_superuser')
     list_filter = ('role', 'is_staff', 'is_active')
     ordering = ('email',)
@@ -33,8 +134,17 @@ class CustomUserAdmin(UserAdmin):
 
 # admin.site.register(OrderItem)
 admin.site.register(User, CustomUserAdmin)
-admin.site.register([Listing, Order, Post, Donation, Partner, Dining, DiningBooking])
+admin.site.register(Listing, ListingAdmin)
+admin.site.register(Order, OrderAdmin)
+admin.site.register(Post, PostAdmin)
+admin.site.register(Donation, DonationAdmin)
+admin.site.register(Partner, ScalableAdmin)
+admin.site.register(Dining, DiningAdmin)
+admin.site.register(DiningBooking, DiningBookingAdmin)
+admin.site.register(Reservation, ReservationAdmin)
 admin.site.register(Document, DocumentAdmin)
+admin.site.register(Job, JobAdmin)
+admin.site.register(MediaBlob, MediaBlobAdmin)
 
 admin.site.unregister(Group)
 admin.site.unregister(BlacklistedToken)
@@ -4,3 +4,6 @@ class AppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app'
     verbose_name = 'Content'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
@@ -0,0 +1,48 @@
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+from django.dispatch import Signal
+from django.utils.text import slugify
+from rest_framework.validators import UniqueValidator
+
+# Sent inside the writing transaction after bulk_create/bulk_update/update(),
+# which send no post_save: sender is the model, ``instances`` the rows
+# (or None when only a queryset was updated), ``created`` a bool.
+bulk_changed = Signal()
+
+
+def drop_unique_validators(serializer, field_name):
+    """Remove the per-row uniqueness query on ``field_name``; the caller checks the batch at once."""
+    field = serializer.fields.get(field_name)
+    if field is not None:
+        field.validators = [v for v in field.validators if not isinstance(v, UniqueValidator)]
+
+
+def allocate_slugs(model, instances, source='title', field='slug'):
+    """
+    Give every instance without a slug a unique one derived from ``source``.
+
+    Existing slugs sharing a prefix are read in one query, then ``-2``,
+    ``-3``... suffixes are handed out in memory, so the batch never
+    collides with the table or with itself.
+    """
+    max_length = model._meta.get_field(field).max_length
+    pending = [(instance, slugify(getattr(instance, source))[:max_length]) for instance in instances
+               if not getattr(instance, field)]
+    bases = {base for _, base in pending if base}
+    if not bases:
+        return
+    existing = model._default_manager.filter(reduce(or_, [Q(**{f'{field}__startswith': base}) for base in bases]))
+    taken = set(existing.values_list(field, flat=True))
+    taken.update(getattr(instance, field) for instance in instances if getattr(instance, field))
+    for instance, base in pending:
+        if not base:
+            continue
+        slug, n = base, 1
+        while slug in taken:
+            n += 1
+            suffix = f'-{n}'
+            slug = base[:max_length - len(suffix)] + suffix
+        taken.add(slug)
+        setattr(instance, field, slug)
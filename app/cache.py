@@ -0,0 +1,34 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def get_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def version_key(model):
+    return f'version:{model._meta.label_lower}'
+
+
+def get_versions(models):
+    """
+    Return the current version stamp of each model.
+
+    A missing stamp (first use or evicted) is replaced by a fresh random one,
+    so an eviction can only ever invalidate cached entries, never revive them.
+    """
+    cache = get_cache()
+    keys = [version_key(model) for model in models]
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        for key in missing:
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+        found.update(cache.get_many(missing))
+    return [found.get(key, '') for key in keys]
+
+
+def bump_version(model):
+    get_cache().set(version_key(model), uuid.uuid4().hex, timeout=None)
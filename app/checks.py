@@ -0,0 +1,20 @@
+from django.core.checks import Tags, Warning, register
+
+from .search import index_available, missing_triggers
+
+
+@register(Tags.database)
+def check_search_triggers(app_configs, databases=None, **kwargs):
+    """Warn when a table rebuild has dropped the triggers keeping the search index in sync."""
+    warnings = []
+    for using in databases or []:
+        if not index_available(using):
+            continue
+        missing = missing_triggers(using)
+        if missing:
+            warnings.append(Warning(
+                f'Search index triggers missing on database "{using}": {", ".join(missing)}',
+                hint='A migration rebuilt the table; run "manage.py rebuild_search_index" to restore them.',
+                id='app.W001',
+            ))
+    return warnings
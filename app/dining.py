@@ -0,0 +1,116 @@
+import datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import BookingStatus, DiningBooking, DiningSlot
+
+
+class SlotFull(ValidationError):
+    """The slot has fewer free seats than the booking needs."""
+
+
+def slot_start(when, opens_at, slot_minutes):
+    """Start of the slot containing ``when``, counting slots from ``opens_at`` on its local day."""
+    local = timezone.localtime(when)
+    opening = local.replace(hour=opens_at.hour, minute=opens_at.minute, second=0, microsecond=0)
+    step = datetime.timedelta(minutes=slot_minutes)
+    return opening + (local - opening) // step * step
+
+
+def day_slots(dining, day):
+    """Start of every slot of ``dining`` on the local date ``day``."""
+    tz = timezone.get_current_timezone()
+    start = datetime.datetime.combine(day, dining.opens_at, tzinfo=tz)
+    closing = datetime.datetime.combine(day, dining.closes_at, tzinfo=tz)
+    step = datetime.timedelta(minutes=dining.slot_minutes)
+    while start + step <= closing:
+        yield start
+        start += step
+
+
+def check_booking(booking):
+    """
+    Return the slot ``booking`` falls in.
+
+    For a Dining with a capacity, this also checks the slot is within
+    opening hours and that the party fits. It takes no lock, so it is
+    advisory; update_occupancy() enforces the capacity.
+    """
+    dining = booking.dining
+    start = slot_start(booking.booking_time, dining.opens_at, dining.slot_minutes)
+    if dining.capacity is None:
+        return start
+    if start not in set(day_slots(dining, start.date())):
+        raise ValidationError({'booking_time': 'Outside of the opening hours.'})
+    if booking.guests > dining.capacity:
+        raise ValidationError({'guests': f'At most {dining.capacity} guests per booking.'})
+    return start
+
+
+def reserve(dining, start, guests):
+    slot, _ = DiningSlot.objects.get_or_create(dining=dining, start=start)
+    seats = DiningSlot.objects.filter(pk=slot.pk)
+    if dining.capacity is not None:
+        # Conditional on the seats still being free: the UPDATE locks the row
+        # and concurrent bookings re-check the condition once it is released
+        seats = seats.filter(booked__lte=dining.capacity - guests)
+    if not seats.update(booked=F('booked') + guests):
+        raise SlotFull({'booking_time': 'Not enough free seats at this time.'})
+
+
+def release(dining_id, start, guests):
+    DiningSlot.objects.filter(dining_id=dining_id, start=start).update(booked=Greatest(F('booked') - guests, 0))
+
+
+def update_occupancy(booking):
+    """
+    Move the seats of ``booking`` to match its unsaved state.
+
+    Called from DiningBooking.save() inside the booking's transaction. The
+    stored row is locked and its seats released, then the new state reserves
+    its seats, raising SlotFull when they are taken.
+    """
+    old = None
+    if booking.pk:
+        old = (
+            DiningBooking.objects.select_for_update().filter(pk=booking.pk)
+            .values('dining_id', 'slot_start', 'guests', 'status').first()
+        )
+    if old and old['status'] == BookingStatus.CONFIRMED and old['slot_start']:
+        release(old['dining_id'], old['slot_start'], old['guests'])
+    if booking.status == BookingStatus.CONFIRMED:
+        booking.slot_start = check_booking(booking)
+        reserve(booking.dining, booking.slot_start, booking.guests)
+
+
+def availability(dining, days):
+    """
+    Booked and free seats of every upcoming slot in the next ``days`` days.
+
+    Answered from DiningSlot in one query; bookings are never scanned.
+    """
+    now = timezone.now()
+    today = timezone.localdate()
+    starts = [
+        start for offset in range(days)
+        for start in day_slots(dining, today + datetime.timedelta(days=offset))
+        if start > now
+    ]
+    booked = {}
+    if starts:
+        booked = dict(
+            DiningSlot.objects.filter(dining=dining, start__range=(starts[0], starts[-1]))
+            .values_list('start', 'booked')
+        )
+    by_day = {}
+    for start in starts:
+        taken = booked.get(start, 0)
+        by_day.setdefault(start.date(), []).append({
+            'start': start,
+            'booked': taken,
+            'free': None if dining.capacity is None else max(dining.capacity - taken, 0),
+        })
+    return [{'date': day, 'slots': slots} for day, slots in by_day.items()]
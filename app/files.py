@@ -0,0 +1,188 @@
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, quote_etag
+
+from .storage import is_content_addressed
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# Content-addressed files never change, so clients may keep them forever
+IMMUTABLE = 'max-age=31536000, immutable'
+
+download_signer = signing.TimestampSigner(salt='app.files.download')
+
+
+class RangeFile:
+    """
+    Reads at most ``length`` bytes of ``file`` from ``start``.
+
+    It keeps ``fileno()`` so gunicorn can still sendfile() the range: it
+    starts at the descriptor's offset and stops at the Content-Length.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """Return (start, end) for a single satisfiable byte range, None to send it all, or False."""
+    match = RANGE_RE.match(header or '')
+    if not match or match.groups() == ('', ''):
+        # Multiple or malformed ranges: ignore the header
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start > end or start >= size:
+        return False
+    return start, end
+
+
+def serve_file(request, path, name, accel_prefix, cache_control, private=False, filename=None, as_attachment=False):
+    """
+    Answer ``request`` with the file at ``path`` (``name`` relative to its root).
+
+    Content-addressed files are cached as immutable, others per
+    ``cache_control``; ``private`` keeps shared caches from storing them.
+
+    Depending on settings.FILE_SERVE_MODE, the body is handed to the front
+    proxy (``x-accel`` for nginx, ``x-sendfile`` for Apache/lighttpd) or
+    streamed by a FileResponse that the WSGI server sends with sendfile().
+    Conditional requests get a 304, and single byte ranges a 206.
+    """
+    try:
+        stat = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404('File not found')
+    if not os.path.isfile(path):
+        raise Http404('File not found')
+
+    if is_content_addressed(name):
+        # The digest in the name is a strong validator on its own
+        etag = quote_etag(os.path.splitext(posixpath.basename(name))[0])
+        cache_control = ('private, ' if private else 'public, ') + IMMUTABLE
+    else:
+        etag = quote_etag(f'{stat.st_size:x}-{int(stat.st_mtime):x}')
+    last_modified = int(stat.st_mtime)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = build_response(request, path, name, stat.st_size, etag, accel_prefix)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    if cache_control:
+        response['Cache-Control'] = cache_control
+    if filename or as_attachment:
+        response['Content-Disposition'] = content_disposition_header(
+            as_attachment, posixpath.basename(filename or name),
+        )
+    else:
+        # FileResponse names the stored file, which for blobs is just the digest
+        response.headers.pop('Content-Disposition', None)
+    return response
+
+
+def build_response(request, path, name, size, etag, accel_prefix):
+    content_type, encoding = mimetypes.guess_type(name)
+    content_type = content_type or 'application/octet-stream'
+    mode = settings.FILE_SERVE_MODE
+
+    if mode == 'x-accel':
+        # nginx serves the body, including Range and HEAD
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = accel_prefix + name
+        return response
+    if mode == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = path
+        return response
+
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if 'Range' in request.headers and (if_range is None or if_range == etag):
+        byte_range = parse_range(request.headers['Range'], size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    fh = open(path, 'rb')
+    if byte_range is None:
+        response = FileResponse(fh, content_type=content_type)
+    else:
+        start, end = byte_range
+        response = FileResponse(RangeFile(fh, start, end - start + 1), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        size = end - start + 1
+    response['Content-Length'] = size
+    response['Accept-Ranges'] = 'bytes'
+    if encoding:
+        # Serve .gz and friends as stored, not as an encoded version of the type
+        response['Content-Type'] = 'application/octet-stream'
+    return response
+
+
+def media_path(name, private=False):
+    """
+    Return (name, path) for media file ``name``, normalized first so ``.``
+    and ``..`` segments cannot reach a private directory through another.
+
+    Raise Http404 for names outside MEDIA_ROOT, and, unless ``private``,
+    for files that resolve into settings.PRIVATE_MEDIA_DIRS.
+    """
+    name = posixpath.normpath(name)
+    if name.startswith(('..', '/')):
+        raise Http404('File not found')
+    root = os.path.realpath(default_storage.location)
+    path = os.path.realpath(default_storage.path(name))
+    if not path.startswith(root + os.sep):
+        raise Http404('File not found')
+    if not private:
+        for directory in settings.PRIVATE_MEDIA_DIRS:
+            hidden = os.path.realpath(os.path.join(root, directory))
+            if path == hidden or path.startswith(hidden + os.sep):
+                raise Http404('File not found')
+    return name, path
+
+
+def sign_download(name, filename):
+    """A token naming a stored file, for URLs that skip auth and the database."""
+    return download_signer.sign_object({'n': name, 'f': filename}, compress=True)
+
+
+def unsign_download(token):
+    """Return (name, filename) from ``token``; raise Http404 once it expires or is forged."""
+    try:
+        payload = download_signer.unsign_object(token, max_age=settings.DOWNLOAD_URL_MAX_AGE)
+    except signing.BadSignature:
+        raise Http404('Invalid or expired link')
+    return payload['n'], payload['f']
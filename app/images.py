@@ -0,0 +1,101 @@
+import logging
+import os
+import posixpath
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import models
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .models import ImageRendition
+from .storage import is_content_addressed
+
+logger = logging.getLogger(__name__)
+
+# Format name -> (Pillow format, file extension, save options)
+FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+ORIGINAL = 'original'
+
+
+def image_fields(model):
+    return [field for field in model._meta.concrete_fields if isinstance(field, models.ImageField)]
+
+
+def image_models():
+    return [model for model in apps.get_models() if image_fields(model)]
+
+
+def image_names(instances, field_names=None):
+    """Names of the images stored on ``instances``, in every image field or in ``field_names``."""
+    names = set()
+    for instance in instances:
+        for name in field_names or [field.attname for field in image_fields(type(instance))]:
+            value = getattr(instance, name)
+            if value:
+                names.add(str(value))
+    return names
+
+
+def load_renditions(names):
+    """Map each name in ``names`` to its renditions, in one query."""
+    renditions = {}
+    for rendition in ImageRendition.objects.filter(source__in=names).order_by('width'):
+        renditions.setdefault(rendition.source, []).append(rendition)
+    return renditions
+
+
+def flatten(image, format):
+    """Convert to a mode ``format`` can store; JPEG has no alpha, so paste on white."""
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    if format == 'webp':
+        return image.convert('RGBA' if has_alpha else 'RGB')
+    if has_alpha:
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image.convert('RGBA'), mask=image.convert('RGBA').getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def generate_renditions(name, storage=default_storage):
+    """
+    Write the fixed-width derivatives of image ``name`` and record them.
+
+    Widths at or above the source width are skipped, so images are never
+    upscaled. Returns the number of rows created.
+    """
+    if ImageRendition.objects.filter(source=name).exists():
+        return 0
+    try:
+        with storage.open(name) as fh:
+            image = Image.open(fh)
+            image.load()
+    except (FileNotFoundError, UnidentifiedImageError, Image.DecompressionBombError, OSError) as exc:
+        logger.warning('Cannot render %s: %s', name, exc)
+        return 0
+
+    image = ImageOps.exif_transpose(image)
+    width, height = image.size
+    rows = [ImageRendition(source=name, format=ORIGINAL, width=width, height=height, file=name)]
+    stem = os.path.splitext(name)[0]
+    if is_content_addressed(name):
+        # Content-addressed storage picks the final name; keep only upload_to
+        stem = posixpath.join(posixpath.dirname(posixpath.dirname(name)), 'image')
+    for target in settings.IMAGE_RENDITION_WIDTHS:
+        if target >= width:
+            continue
+        size = (target, max(1, round(height * target / width)))
+        resized = image.resize(size, Image.Resampling.LANCZOS)
+        for format, (pillow_format, extension, options) in FORMATS.items():
+            buffer = BytesIO()
+            flatten(resized, format).save(buffer, pillow_format, **options)
+            path = storage.save(f'renditions/{stem}-{target}w.{extension}', ContentFile(buffer.getvalue()))
+            rows.append(ImageRendition(source=name, format=format, width=size[0], height=size[1], file=path))
+    ImageRendition.objects.bulk_create(rows, ignore_conflicts=True)
+    return len(rows)
@@ -0,0 +1,99 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+# Job name -> function, filled by the @job decorator
+REGISTRY = {}
+
+
+def job(name, max_attempts=5):
+    """Register a function as a background job under ``name``."""
+    def register(func):
+        func.job_name = name
+        func.max_attempts = max_attempts
+        REGISTRY[name] = func
+        return func
+    return register
+
+
+def enqueue(func, **payload):
+    """
+    Queue ``func(**payload)`` for the run_jobs worker.
+
+    The row is written in the caller's transaction, so the job only becomes
+    visible to workers if that transaction commits. The payload must be
+    JSON serializable. With settings.JOBS_INLINE the job instead runs
+    in-process once the transaction commits (development without a worker).
+    """
+    queued = Job.objects.create(name=func.job_name, payload=payload, max_attempts=func.max_attempts)
+    if settings.JOBS_INLINE:
+        transaction.on_commit(lambda: run_inline(queued.pk))
+    return queued
+
+
+def run_inline(pk):
+    claimed = claim(Job.objects.filter(pk=pk))
+    if claimed is not None:
+        run(claimed)
+
+
+def claim(queryset=None):
+    """
+    Take the oldest due job, or return None.
+
+    Claiming is a conditional UPDATE on the job's status, so concurrent
+    workers never run the same job twice.
+    """
+    now = timezone.now()
+    queryset = Job.objects.all() if queryset is None else queryset
+    candidates = queryset.filter(status=JobStatus.QUEUED, run_after__lte=now).order_by('run_after', 'pk')
+    for pk in candidates.values_list('pk', flat=True)[:10]:
+        taken = Job.objects.filter(pk=pk, status=JobStatus.QUEUED).update(
+            status=JobStatus.RUNNING, locked_at=now, attempts=F('attempts') + 1, updated_at=now,
+        )
+        if taken:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def retry_delay(attempts):
+    """Exponential backoff: JOB_RETRY_DELAY seconds, doubled on each attempt."""
+    return timedelta(seconds=settings.JOB_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def run(claimed):
+    func = REGISTRY.get(claimed.name)
+    try:
+        if func is None:
+            raise LookupError(f'No job registered as {claimed.name!r}')
+        func(**claimed.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if claimed.attempts < claimed.max_attempts:
+            status, run_after = JobStatus.QUEUED, timezone.now() + retry_delay(claimed.attempts)
+        else:
+            status, run_after = JobStatus.FAILED, claimed.run_after
+        logger.warning('Job %s failed (attempt %s): %s', claimed, claimed.attempts, error.splitlines()[-1])
+        Job.objects.filter(pk=claimed.pk).update(
+            status=status, run_after=run_after, locked_at=None, last_error=error, updated_at=timezone.now(),
+        )
+        return False
+    Job.objects.filter(pk=claimed.pk).update(status=JobStatus.DONE, locked_at=None, updated_at=timezone.now())
+    return True
+
+
+def requeue_stale():
+    """Put back jobs whose worker died mid-run (locked longer than JOB_LOCK_TIMEOUT)."""
+    cutoff = timezone.now() - timedelta(seconds=settings.JOB_LOCK_TIMEOUT)
+    return Job.objects.filter(status=JobStatus.RUNNING, locked_at__lt=cutoff).update(
+        status=JobStatus.QUEUED, locked_at=None, updated_at=timezone.now(),
+    )
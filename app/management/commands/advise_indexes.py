@@ -0,0 +1,220 @@
+import hashlib
+import os
+
+from django.core.management.base import BaseCommand
+from django.db import connection, migrations, models, transaction
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.writer import MigrationWriter
+from django.db.models.lookups import Exact
+
+from about.urls import router as about_router
+from app.urls import router as app_router
+
+# Boolean flags whose "on" rows are what the API actually serves
+PARTIAL_FLAGS = ('active', 'in_use', 'available')
+
+
+class Proposal:
+    def __init__(self, model, fields, condition, prefix, filter_field, ordering):
+        self.model = model
+        self.fields = list(fields)
+        self.condition = condition
+        self.prefix = prefix
+        self.filter_field = filter_field
+        self.ordering = ordering
+        self.index = models.Index(fields=self.fields, condition=condition, name=self.make_name())
+
+    def make_name(self):
+        # Mirrors Index.set_name_with_model, but the condition is part of the hash
+        # so partial and full indexes over the same columns get distinct names
+        table = self.model._meta.db_table
+        column = self.fields[0].lstrip('-')
+        digest = hashlib.md5(f'{table}|{self.fields}|{self.condition}'.encode()).hexdigest()[:6]
+        return f'{table[:11]}_{column[:7]}_{digest}_idx'
+
+    @property
+    def key(self):
+        return (self.model, tuple(self.fields), str(self.condition))
+
+    def condition_code(self):
+        lookups = ', '.join(f'{name}={value!r}' for name, value in self.condition.children)
+        return f'models.Q({lookups})'
+
+    def describe(self):
+        text = f'{self.index.name} ON {self.model._meta.db_table} ({", ".join(self.fields)})'
+        if self.condition is not None:
+            text += f' WHERE {self.condition_code()}'
+        return text
+
+
+class Command(BaseCommand):
+    help = (
+        'Derive indexes from the viewsets filterset_fields, ordering and base querysets, '
+        'report EXPLAIN QUERY PLAN before and after each, and optionally write them as migrations'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--write', action='store_true', help='Write the proposals as migrations')
+
+    def handle(self, *args, **options):
+        proposals = self.collect_proposals()
+        if not proposals:
+            self.stdout.write(self.style.SUCCESS('No missing indexes'))
+            return
+
+        accepted = []
+        for proposal in proposals:
+            before, after = self.explain(proposal)
+            helps = self.improves(proposal, before, after)
+            mark = '+' if helps else '-'
+            self.stdout.write(f'{proposal.prefix}\n  {mark} {proposal.describe()}')
+            self.stdout.write(f'    before: {before}')
+            self.stdout.write(f'    after:  {after}')
+            if helps:
+                accepted.append(proposal)
+            else:
+                self.stdout.write('    skipped: the query plan does not improve')
+
+        if options['write'] and accepted:
+            self.write_migrations(accepted)
+
+    def routes(self):
+        for base, router in (('/api/', app_router), ('/about/', about_router)):
+            for prefix, viewset, _ in router.registry:
+                yield f'{base}{prefix}/', viewset
+
+    def existing_indexes(self, model):
+        existing = set()
+        for field in model._meta.concrete_fields:
+            if field.primary_key or field.unique or field.db_index:
+                existing.add(((field.name,), 'None'))
+        for index in model._meta.indexes:
+            existing.add((tuple(index.fields), str(index.condition)))
+        for fields in model._meta.unique_together:
+            existing.add((tuple(fields), 'None'))
+        return existing
+
+    def is_covered(self, proposal, existing):
+        for fields, condition in existing:
+            if condition == str(proposal.condition) and fields[:len(proposal.fields)] == tuple(proposal.fields):
+                return True
+        return False
+
+    def base_flags(self, queryset):
+        """Boolean flags the base queryset always filters on, as a Q for a partial index."""
+        condition = None
+        for child in queryset.query.where.children:
+            if isinstance(child, Exact) and child.lhs.target.name in PARTIAL_FLAGS and child.rhs is True:
+                flag = models.Q(**{child.lhs.target.name: True})
+                condition = flag if condition is None else condition & flag
+        return condition
+
+    def collect_proposals(self):
+        proposals = {}
+        for prefix, viewset in self.routes():
+            queryset = viewset.queryset
+            model = queryset.model
+            field_names = {field.name: field for field in model._meta.concrete_fields}
+            ordering = [
+                name for name in (queryset.query.order_by or model._meta.ordering)
+                if isinstance(name, str) and name.lstrip('-') in field_names
+            ]
+            condition = self.base_flags(queryset)
+            candidates = []
+
+            if ordering:
+                candidates.append((ordering, condition, None))
+            for name in getattr(viewset, 'filterset_fields', []):
+                field = field_names.get(name)
+                if field is None or field.primary_key or field.unique or isinstance(field, models.TextField):
+                    continue
+                if name in PARTIAL_FLAGS and isinstance(field, models.BooleanField):
+                    # Low-cardinality flag: index only the rows that are switched on
+                    flag = models.Q(**{name: True})
+                    candidates.append((ordering or ['id'], flag if condition is None else condition & flag, None))
+                else:
+                    candidates.append(([name, *ordering], condition, name))
+
+            existing = self.existing_indexes(model)
+            for fields, candidate_condition, filter_field in candidates:
+                proposal = Proposal(model, fields, candidate_condition, prefix, filter_field, ordering)
+                if proposal.key not in proposals and not self.is_covered(proposal, existing):
+                    proposals[proposal.key] = proposal
+        return list(proposals.values())
+
+    def sample_value(self, model, name):
+        field = model._meta.get_field(name)
+        value = model._default_manager.values_list(field.attname, flat=True).first()
+        if value is not None:
+            return value
+        if isinstance(field, models.BooleanField):
+            return True
+        if isinstance(field, (models.IntegerField, models.ForeignKey, models.DecimalField)):
+            return 1
+        return 'x'
+
+    def typical_query(self, proposal):
+        """The query an endpoint runs that the index is meant to serve."""
+        queryset = proposal.model._default_manager.all()
+        if proposal.condition is not None:
+            queryset = queryset.filter(proposal.condition)
+        if proposal.filter_field:
+            value = self.sample_value(proposal.model, proposal.filter_field)
+            queryset = queryset.filter(**{proposal.filter_field: value})
+        return queryset.order_by(*proposal.ordering)[:10]
+
+    def explain(self, proposal):
+        queryset = self.typical_query(proposal)
+        before = self.plan(queryset)
+        with transaction.atomic():
+            sql = proposal.index.create_sql(proposal.model, connection.schema_editor())
+            with connection.cursor() as cursor:
+                cursor.execute(str(sql))
+            after = self.plan(queryset)
+            transaction.set_rollback(True)
+        return before, after
+
+    def plan_cost(self, plan):
+        """Full table scans and temporary sort trees in an SQLite query plan."""
+        steps = [step.strip() for step in plan.split(';')]
+        return sum(
+            ('TEMP B-TREE' in step) + (step.startswith('SCAN') and 'USING' not in step)
+            for step in steps
+        )
+
+    def improves(self, proposal, before, after):
+        if connection.vendor != 'sqlite':
+            return True
+        return proposal.index.name in after and self.plan_cost(after) < self.plan_cost(before)
+
+    def plan(self, queryset):
+        lines = [line.strip() for line in queryset.explain().splitlines() if line.strip()]
+        return '; '.join(line.split(' ', 3)[-1] if line[:1].isdigit() else line for line in lines)
+
+    def write_migrations(self, proposals):
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        by_app = {}
+        for proposal in proposals:
+            by_app.setdefault(proposal.model._meta.app_label, []).append(proposal)
+
+        for app_label, app_proposals in by_app.items():
+            leaf = loader.graph.leaf_nodes(app_label)[0]
+            number = int(leaf[1].split('_')[0]) + 1
+            migration = migrations.Migration(f'{number:04d}_advised_indexes', app_label)
+            migration.dependencies = [leaf]
+            migration.operations = [
+                migrations.AddIndex(model_name=proposal.model._meta.model_name, index=proposal.index)
+                for proposal in app_proposals
+            ]
+            writer = MigrationWriter(migration)
+            with open(writer.path, 'w', encoding='utf-8') as fh:
+                fh.write(writer.as_string())
+            self.stdout.write(self.style.SUCCESS(f'Wrote {os.path.relpath(writer.path)}'))
+
+            self.stdout.write('Add to the Meta.indexes of each model so makemigrations stays clean:')
+            for proposal in app_proposals:
+                condition = f', condition={proposal.condition_code()}' if proposal.condition is not None else ''
+                self.stdout.write(
+                    f'  {proposal.model.__name__}: '
+                    f'models.Index(fields={proposal.fields!r}{condition}, name={proposal.index.name!r})'
+                )
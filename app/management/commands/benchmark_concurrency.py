@@ -0,0 +1,133 @@
+import multiprocessing
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from app.models import Dining, DiningBooking, Listing, Order, OrderItem, User
+
+READ_PATHS = ['/api/listings/', '/api/dining/', '/api/blog-posts/']
+
+SEED_PREFIX = 'benchmark-concurrency'
+
+BENCHMARK_EMAIL = f'{SEED_PREFIX}@example.com'
+
+
+def place_order(user, listings, rng):
+    with transaction.atomic():
+        chosen = rng.sample(listings, min(3, len(listings)))
+        order = Order.objects.create(user=user, total_price=sum(listing.price for listing in chosen))
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, item=listing, quantity=1, price=listing.price) for listing in chosen
+        ])
+
+
+def book_dining(user, dinings, rng):
+    DiningBooking.objects.create(
+        user=user, dining=rng.choice(dinings), guests=rng.randint(1, 6), booking_time=timezone.now()
+    )
+
+
+def worker(args):
+    """Run one gunicorn-worker-like process: a mix of catalog reads and writes."""
+    seed, operations, write_ratio = args
+    rng = random.Random(seed)
+    client = Client()
+    user = User.objects.get(email=BENCHMARK_EMAIL)
+    listings = list(Listing.objects.filter(slug__startswith=SEED_PREFIX))
+    dinings = list(Dining.objects.filter(slug__startswith=SEED_PREFIX))
+    reads, writes, locked = [], [], 0
+
+    for i in range(operations):
+        started = time.perf_counter()
+        if rng.random() < write_ratio:
+            try:
+                if dinings and rng.random() < 0.5:
+                    book_dining(user, dinings, rng)
+                else:
+                    place_order(user, listings, rng)
+            except OperationalError as exc:
+                if 'locked' not in str(exc):
+                    raise
+                locked += 1
+                continue
+            writes.append((time.perf_counter() - started) * 1000)
+        else:
+            client.get(READ_PATHS[i % len(READ_PATHS)])
+            reads.append((time.perf_counter() - started) * 1000)
+
+    connections.close_all()
+    return reads, writes, locked
+
+
+class Command(BaseCommand):
+    help = (
+        'Mix order and booking writes with catalog reads from several processes against '
+        'the SQLite database. Compare runs with and without SQLITE_PROFILE=1'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Processes, as gunicorn workers')
+        parser.add_argument('--operations', type=int, default=300, help='Operations per worker')
+        parser.add_argument('--write-ratio', type=float, default=0.2)
+
+    def handle(self, *args, **options):
+        connection = connections['default']
+        if connection.vendor != 'sqlite':
+            raise CommandError('The default database is not SQLite')
+        profile = 'on' if getattr(settings, 'SQLITE_PRAGMAS', None) else 'off'
+        self.stdout.write(f'SQLite profile {profile}, {options["workers"]} workers')
+
+        self.seed()
+        # Children must open their own connections
+        connections.close_all()
+
+        jobs = [(seed, options['operations'], options['write_ratio']) for seed in range(options['workers'])]
+        caches = {**settings.CACHES, 'benchmark': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        try:
+            with override_settings(CACHES=caches, RESPONSE_CACHE_ALIAS='benchmark', ALLOWED_HOSTS=['*']):
+                started = time.perf_counter()
+                with multiprocessing.get_context('fork').Pool(options['workers']) as pool:
+                    results = pool.map(worker, jobs)
+                elapsed = time.perf_counter() - started
+        finally:
+            self.cleanup()
+
+        self.report(results, elapsed)
+
+    def seed(self):
+        User.objects.get_or_create(email=BENCHMARK_EMAIL)
+        Listing.objects.bulk_create([
+            Listing(title=f'Listing {i}', description='Benchmark listing', price=10 + i, slug=f'{SEED_PREFIX}-{i}')
+            for i in range(50)
+        ])
+        Dining.objects.bulk_create([
+            Dining(title=f'Dining {i}', description='Benchmark dining', location='Kigali', slug=f'{SEED_PREFIX}-{i}')
+            for i in range(10)
+        ])
+
+    def cleanup(self):
+        # Orders, items and bookings cascade from the user and the catalog rows
+        User.objects.filter(email=BENCHMARK_EMAIL).delete()
+        Listing.objects.filter(slug__startswith=SEED_PREFIX).delete()
+        Dining.objects.filter(slug__startswith=SEED_PREFIX).delete()
+
+    def report(self, results, elapsed):
+        reads = sorted(latency for result in results for latency in result[0])
+        writes = sorted(latency for result in results for latency in result[1])
+        locked = sum(result[2] for result in results)
+        self.stdout.write(f'{(len(reads) + len(writes)) / elapsed:.1f} operations/s')
+        for label, latencies in (('reads', reads), ('writes', writes)):
+            if latencies:
+                self.stdout.write(
+                    f'{label}: {len(latencies)}, p50 {statistics.median(latencies):.1f} ms, '
+                    f'p95 {latencies[int(len(latencies) * 0.95) - 1]:.1f} ms'
+                )
+        line = f'"database is locked" errors: {locked}'
+        self.stdout.write(self.style.ERROR(line) if locked else line)
@@ -0,0 +1,74 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.filters import SearchFilter
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from app.models import Listing, Post, User
+from app.search import FullTextSearchFilter, index_available
+from app.views import BlogPostViewSet, ItemViewSet
+
+SYLLABLES = ['ka', 'ki', 'mu', 'ra', 'to', 'nya', 'be', 'lo', 'gu', 'shi', 'wa', 'ze']
+
+
+class Command(BaseCommand):
+    help = 'Compare the FTS5 search path with the LIKE-based SearchFilter'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000,
+                            help='Synthetic rows per model, rolled back afterwards')
+        parser.add_argument('--queries', type=int, default=200)
+
+    def handle(self, *args, **options):
+        if not index_available('default'):
+            raise CommandError('The full-text search index is not available on this database')
+        with transaction.atomic():
+            self.seed(options['rows'])
+            for viewset in (BlogPostViewSet, ItemViewSet):
+                self.compare(viewset, options['queries'])
+            transaction.set_rollback(True)
+
+    def vocabulary(self, rng, size=5000):
+        words = set()
+        while len(words) < size:
+            words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+        return sorted(words)
+
+    def seed(self, rows):
+        rng = random.Random(0)
+        self.words = self.vocabulary(rng)
+        # Zipf-like weights: a few very common words and a long tail of rare ones
+        weights = [1 / (rank + 1) for rank in range(len(self.words))]
+        user = User.objects.create(email='benchmark-search@example.com')
+
+        def text(words):
+            return ' '.join(rng.choices(self.words, weights, k=words))
+
+        Post.objects.bulk_create([
+            Post(title=text(4), description=text(300), published_by=user, slug=f'benchmark-post-{i}')
+            for i in range(rows)
+        ])
+        Listing.objects.bulk_create([
+            Listing(title=text(4), description=text(300), price=10, slug=f'benchmark-listing-{i}')
+            for i in range(rows)
+        ])
+
+    def compare(self, viewset, queries):
+        rng = random.Random(1)
+        # Mid-frequency words, the last one typed halfway as in a search box
+        terms = [
+            f'{rng.choice(self.words[50:1000])} {rng.choice(self.words[50:1000])[:4]}'
+            for _ in range(queries)
+        ]
+        view = viewset()
+        for label, backend in (('LIKE', SearchFilter()), ('FTS5', FullTextSearchFilter())):
+            started = time.perf_counter()
+            for term in terms:
+                request = Request(APIRequestFactory().get('/', {'search': term}))
+                queryset = backend.filter_queryset(request, viewset.queryset.all(), view)
+                list(queryset[:10])
+            elapsed = (time.perf_counter() - started) * 1000 / queries
+            self.stdout.write(f'{viewset.__name__} {label}: {elapsed:.2f} ms per query')
@@ -0,0 +1,105 @@
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+
+from app.models import Listing, Post, User
+
+DEFAULT_PATHS = ['/api/listings/', '/api/blog-posts/', '/api/partners/', '/about/team/']
+
+SEED_PREFIX = 'benchmark-throughput'
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure request throughput against the configured database. Run it once on '
+        'SQLite and once with DB_ENGINE=postgresql to compare the two backends'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Total requests')
+        parser.add_argument('--threads', type=int, default=4,
+                            help='Concurrent client threads, as gunicorn threads in one worker')
+        parser.add_argument('--seed', type=int, default=200,
+                            help='Listings and posts created for the run and deleted afterwards')
+        parser.add_argument('--path', action='append', dest='paths', help='Endpoint to request (repeatable)')
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or DEFAULT_PATHS
+        threads = options['threads']
+        per_thread = max(1, options['requests'] // threads)
+
+        self.stdout.write(f'Database: {connection.vendor}, {self.connection_mode()}')
+        self.seed(options['seed'])
+        try:
+            # Response caching is switched off so every request reaches the database
+            caches = {**settings.CACHES, 'benchmark': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+            with override_settings(CACHES=caches, RESPONSE_CACHE_ALIAS='benchmark', ALLOWED_HOSTS=['*']):
+                self.run(paths, 50 // threads or 1, threads)  # warm up
+                latencies, elapsed, errors = self.run(paths, per_thread, threads)
+        finally:
+            self.cleanup()
+
+        total = len(latencies)
+        latencies.sort()
+        self.stdout.write(
+            f'{total} requests, {threads} threads: {total / elapsed:.1f} req/s, '
+            f'p50 {statistics.median(latencies):.1f} ms, p95 {latencies[int(total * 0.95) - 1]:.1f} ms, '
+            f'{errors} errors'
+        )
+
+    def connection_mode(self):
+        params = connection.settings_dict
+        if params['OPTIONS'].get('pool'):
+            return f"pooled (max_size {params['OPTIONS']['pool'].get('max_size')})"
+        if params['CONN_MAX_AGE']:
+            return f"persistent (CONN_MAX_AGE {params['CONN_MAX_AGE']})"
+        return 'new connection per request'
+
+    def seed(self, rows):
+        user, _ = User.objects.get_or_create(email=f'{SEED_PREFIX}@example.com')
+        Listing.objects.bulk_create([
+            Listing(title=f'Listing {i}', description='Benchmark listing', price=10, slug=f'{SEED_PREFIX}-{i}')
+            for i in range(rows)
+        ])
+        Post.objects.bulk_create([
+            Post(title=f'Post {i}', description='Benchmark post', published_by=user, slug=f'{SEED_PREFIX}-{i}')
+            for i in range(rows)
+        ])
+
+    def cleanup(self):
+        Listing.objects.filter(slug__startswith=SEED_PREFIX).delete()
+        User.objects.filter(email=f'{SEED_PREFIX}@example.com').delete()
+
+    def run(self, paths, per_thread, threads):
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+
+        def worker():
+            # Client fires request_started/finished, so connections are opened,
+            # reused or returned to the pool exactly as under gunicorn
+            client = Client()
+            timings, failed = [], 0
+            for i in range(per_thread):
+                started = time.perf_counter()
+                response = client.get(paths[i % len(paths)])
+                timings.append((time.perf_counter() - started) * 1000)
+                failed += response.status_code != 200
+            connection.close()
+            with lock:
+                latencies.extend(timings)
+                errors.append(failed)
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return latencies, time.perf_counter() - started, sum(errors)
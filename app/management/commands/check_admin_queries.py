@@ -0,0 +1,62 @@
+from django.contrib import admin
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from app.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Render every admin changelist against the current database at two page sizes and '
+        'check the query count is within budget and does not grow with the page'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--small', type=int, default=1, help='Small page size')
+        parser.add_argument('--large', type=int, default=100, help='Large page size')
+        parser.add_argument('--budget', type=int, default=12, help='Most queries one changelist may run')
+
+    def count_queries(self, client, url, model_admin, page_size):
+        model_admin.list_per_page, per_page = page_size, model_admin.list_per_page
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url)
+        finally:
+            model_admin.list_per_page = per_page
+        if response.status_code != 200:
+            return None
+        return len(queries)
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(is_superuser=True).first()
+        if user is None:
+            raise CommandError('A superuser is needed to render the admin')
+        budget = options['budget']
+        failures = []
+
+        with override_settings(ALLOWED_HOSTS=['*']):
+            client = Client()
+            client.force_login(user)
+            try:
+                for model, model_admin in admin.site._registry.items():
+                    opts = model._meta
+                    url = reverse(f'admin:{opts.app_label}_{opts.model_name}_changelist')
+                    small = self.count_queries(client, url, model_admin, options['small'])
+                    large = self.count_queries(client, url, model_admin, options['large'])
+                    if small is None or large is None:
+                        self.stdout.write(self.style.WARNING(f'{url}: skipped, request refused'))
+                        continue
+                    ok = small == large and large <= budget
+                    line = f'{url}: {small} / {large} queries (budget {budget})'
+                    self.stdout.write(line if ok else self.style.ERROR(line))
+                    if not ok:
+                        failures.append(line)
+            finally:
+                client.logout()
+
+        if failures:
+            raise CommandError(f'{len(failures)} changelist(s) over budget or not constant')
+        self.stdout.write(self.style.SUCCESS('All admin changelists within budget'))
@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from about.urls import router as about_router
+from app.models import User
+from app.urls import router as app_router
+
+
+class Command(BaseCommand):
+    help = (
+        'Run every list endpoint against the current database at two page sizes and '
+        'check the query count is within budget and does not grow with the page'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--small', type=int, default=1, help='Small page size')
+        parser.add_argument('--large', type=int, default=100, help='Large page size')
+
+    def count_queries(self, base, prefix, viewset, page_size, user):
+        pagination_class = type('BudgetPagination', (viewset.pagination_class,), {'page_size': page_size})
+        view = viewset.as_view({'get': 'list'}, pagination_class=pagination_class)
+        request = APIRequestFactory().get(f'{base}{prefix}/')
+        if user:
+            force_authenticate(request, user=user)
+        response = view(request)
+        if 'X-Query-Count' not in response:
+            # Refused before the action ran, e.g. no superuser to authenticate as
+            return None
+        return int(response['X-Query-Count'])
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(is_superuser=True).first()
+        routes = [('/api/', app_router), ('/about/', about_router)]
+        failures = []
+
+        # Cached responses would skip the queries being measured
+        caches = {**settings.CACHES, 'budget_check': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        with override_settings(CACHES=caches, RESPONSE_CACHE_ALIAS='budget_check', QUERY_BUDGET_ENFORCE=False,
+                               ALLOWED_HOSTS=['*']):
+            for base, router in routes:
+                for prefix, viewset, _ in router.registry:
+                    if not hasattr(viewset, 'list'):
+                        continue
+                    budget = viewset.query_budget.get('list')
+                    small = self.count_queries(base, prefix, viewset, options['small'], user)
+                    large = self.count_queries(base, prefix, viewset, options['large'], user)
+                    if small is None or large is None:
+                        self.stdout.write(self.style.WARNING(f'{base}{prefix}/: skipped, request refused'))
+                        continue
+                    ok = small == large and (budget is None or large <= budget)
+                    line = f'{base}{prefix}/: {small} / {large} queries (budget {budget})'
+                    self.stdout.write(line if ok else self.style.ERROR(line))
+                    if not ok:
+                        failures.append(line)
+
+        if failures:
+            raise CommandError(f'{len(failures)} endpoint(s) over budget or not constant')
+        self.stdout.write(self.style.SUCCESS('All list endpoints within budget'))
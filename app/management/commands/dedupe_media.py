@@ -0,0 +1,84 @@
+from django.apps import apps
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models, transaction
+
+from app import tasks
+from app.cache import bump_version
+from app.jobs import enqueue
+from app.models import ImageRendition
+from app.storage import ContentAddressedStorage, is_content_addressed
+
+
+class Command(BaseCommand):
+    help = (
+        'Move files uploaded before content-addressed storage to their digest names, '
+        'so identical uploads share one file'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--delete', action='store_true',
+                            help='Delete the old files once nothing refers to them')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def file_fields(self):
+        for model in apps.get_models():
+            if model is ImageRendition:
+                continue
+            for field in model._meta.concrete_fields:
+                if isinstance(field, models.FileField):
+                    yield model, field
+
+    def handle(self, *args, **options):
+        if not isinstance(default_storage, ContentAddressedStorage):
+            raise CommandError('The default storage is not ContentAddressedStorage')
+
+        moved = {}
+        for model, field in self.file_fields():
+            names = (
+                model._default_manager.exclude(**{field.name: ''}).exclude(**{field.name: None})
+                .values_list(field.name, flat=True).distinct()
+            )
+            changed = []
+            for old in names:
+                if is_content_addressed(old):
+                    continue
+                if old not in moved:
+                    if not default_storage.exists(old):
+                        self.stderr.write(f'{model._meta.label}.{field.name}: {old} is missing')
+                        continue
+                    if options['dry_run']:
+                        moved[old] = None
+                    else:
+                        with default_storage.open(old) as fh:
+                            moved[old] = default_storage.save(old, File(fh, name=old))
+                self.stdout.write(f'{old} -> {moved[old] or "(dry run)"}')
+                if moved[old]:
+                    with transaction.atomic():
+                        model._default_manager.filter(**{field.name: old}).update(**{field.name: moved[old]})
+                    changed.append(moved[old])
+            if changed:
+                # update() sends no signals: refresh cached responses and renditions here
+                bump_version(model)
+                if isinstance(field, models.ImageField):
+                    enqueue(tasks.render_images, model=model._meta.label, names=sorted(set(changed)))
+
+        stored = {new for new in moved.values() if new}
+        self.stdout.write(self.style.SUCCESS(f'{len(moved)} files now stored as {len(stored)} blobs'))
+
+        if options['delete'] and not options['dry_run']:
+            deleted = 0
+            for old, new in moved.items():
+                if not new:
+                    continue
+                renditions = ImageRendition.objects.filter(source=old)
+                for rendition in renditions.exclude(format='original'):
+                    # Rendition files are content-addressed too and may be shared
+                    name = rendition.file.name
+                    if not ImageRendition.objects.filter(file=name).exclude(source=old).exists():
+                        default_storage.delete(name)
+                renditions.delete()
+                default_storage.delete(old)
+                deleted += 1
+            self.stdout.write(f'Deleted {deleted} old files')
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from app.cache import bump_version
+from app.images import generate_renditions, image_fields, image_models
+
+
+class Command(BaseCommand):
+    help = 'Generate the missing renditions of every uploaded image'
+
+    def handle(self, *args, **options):
+        total = 0
+        for model in image_models():
+            created = 0
+            for field in image_fields(model):
+                names = model._default_manager.exclude(**{field.name: ''}).exclude(**{field.name: None})
+                for name in names.values_list(field.name, flat=True).distinct():
+                    created += generate_renditions(name)
+            if created:
+                bump_version(model)
+                self.stdout.write(f'{model._meta.label}: {created} renditions')
+            total += created
+        self.stdout.write(self.style.SUCCESS(f'{total} renditions generated'))
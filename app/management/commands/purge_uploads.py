@@ -0,0 +1,33 @@
+import os
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from app.models import UploadSession
+
+
+class Command(BaseCommand):
+    help = 'Delete upload sessions idle for longer than UPLOAD_SESSION_TTL, and their partial files'
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=settings.UPLOAD_SESSION_TTL)
+        # The post_delete receiver removes each session's part file
+        deleted, _ = UploadSession.objects.filter(updated_at__lt=cutoff).delete()
+        self.stdout.write(f'Deleted {deleted} upload sessions')
+
+        # Part files whose session row is gone, e.g. after a crash
+        directory = settings.UPLOAD_SESSION_DIR
+        if not os.path.isdir(directory):
+            return
+        live = {str(pk) for pk in UploadSession.objects.values_list('pk', flat=True)}
+        oldest = time.time() - settings.UPLOAD_SESSION_TTL
+        orphans = 0
+        for entry in os.scandir(directory):
+            stem = entry.name.removesuffix('.part')
+            if entry.is_file() and stem not in live and entry.stat().st_mtime < oldest:
+                os.unlink(entry.path)
+                orphans += 1
+        self.stdout.write(f'Deleted {orphans} orphaned part files')
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from app.search import index_available, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the SQLite full-text search index from the searchable tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if not index_available(using):
+            raise CommandError(f'No full-text search index on database "{using}"')
+        with transaction.atomic(using=using):
+            rebuild_index(using)
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt'))
@@ -0,0 +1,46 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from app.models import DiningBooking, Donation, Order
+from app.stats import ROLLUPS
+
+# The raw rows behind each rollup, and the timestamp that picks their day
+SOURCES = {
+    'donations': (Donation, 'donated_at'),
+    'orders': (Order, 'created_at'),
+    'bookings': (DiningBooking, 'booking_time'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the daily stats rollups for a range of days, to catch up on writes that '
+        'sent no signals (bulk updates, raw SQL) or to backfill after deploying'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('rollups', nargs='*', help=f'Any of {", ".join(ROLLUPS)} (default: all)')
+        parser.add_argument('--days', type=int, default=2, help='Rebuild the last N days, today included')
+        parser.add_argument('--all', action='store_true', help='Rebuild from the first recorded day')
+
+    def handle(self, *args, **options):
+        names = options['rollups'] or list(ROLLUPS)
+        unknown = set(names) - set(ROLLUPS)
+        if unknown:
+            raise CommandError(f'Unknown rollups: {", ".join(sorted(unknown))}')
+
+        today = timezone.localdate()
+        for name in names:
+            start, end = today - datetime.timedelta(days=options['days'] - 1), today
+            if options['all']:
+                model, field = SOURCES[name]
+                span = model.objects.aggregate(first=Min(field), last=Max(field))
+                if span['first'] is None:
+                    continue
+                # Bookings can be made for future days
+                start, end = timezone.localdate(span['first']), max(today, timezone.localdate(span['last']))
+            ROLLUPS[name](start, end)
+            self.stdout.write(f'{name}: rebuilt {start} to {end}')
@@ -0,0 +1,54 @@
+import signal
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from app import tasks  # noqa: F401  (registers the jobs)
+from app.jobs import claim, requeue_stale, run
+from app.models import Job, JobStatus
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs until stopped'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once no job is due')
+        parser.add_argument('--sleep', type=float, default=1.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--purge-days', type=int, default=7,
+                            help='Delete finished jobs older than this many days (0 keeps them)')
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        self.purge(options['purge_days'])
+
+        done = failed = 0
+        while not self.stopping:
+            # Long-running process: drop connections that went stale between jobs
+            close_old_connections()
+            requeue_stale()
+            claimed = claim()
+            if claimed is None:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+            if run(claimed):
+                done += 1
+            else:
+                failed += 1
+                self.stderr.write(f'{claimed.name} #{claimed.pk} failed (attempt {claimed.attempts})')
+        self.stdout.write(f'{done} jobs done, {failed} failed')
+
+    def stop(self, signum, frame):
+        # Finish the current job, then exit
+        self.stopping = True
+
+    def purge(self, days):
+        if days:
+            cutoff = timezone.now() - timedelta(days=days)
+            Job.objects.filter(status=JobStatus.DONE, updated_at__lt=cutoff).delete()
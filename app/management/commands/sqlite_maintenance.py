@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from app.search import INDEX_TABLE, index_available
+
+# PRAGMA auto_vacuum values
+INCREMENTAL = 2
+
+
+class Command(BaseCommand):
+    help = (
+        'Refresh SQLite planner statistics, merge the search index, release free pages '
+        'and checkpoint the WAL. Safe to run from cron while the API is serving'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyze', action='store_true',
+                            help='Run a full ANALYZE instead of PRAGMA optimize')
+        parser.add_argument('--pages', type=int, default=1000,
+                            help='Free pages released per run by incremental vacuum')
+        parser.add_argument('--enable-incremental-vacuum', action='store_true',
+                            help='Switch the database to auto_vacuum=INCREMENTAL (runs a full VACUUM once)')
+
+    def pragma(self, cursor, name):
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('The default database is not SQLite')
+
+        with connection.cursor() as cursor:
+            if options['enable_incremental_vacuum']:
+                cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                cursor.execute('VACUUM')
+                self.stdout.write('auto_vacuum set to INCREMENTAL')
+
+            if options['analyze']:
+                cursor.execute('ANALYZE')
+                self.stdout.write('ANALYZE done')
+            else:
+                # Only re-analyzes tables whose statistics are stale
+                cursor.execute('PRAGMA optimize')
+                self.stdout.write('PRAGMA optimize done')
+
+            if index_available(connection.alias):
+                cursor.execute(f"INSERT INTO {INDEX_TABLE}({INDEX_TABLE}) VALUES ('optimize')")
+                self.stdout.write('Search index segments merged')
+
+            free = self.pragma(cursor, 'freelist_count')
+            if self.pragma(cursor, 'auto_vacuum') == INCREMENTAL:
+                cursor.execute(f"PRAGMA incremental_vacuum({options['pages']})")
+                released = free - self.pragma(cursor, 'freelist_count')
+                self.stdout.write(f'Released {released} of {free} free pages')
+            elif free:
+                self.stdout.write(
+                    f'{free} free pages; run with --enable-incremental-vacuum once to reclaim them'
+                )
+
+            if self.pragma(cursor, 'journal_mode') == 'wal':
+                cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                busy, frames, checkpointed = cursor.fetchone()
+                state = 'busy, retry later' if busy else f'{checkpointed} of {frames} frames'
+                self.stdout.write(f'WAL checkpoint: {state}')
+
+        self.stdout.write(self.style.SUCCESS('Maintenance complete'))
@@ -0,0 +1,52 @@
+from django.db import migrations
+
+# (kind, code, table, title, body) for each searchable table
+SOURCES = [
+    ('post', 1, 'app_post', "new.title", "coalesce(new.short_desc, '') || ' ' || new.description"),
+    ('listing', 2, 'app_listing', "new.title", "coalesce(new.short_desc, '') || ' ' || new.description"),
+    ('dining', 3, 'app_dining', "new.title",
+     "coalesce(new.short_desc, '') || ' ' || new.description || ' ' || new.location"),
+]
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE search_index USING fts5("
+        "kind UNINDEXED, object_id UNINDEXED, title, body, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4')"
+    )
+    for kind, code, table, title, body in SOURCES:
+        insert = (
+            f"INSERT INTO search_index(rowid, kind, object_id, title, body) "
+            f"VALUES (new.id * 8 + {code}, '{kind}', new.id, {title}, {body});"
+        )
+        delete = f"DELETE FROM search_index WHERE rowid = old.id * 8 + {code};"
+        schema_editor.execute(f"CREATE TRIGGER search_index_{kind}_ai AFTER INSERT ON {table} BEGIN {insert} END")
+        schema_editor.execute(f"CREATE TRIGGER search_index_{kind}_au AFTER UPDATE ON {table} BEGIN {delete} {insert} END")
+        schema_editor.execute(f"CREATE TRIGGER search_index_{kind}_ad AFTER DELETE ON {table} BEGIN {delete} END")
+        schema_editor.execute(
+            f"INSERT INTO search_index(rowid, kind, object_id, title, body) "
+            f"SELECT new.id * 8 + {code}, '{kind}', new.id, {title}, {body} FROM {table} AS new"
+        )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for kind, _, _, _, _ in SOURCES:
+        for suffix in ('ai', 'au', 'ad'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS search_index_{kind}_{suffix}")
+    schema_editor.execute("DROP TABLE IF EXISTS search_index")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0023_document_document_type_alter_document_file_type'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,65 @@
+from django.db import migrations
+
+# (kind, code, table, slug, visibility, title, body) for each searchable table
+SOURCES = [
+    ('post', 1, 'app_post', "new.slug", "'public'", "new.title",
+     "coalesce(new.short_desc, '') || ' ' || new.description"),
+    ('listing', 2, 'app_listing', "new.slug", "'public'", "new.title",
+     "coalesce(new.short_desc, '') || ' ' || new.description"),
+    ('dining', 3, 'app_dining', "new.slug", "'public'", "new.title",
+     "coalesce(new.short_desc, '') || ' ' || new.description || ' ' || new.location"),
+    ('document', 4, 'app_document', "NULL", "new.visibility", "new.file_name",
+     "coalesce(new.description, '')"),
+]
+
+
+def drop_triggers(schema_editor, kinds):
+    for kind in kinds:
+        for suffix in ('ai', 'au', 'ad'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS search_index_{kind}_{suffix}")
+
+
+def recreate_index(apps, schema_editor):
+    # FTS5 tables cannot gain columns, so the index is rebuilt with slug and
+    # visibility stored alongside each hit and documents added
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    drop_triggers(schema_editor, [source[0] for source in SOURCES])
+    schema_editor.execute("DROP TABLE IF EXISTS search_index")
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE search_index USING fts5("
+        "kind UNINDEXED, object_id UNINDEXED, slug UNINDEXED, visibility UNINDEXED, title, body, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4')"
+    )
+    for kind, code, table, slug, visibility, title, body in SOURCES:
+        values = f"new.id * 8 + {code}, '{kind}', new.id, {slug}, {visibility}, {title}, {body}"
+        insert = (
+            f"INSERT INTO search_index(rowid, kind, object_id, slug, visibility, title, body) "
+            f"VALUES ({values});"
+        )
+        delete = f"DELETE FROM search_index WHERE rowid = old.id * 8 + {code};"
+        schema_editor.execute(f"CREATE TRIGGER search_index_{kind}_ai AFTER INSERT ON {table} BEGIN {insert} END")
+        schema_editor.execute(f"CREATE TRIGGER search_index_{kind}_au AFTER UPDATE ON {table} BEGIN {delete} {insert} END")
+        schema_editor.execute(f"CREATE TRIGGER search_index_{kind}_ad AFTER DELETE ON {table} BEGIN {delete} END")
+        schema_editor.execute(
+            f"INSERT INTO search_index(rowid, kind, object_id, slug, visibility, title, body) "
+            f"SELECT {values} FROM {table} AS new"
+        )
+
+
+def restore_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DELETE FROM search_index WHERE kind = 'document'")
+    drop_triggers(schema_editor, ['document'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0024_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(recreate_index, restore_index),
+    ]
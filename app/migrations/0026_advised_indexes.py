@@ -0,0 +1,109 @@
+# Generated by Django 5.1.6 on 2026-10-18 05:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0025_search_index_documents'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['date_joined'], name='app_user_date_jo_9b3462_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'date_joined'], name='app_user_role_d0d48b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['created_at'], name='app_post_created_5b1dd9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['type', 'created_at'], name='app_post_type_669990_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['status', 'created_at'], name='app_post_status_e6760b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['published_by', 'created_at'], name='app_post_publish_8b340d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['created_at'], name='app_listing_created_375fb6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['type', 'created_at'], name='app_listing_type_f56197_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(condition=models.Q(('available', True)), fields=['created_at'], name='app_listing_created_e73db4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dining',
+            index=models.Index(fields=['created_at'], name='app_dining_created_cbf66a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dining',
+            index=models.Index(fields=['title', 'created_at'], name='app_dining_title_08dc56_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='diningbooking',
+            index=models.Index(fields=['booking_time'], name='app_diningb_booking_69aac2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='diningbooking',
+            index=models.Index(fields=['dining', 'booking_time'], name='app_diningb_dining_64ecee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='diningbooking',
+            index=models.Index(fields=['user', 'booking_time'], name='app_diningb_user_630219_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['donated_at'], name='app_donatio_donated_97efd1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['amount', 'donated_at'], name='app_donatio_amount_c694c9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['email', 'donated_at'], name='app_donatio_email_97f0db_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['created_at'], name='app_order_created_f738d0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'created_at'], name='app_order_status_5c48b2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', 'created_at'], name='app_order_user_5e4338_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='partner',
+            index=models.Index(fields=['name', 'id'], name='app_partner_name_d6dbad_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['-uploaded_at'], name='app_documen_uploade_36a4e9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['document_type', '-uploaded_at'], name='app_documen_documen_80d368_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['visibility', '-uploaded_at'], name='app_documen_visibil_84e1d8_idx'),
+        ),
+    ]
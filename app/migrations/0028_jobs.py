@@ -0,0 +1,70 @@
+# Generated by Django 5.1.6 on 2026-10-18 05:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+# Adding a NOT NULL column makes SQLite rebuild app_document, which drops
+# its search index triggers; they are recreated afterwards (and before the
+# column is removed again when migrating backwards).
+DOCUMENT_VALUES = (
+    "new.id * 8 + 4, 'document', new.id, NULL, new.visibility, new.file_name, "
+    "coalesce(new.description, '')"
+)
+
+
+def create_document_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    insert = (
+        "INSERT INTO search_index(rowid, kind, object_id, slug, visibility, title, body) "
+        f"VALUES ({DOCUMENT_VALUES});"
+    )
+    delete = "DELETE FROM search_index WHERE rowid = old.id * 8 + 4;"
+    for suffix in ('ai', 'au', 'ad'):
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS search_index_document_{suffix}")
+    schema_editor.execute(f"CREATE TRIGGER search_index_document_ai AFTER INSERT ON app_document BEGIN {insert} END")
+    schema_editor.execute(f"CREATE TRIGGER search_index_document_au AFTER UPDATE ON app_document BEGIN {delete} {insert} END")
+    schema_editor.execute(f"CREATE TRIGGER search_index_document_ad AFTER DELETE ON app_document BEGIN {delete} END")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0027_image_renditions'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, create_document_triggers),
+        migrations.AddField(
+            model_name='document',
+            name='sha256',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='size',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('payload', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('max_attempts', models.PositiveIntegerField(default=5)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'job',
+                'verbose_name_plural': 'jobs',
+                'indexes': [models.Index(fields=['status', 'run_after'], name='app_job_status_run_idx')],
+            },
+        ),
+        migrations.RunPython(create_document_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 5.1.6 on 2026-10-18 05:35
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+# Adding NOT NULL columns makes SQLite rebuild app_dining, which drops its
+# search index triggers; they are recreated afterwards (and before the
+# columns are removed again when migrating backwards).
+DINING_VALUES = (
+    "new.id * 8 + 3, 'dining', new.id, new.slug, 'public', new.title, "
+    "coalesce(new.short_desc, '') || ' ' || new.description || ' ' || new.location"
+)
+
+
+def create_dining_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    insert = (
+        "INSERT INTO search_index(rowid, kind, object_id, slug, visibility, title, body) "
+        f"VALUES ({DINING_VALUES});"
+    )
+    delete = "DELETE FROM search_index WHERE rowid = old.id * 8 + 3;"
+    for suffix in ('ai', 'au', 'ad'):
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS search_index_dining_{suffix}")
+    schema_editor.execute(f"CREATE TRIGGER search_index_dining_ai AFTER INSERT ON app_dining BEGIN {insert} END")
+    schema_editor.execute(f"CREATE TRIGGER search_index_dining_au AFTER UPDATE ON app_dining BEGIN {delete} {insert} END")
+    schema_editor.execute(f"CREATE TRIGGER search_index_dining_ad AFTER DELETE ON app_dining BEGIN {delete} END")
+
+
+def fill_slots(apps, schema_editor):
+    """Place existing bookings in the default hourly slots from noon and count their seats."""
+    DiningBooking = apps.get_model('app', 'DiningBooking')
+    DiningSlot = apps.get_model('app', 'DiningSlot')
+    seats = {}
+    bookings = list(DiningBooking.objects.all())
+    for booking in bookings:
+        local = timezone.localtime(booking.booking_time)
+        opening = local.replace(hour=12, minute=0, second=0, microsecond=0)
+        booking.slot_start = opening + (local - opening) // datetime.timedelta(hours=1) * datetime.timedelta(hours=1)
+        key = (booking.dining_id, booking.slot_start)
+        seats[key] = seats.get(key, 0) + booking.guests
+    DiningBooking.objects.bulk_update(bookings, ['slot_start'], batch_size=500)
+    DiningSlot.objects.bulk_create([
+        DiningSlot(dining_id=dining_id, start=start, booked=booked) for (dining_id, start), booked in seats.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0030_upload_sessions'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, create_dining_triggers),
+        migrations.AddField(
+            model_name='dining',
+            name='capacity',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='dining',
+            name='closes_at',
+            field=models.TimeField(default=datetime.time(22, 0)),
+        ),
+        migrations.AddField(
+            model_name='dining',
+            name='opens_at',
+            field=models.TimeField(default=datetime.time(12, 0)),
+        ),
+        migrations.AddField(
+            model_name='dining',
+            name='slot_minutes',
+            field=models.PositiveSmallIntegerField(default=60),
+        ),
+        migrations.AddField(
+            model_name='diningbooking',
+            name='slot_start',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='diningbooking',
+            name='status',
+            field=models.CharField(choices=[('confirmed', 'Confirmed'), ('cancelled', 'Cancelled')], default='confirmed', max_length=20, verbose_name='status'),
+        ),
+        migrations.CreateModel(
+            name='DiningSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.DateTimeField()),
+                ('booked', models.PositiveIntegerField(default=0)),
+                ('dining', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='app.dining')),
+            ],
+            options={
+                'verbose_name': 'dining slot',
+                'verbose_name_plural': 'dining slots',
+                'unique_together': {('dining', 'start')},
+            },
+        ),
+        migrations.RunPython(create_dining_triggers, migrations.RunPython.noop),
+        migrations.RunPython(fill_slots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.1.6 on 2026-10-18 05:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0032_reservations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyDonationStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'verbose_name': 'daily donation stat',
+                'verbose_name_plural': 'daily donation stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyOrderStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'verbose_name': 'daily order stat',
+                'verbose_name_plural': 'daily order stats',
+                'unique_together': {('day', 'status')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyBookingStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('bookings', models.PositiveIntegerField(default=0)),
+                ('guests', models.PositiveIntegerField(default=0)),
+                ('dining', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='app.dining')),
+            ],
+            options={
+                'verbose_name': 'daily booking stat',
+                'verbose_name_plural': 'daily booking stats',
+                'unique_together': {('day', 'dining')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyListingSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='app.listing')),
+            ],
+            options={
+                'verbose_name': 'daily listing sales',
+                'verbose_name_plural': 'daily listing sales',
+                'unique_together': {('day', 'status', 'listing')},
+            },
+        ),
+    ]
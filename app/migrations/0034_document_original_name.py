@@ -0,0 +1,29 @@
+# Generated by Django 5.1.6 on 2026-10-18 05:59
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_original_names(apps, schema_editor):
+    """Existing documents get the first name their content was uploaded under, the best record there is."""
+    Document = apps.get_model('app', 'Document')
+    MediaBlob = apps.get_model('app', 'MediaBlob')
+    Document.objects.filter(original_name__isnull=True).update(
+        original_name=Subquery(MediaBlob.objects.filter(path=OuterRef('file')).values('original_name')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0033_daily_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='original_name',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.RunPython(fill_original_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.6 on 2026-10-18 06:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0034_document_original_name'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['check_in'], name='app_reserva_check_i_374d39_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['status', 'check_in'], name='app_reserva_status_3bc8f4_idx'),
+        ),
+    ]
@@ -0,0 +1,362 @@
+import hashlib
+import logging
+import re
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import IntegrityError, connections, transaction
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from .bulk import allocate_slugs, bulk_changed, drop_unique_validators
+from .cache import get_cache, get_versions
+from .moderation import actions_for
+from .routers import use_primary
+from .serializers import ModerationSerializer, sparse_field_names
+
+logger = logging.getLogger(__name__)
+
+# get_FOO_display() reads FOO
+DISPLAY_SOURCE_RE = re.compile(r'get_(\w+)_display')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class VersionedResponseMixin:
+    """
+    Fingerprints GET responses by the full URL, the auth state and the
+    version stamps of the viewset model plus ``cache_models``.
+
+    Any save or delete on one of those models bumps its stamp, so a
+    fingerprint always names one state of the body. It is computed once
+    per request, so the ETag and the cached body are picked by the same
+    stamps.
+
+    Detail bodies also remember the first of ``last_modified_fields`` the
+    model has, read from the row they were built from.
+    """
+    cache_models = ()
+    last_modified_fields = ('updated_at', 'modified')
+    last_modified = None
+
+    def get_cache_models(self):
+        return (self.queryset.model, *self.cache_models)
+
+    def get_fingerprint(self, request):
+        if getattr(self, '_fingerprint', None) is None:
+            versions = get_versions(self.get_cache_models())
+            auth_state = 'auth' if request.user.is_authenticated else 'anon'
+            raw = '|'.join([request.build_absolute_uri(), auth_state, *versions])
+            self._fingerprint = hashlib.md5(raw.encode()).hexdigest()
+        return self._fingerprint
+
+    def get_object(self):
+        instance = super().get_object()
+        names = {field.name for field in instance._meta.concrete_fields}
+        field = next((name for name in self.last_modified_fields if name in names), None)
+        if field is not None:
+            self.last_modified = getattr(instance, field)
+        return instance
+
+
+class CachedResponseMixin(VersionedResponseMixin):
+    """
+    Caches list and detail GET responses under their fingerprint, so stale
+    entries are never read again. Misses are rendered from the primary: a
+    lagging replica would otherwise cache old rows under the new stamp.
+    The body's last_modified is cached along with it.
+    """
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        cache = get_cache()
+        # v2 entries are (data, last_modified) pairs
+        key = 'response:v2:' + self.get_fingerprint(request)
+        entry = cache.get(key)
+        if entry is not None:
+            data, self.last_modified = entry
+            return Response(data)
+        with use_primary():
+            response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, (response.data, self.last_modified), settings.RESPONSE_CACHE_TIMEOUT)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+
+class ConditionalGetMixin(VersionedResponseMixin):
+    """
+    Answers conditional GETs with 304 before the database is touched.
+
+    The ETag is the response fingerprint, the same one that selects a
+    CachedResponseMixin body, so a client never pairs a new ETag with an
+    old body. The models must be version-tracked
+    (app.signals.track_versions).
+
+    Detail responses also send Last-Modified. It belongs to the body, so
+    If-Modified-Since is only checked once the body (cached or not) is
+    known; If-None-Match still wins and needs no queries.
+    """
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag = quote_etag(self.get_fingerprint(request))
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            response['ETag'] = etag
+            return response
+        response = handler(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        response['ETag'] = etag
+        if self.last_modified is None:
+            return response
+        # Whole seconds, as If-Modified-Since carries them
+        last_modified = int(self.last_modified.timestamp())
+        response['Last-Modified'] = http_date(last_modified)
+        return get_conditional_response(request, etag=etag, last_modified=last_modified, response=response)
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class QueryBudgetMixin:
+    """
+    Counts the SQL queries an action runs against ``query_budget``.
+
+    Authentication is not counted. The count is always reported in the
+    X-Query-Count header; over-budget actions are logged, and raise
+    QueryBudgetExceeded when settings.QUERY_BUDGET_ENFORCE is on.
+    """
+    query_budget = {}
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.query_counter = QueryCounter()
+        self.query_stack = ExitStack()
+        for connection in connections.all():
+            self.query_stack.enter_context(connection.execute_wrapper(self.query_counter))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, 'query_stack', None) is None:
+            return response
+        self.query_stack.close()
+        self.query_stack = None
+        count = self.query_counter.count
+        response['X-Query-Count'] = count
+        budget = self.query_budget.get(self.action)
+        if budget is not None:
+            response['X-Query-Budget'] = budget
+            if count > budget:
+                message = f'{type(self).__name__}.{self.action} ran {count} queries, budget is {budget}'
+                if settings.QUERY_BUDGET_ENFORCE:
+                    raise QueryBudgetExceeded(message)
+                logger.warning(message)
+        return response
+
+
+class DeferFieldsMixin:
+    """
+    Defers the columns behind fields dropped with ``?fields=`` / ``?omit=``,
+    so unrequested text columns are never read from the database.
+    """
+
+    def get_read_field(self, model, field):
+        """Name of the model field ``field`` reads, or None when that cannot be told."""
+        source = field.source.split('.')[0]
+        match = DISPLAY_SOURCE_RE.fullmatch(source)
+        if match:
+            source = match.group(1)
+        try:
+            return model._meta.get_field(source).name
+        except FieldDoesNotExist:
+            # '*', methods and properties may read any column
+            return None
+
+    def get_deferred_fields(self, queryset):
+        serializer_class = self.get_serializer_class()
+        all_fields = serializer_class().fields
+        kept = sparse_field_names(self.request, all_fields)
+        if len(kept) == len(all_fields):
+            return []
+        model = queryset.model
+        sources = {self.get_read_field(model, all_fields[name]) for name in kept}
+        if None in sources:
+            # Deferring a column such a field reads would load it once per row
+            return []
+        # Columns used for ordering and lookups are read back from the rows
+        ordering = queryset.query.order_by or model._meta.ordering
+        keep = sources | {name.lstrip('-') for name in ordering if isinstance(name, str)}
+        keep.add(self.lookup_field)
+        return [
+            field.name for field in model._meta.concrete_fields
+            if not field.primary_key and not field.is_relation and field.name not in keep
+        ]
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        deferred = self.get_deferred_fields(queryset)
+        return queryset.defer(*deferred) if deferred else queryset
+
+
+class BulkMixin:
+    """
+    Adds a staff-only ``bulk/`` route taking a JSON list of up to
+    settings.BULK_MAX_ROWS rows: POST creates them, PATCH updates rows
+    identified by ``id``, DELETE removes a list of ids.
+
+    The whole batch is validated first. If any row fails, nothing is
+    written and ``errors`` lists the problems by row position. Otherwise
+    the rows are written with bulk_create / bulk_update in one transaction,
+    and ``bulk_changed`` stands in for the per-row post_save.
+    """
+    bulk_slug_source = 'title'
+
+    def get_bulk_defaults(self):
+        """Values set on every created row, as perform_create() would."""
+        return {}
+
+    @action(detail=False, methods=['post', 'patch', 'delete'], permission_classes=[IsAdminUser])
+    def bulk(self, request, *args, **kwargs):
+        rows = request.data
+        if not isinstance(rows, list) or not rows:
+            return Response({'error': 'Expected a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > settings.BULK_MAX_ROWS:
+            return Response({'error': f'At most {settings.BULK_MAX_ROWS} rows per request'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        handler = {'POST': self.create_batch, 'PATCH': self.update_batch, 'DELETE': self.delete_batch}
+        try:
+            return handler[request.method](rows)
+        except IntegrityError:
+            # A concurrent write took one of the slugs
+            return Response({'error': 'Conflicting concurrent change, retry the batch'},
+                            status=status.HTTP_409_CONFLICT)
+
+    def check_slugs(self, rows, errors, own_pks):
+        """Flag slugs used twice in the batch or by another row of the table, in one query."""
+        wanted = [row.get('slug') if isinstance(row, dict) else None for row in rows]
+        model = self.queryset.model
+        owners = dict(model._default_manager.filter(slug__in=[slug for slug in wanted if slug])
+                      .values_list('slug', 'pk'))
+        seen = set()
+        for i, slug in enumerate(wanted):
+            if not slug:
+                continue
+            if slug in seen or owners.get(slug, own_pks[i]) != own_pks[i]:
+                errors[i] = {**errors[i], 'slug': ['This slug is already in use.']}
+            seen.add(slug)
+
+    def create_batch(self, rows):
+        serializer = self.get_serializer(data=rows, many=True)
+        drop_unique_validators(serializer.child, 'slug')
+        errors = [{} for _ in rows] if serializer.is_valid() else list(serializer.errors)
+        self.check_slugs(rows, errors, [None] * len(rows))
+        if any(errors):
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        model = self.queryset.model
+        defaults = self.get_bulk_defaults()
+        instances = [model(**data, **defaults) for data in serializer.validated_data]
+        allocate_slugs(model, instances, self.bulk_slug_source)
+        with transaction.atomic():
+            model._default_manager.bulk_create(instances)
+            bulk_changed.send(sender=model, instances=instances, created=True)
+        return Response(self.get_serializer(instances, many=True).data, status=status.HTTP_201_CREATED)
+
+    @staticmethod
+    def is_row_id(value):
+        # bool is an int subclass, and anything else may not even be hashable
+        return isinstance(value, int) and not isinstance(value, bool)
+
+    def update_batch(self, rows):
+        ids = [row.get('id') if isinstance(row, dict) else None for row in rows]
+        ids = [pk if self.is_row_id(pk) else None for pk in ids]
+        found = self.get_queryset().in_bulk([pk for pk in ids if pk is not None])
+        errors, serializers = [], []
+        for row, pk in zip(rows, ids):
+            if pk is None:
+                errors.append({'id': ['A valid integer is required.']})
+                continue
+            if pk not in found or ids.count(pk) > 1:
+                errors.append({'id': ['Unknown or repeated id.']})
+                continue
+            serializer = self.get_serializer(found[pk], data=row, partial=True)
+            drop_unique_validators(serializer, 'slug')
+            errors.append({} if serializer.is_valid() else serializer.errors)
+            serializers.append(serializer)
+        self.check_slugs(rows, errors, ids)
+        if any(errors):
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        model = self.queryset.model
+        fields = set()
+        for serializer in serializers:
+            for attr, value in serializer.validated_data.items():
+                setattr(serializer.instance, attr, value)
+            fields.update(serializer.validated_data)
+        instances = [serializer.instance for serializer in serializers]
+        if any(field.name == 'updated_at' for field in model._meta.concrete_fields):
+            # bulk_update() skips auto_now
+            now = timezone.now()
+            for instance in instances:
+                instance.updated_at = now
+            fields.add('updated_at')
+        with transaction.atomic():
+            if fields:
+                model._default_manager.bulk_update(instances, sorted(fields))
+            bulk_changed.send(sender=model, instances=instances, created=False)
+        return Response(self.get_serializer(instances, many=True).data)
+
+    def delete_batch(self, ids):
+        errors = [{} if self.is_row_id(pk) else {'id': ['A valid integer is required.']} for pk in ids]
+        if any(errors):
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        model = self.queryset.model
+        with transaction.atomic():
+            # delete() sends post_delete per row, so no bulk_changed here
+            _, deleted = self.get_queryset().filter(pk__in=ids).delete()
+        return Response({'deleted': deleted.get(model._meta.label, 0)})
+
+
+class ModerationMixin:
+    """
+    Adds a staff-only ``moderate/`` route: POST ``{"action": ..., "ids": [...]}``
+    runs one of the actions registered for the model in app.moderation
+    over those rows as a single UPDATE, and returns how many changed.
+    """
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def moderate(self, request, *args, **kwargs):
+        model = self.queryset.model
+        actions = actions_for(model)
+        serializer = ModerationSerializer(data=request.data, actions=actions)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        # Any row of the table, not only those the list shows (e.g. inactive sliders)
+        changed = actions[data['action']].run(model._default_manager.filter(pk__in=data['ids']), request.user)
+        return Response({'action': data['action'], 'changed': changed})
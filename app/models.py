@@ -1,8 +1,14 @@
+import datetime
+import os
+import uuid
+
 from django.contrib.auth.models import AbstractUser, BaseUserManager, Group, Permission
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import RegexValidator
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
 from django.utils.text import slugify
+from django.utils import timezone
 from django.core.exceptions import ValidationError
 
 # Validators
@@ -110,6 +116,10 @@ class User(AbstractUser):
     class Meta:
         verbose_name = _('user')
         verbose_name_plural = _('users')
+        indexes = [
+            models.Index(fields=['date_joined'], name='app_user_date_jo_9b3462_idx'),
+            models.Index(fields=['role', 'date_joined'], name='app_user_role_d0d48b_idx'),
+        ]
 
     def __str__(self):
         return f'{self.first_name} {self.last_name}'
@@ -178,6 +188,12 @@ class Post(models.Model):
     class Meta:
         verbose_name = _('Events/Blog')
         verbose_name_plural = _('Events/Blog')
+        indexes = [
+            models.Index(fields=['created_at'], name='app_post_created_5b1dd9_idx'),
+            models.Index(fields=['type', 'created_at'], name='app_post_type_669990_idx'),
+            models.Index(fields=['status', 'created_at'], name='app_post_status_e6760b_idx'),
+            models.Index(fields=['published_by', 'created_at'], name='app_post_publish_8b340d_idx'),
+        ]
 
 # Item Model
 class Listing(models.Model):
@@ -218,6 +234,11 @@ class Listing(models.Model):
     class Meta:
         verbose_name = _('Prods/Accoms')
         verbose_name_plural = _('Prods/Accoms')
+        indexes = [
+            models.Index(fields=['created_at'], name='app_listing_created_375fb6_idx'),
+            models.Index(fields=['type', 'created_at'], name='app_listing_type_f56197_idx'),
+            models.Index(fields=['created_at'], condition=models.Q(available=True), name='app_listing_created_e73db4_idx'),
+        ]
 
 class Dining(models.Model):
     title = models.CharField(max_length=100)
@@ -236,6 +257,11 @@ class Dining(models.Model):
         default=DiningTypes.KINYARWANDA_DISH
     )
     slug = models.SlugField(max_length=100, unique=True, blank=True, null=True)
+    # Seats per time slot; blank means bookings are not limited
+    capacity = models.PositiveIntegerField(blank=True, null=True)
+    opens_at = models.TimeField(default=datetime.time(12))
+    closes_at = models.TimeField(default=datetime.time(22))
+    slot_minutes = models.PositiveSmallIntegerField(default=60)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -250,6 +276,10 @@ class Dining(models.Model):
     class Meta:
         verbose_name = _('dining')
         verbose_name_plural = _('dinings')
+        indexes = [
+            models.Index(fields=['created_at'], name='app_dining_created_cbf66a_idx'),
+            models.Index(fields=['title', 'created_at'], name='app_dining_title_08dc56_idx'),
+        ]
 
 # Donation Model
 class Donation(models.Model):
@@ -265,6 +295,11 @@ class Donation(models.Model):
     class Meta:
         verbose_name = _('donation')
         verbose_name_plural = _('donations')
+        indexes = [
+            models.Index(fields=['donated_at'], name='app_donatio_donated_97efd1_idx'),
+            models.Index(fields=['amount', 'donated_at'], name='app_donatio_amount_c694c9_idx'),
+            models.Index(fields=['email', 'donated_at'], name='app_donatio_email_97f0db_idx'),
+        ]
 
 # Order Model
 class Order(models.Model):
@@ -285,6 +320,11 @@ class Order(models.Model):
     class Meta:
         verbose_name = _('order [Prods/Accoms]')
         verbose_name_plural = _('orders [Prods/Accoms]')
+        indexes = [
+            models.Index(fields=['created_at'], name='app_order_created_f738d0_idx'),
+            models.Index(fields=['status', 'created_at'], name='app_order_status_5c48b2_idx'),
+            models.Index(fields=['user', 'created_at'], name='app_order_user_5e4338_idx'),
+        ]
 
 # Order Item Model
 class OrderItem(models.Model):
@@ -294,7 +334,7 @@ class OrderItem(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
 
     def __str__(self):
-        return f'{self.item.name} x {self.quantity}'
+        return f'{self.item.title} x {self.quantity}'
 
     class Meta:
         verbose_name = _('order item')
@@ -312,20 +352,132 @@ class Partner(models.Model):
     class Meta:
         verbose_name = _('partner')
         verbose_name_plural = _('partners')
+        indexes = [
+            models.Index(fields=['name', 'id'], name='app_partner_name_d6dbad_idx'),
+        ]
+
+class BookingStatus(models.TextChoices):
+    CONFIRMED = 'confirmed', _('Confirmed')
+    CANCELLED = 'cancelled', _('Cancelled')
 
 class DiningBooking(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='dining_bookings')
     dining = models.ForeignKey(Dining, on_delete=models.CASCADE)
     guests = models.PositiveIntegerField()
     booking_time = models.DateTimeField()
+    status = models.CharField(
+        _('status'),
+        max_length=20,
+        choices=BookingStatus.choices,
+        default=BookingStatus.CONFIRMED
+    )
+    # Start of the DiningSlot this booking occupies, set on save
+    slot_start = models.DateTimeField(blank=True, null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f'{self.user.first_name} - {self.dining.title}'
 
+    def clean(self):
+        from .dining import check_booking
+        if self.dining_id and self.booking_time and self.guests:
+            check_booking(self)
+
+    def save(self, *args, **kwargs):
+        from .dining import update_occupancy
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'slot_start'}
+        # The occupancy change commits or rolls back with the booking row
+        with transaction.atomic():
+            update_occupancy(self)
+            super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = _('dining booking')
         verbose_name_plural = _('dining bookings')
+        indexes = [
+            models.Index(fields=['booking_time'], name='app_diningb_booking_69aac2_idx'),
+            models.Index(fields=['dining', 'booking_time'], name='app_diningb_dining_64ecee_idx'),
+            models.Index(fields=['user', 'booking_time'], name='app_diningb_user_630219_idx'),
+        ]
+
+class DiningSlot(models.Model):
+    """Seats taken in one time slot of a Dining, maintained as bookings change (app/dining.py)."""
+    dining = models.ForeignKey(Dining, on_delete=models.CASCADE, related_name='slots')
+    start = models.DateTimeField()
+    booked = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.dining_id} @ {self.start} ({self.booked})'
+
+    class Meta:
+        verbose_name = _('dining slot')
+        verbose_name_plural = _('dining slots')
+        unique_together = [('dining', 'start')]
+
+class Reservation(models.Model):
+    """A stay in an accommodation Listing, from check_in to the morning of check_out."""
+    listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name='reservations')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reservations')
+    check_in = models.DateField()
+    check_out = models.DateField()
+    guests = models.PositiveIntegerField(default=1)
+    status = models.CharField(
+        _('status'),
+        max_length=20,
+        choices=BookingStatus.choices,
+        default=BookingStatus.CONFIRMED
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.listing.title}: {self.check_in} - {self.check_out}'
+
+    def clean(self):
+        from .reservations import check_reservation
+        if self.listing_id and self.check_in and self.check_out:
+            check_reservation(self)
+
+    def save(self, *args, **kwargs):
+        from .reservations import sync_nights
+        # The nights are claimed or freed with the reservation row
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            sync_nights(self)
+
+    class Meta:
+        verbose_name = _('reservation')
+        verbose_name_plural = _('reservations')
+        indexes = [
+            models.Index(fields=['listing', 'check_in'], name='app_reservation_listing_idx'),
+            models.Index(fields=['user', 'check_in'], name='app_reservation_user_idx'),
+            models.Index(fields=['check_in'], name='app_reserva_check_i_374d39_idx'),
+            models.Index(fields=['status', 'check_in'], name='app_reserva_status_3bc8f4_idx'),
+        ]
+
+
+class ReservationNight(models.Model):
+    """
+    One night of a confirmed Reservation.
+
+    The unique (listing, night) pair makes the database refuse overlapping
+    stays, and availability searches only read the nights in their range.
+    """
+    listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name='+')
+    night = models.DateField()
+    reservation = models.ForeignKey(Reservation, on_delete=models.CASCADE, related_name='nights')
+
+    def __str__(self):
+        return f'{self.listing_id} @ {self.night}'
+
+    class Meta:
+        verbose_name = _('reservation night')
+        verbose_name_plural = _('reservation nights')
+        unique_together = [('listing', 'night')]
+        indexes = [
+            models.Index(fields=['night', 'listing'], name='app_reservationnight_night_idx'),
+        ]
 
 # Document Model
 import mimetypes
@@ -346,14 +498,21 @@ class Document(models.Model):
 
     file_name = models.CharField(max_length=100)
     file = models.FileField(upload_to='documents/')
+    # Name the file was uploaded under; storage names it by content hash
+    original_name = models.CharField(max_length=255, blank=True, null=True)
     file_type = models.CharField(max_length=50, blank=True)
     document_type = models.CharField(max_length=50, choices=DOCUMENT_TYPES)
     visibility = models.CharField(max_length=20, choices=VISIBILITY_CHOICES, default='private')
     description = models.TextField(blank=True, null=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='documents')
+    # Filled in by the inspect_document job after upload
+    size = models.PositiveBigIntegerField(blank=True, null=True)
+    sha256 = models.CharField(max_length=64, blank=True)
 
     def save(self, *args, **kwargs):
+        if self.file and not self.file._committed:
+            self.original_name = os.path.basename(self.file.name)
         if self.file:
             mime_type, _ = mimetypes.guess_type(self.file.name)
             if mime_type:
@@ -368,4 +527,159 @@ class Document(models.Model):
 
     class Meta:
         verbose_name = _('document')
-        verbose_name_plural = _('documents')
\ No newline at end of file
+        verbose_name_plural = _('documents')
+        indexes = [
+            models.Index(fields=['-uploaded_at'], name='app_documen_uploade_36a4e9_idx'),
+            models.Index(fields=['document_type', '-uploaded_at'], name='app_documen_documen_80d368_idx'),
+            models.Index(fields=['visibility', '-uploaded_at'], name='app_documen_visibil_84e1d8_idx'),
+        ]
+
+class ImageRendition(models.Model):
+    """
+    A resized copy of an uploaded image, keyed by the name of the source file.
+
+    Every source also gets an ``original`` row recording its own size, so
+    serializers can report dimensions without opening the file.
+    """
+    source = models.CharField(max_length=255)
+    format = models.CharField(max_length=10)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    file = models.FileField(upload_to='renditions/', max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.source} ({self.format}, {self.width}w)'
+
+    class Meta:
+        verbose_name = _('image rendition')
+        verbose_name_plural = _('image renditions')
+        unique_together = [('source', 'format', 'width')]
+
+
+class JobStatus(models.TextChoices):
+    QUEUED = 'queued', _('Queued')
+    RUNNING = 'running', _('Running')
+    DONE = 'done', _('Done')
+    FAILED = 'failed', _('Failed')
+
+
+class Job(models.Model):
+    """A unit of background work, run by the run_jobs command (see app/jobs.py)."""
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=JobStatus.choices, default=JobStatus.QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.name} #{self.pk} ({self.status})'
+
+    class Meta:
+        verbose_name = _('job')
+        verbose_name_plural = _('jobs')
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='app_job_status_run_idx'),
+        ]
+
+
+class MediaBlob(models.Model):
+    """A file stored once under its SHA-256 by ContentAddressedStorage."""
+    path = models.CharField(max_length=255, unique=True)
+    digest = models.CharField(max_length=64, db_index=True)
+    size = models.PositiveBigIntegerField()
+    # Name of the first upload with this content; a blob can be shared under
+    # several names, so rows referencing it keep their own (Document.original_name)
+    original_name = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.original_name} ({self.path})'
+
+    class Meta:
+        verbose_name = _('media blob')
+        verbose_name_plural = _('media blobs')
+
+
+class UploadSession(models.Model):
+    """
+    A resumable, chunked upload of a Document file.
+
+    Chunks are written in order into ``path`` (under settings.UPLOAD_SESSION_DIR);
+    ``received`` is the offset the next chunk must start at.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    file_name = models.CharField(max_length=100)
+    size = models.PositiveBigIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+    document_type = models.CharField(max_length=50, choices=Document.DOCUMENT_TYPES)
+    visibility = models.CharField(max_length=20, choices=Document.VISIBILITY_CHOICES, default='private')
+    description = models.TextField(blank=True, null=True)
+    document = models.OneToOneField(Document, on_delete=models.SET_NULL, blank=True, null=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def path(self):
+        return os.path.join(settings.UPLOAD_SESSION_DIR, f'{self.pk}.part')
+
+    def __str__(self):
+        return f'{self.file_name} ({self.received}/{self.size})'
+
+    class Meta:
+        verbose_name = _('upload session')
+        verbose_name_plural = _('upload sessions')
+
+
+# Daily rollups, rebuilt per day from the raw rows by app/stats.py
+class DailyDonationStat(models.Model):
+    day = models.DateField(unique=True)
+    count = models.PositiveIntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = _('daily donation stat')
+        verbose_name_plural = _('daily donation stats')
+
+
+class DailyOrderStat(models.Model):
+    day = models.DateField()
+    status = models.CharField(max_length=20, choices=OrderStatus.choices)
+    orders = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = _('daily order stat')
+        verbose_name_plural = _('daily order stats')
+        unique_together = [('day', 'status')]
+
+
+class DailyListingSales(models.Model):
+    day = models.DateField()
+    status = models.CharField(max_length=20, choices=OrderStatus.choices)
+    listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name='+')
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = _('daily listing sales')
+        verbose_name_plural = _('daily listing sales')
+        unique_together = [('day', 'status', 'listing')]
+
+
+class DailyBookingStat(models.Model):
+    day = models.DateField()
+    dining = models.ForeignKey(Dining, on_delete=models.CASCADE, related_name='+')
+    bookings = models.PositiveIntegerField(default=0)
+    guests = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = _('daily booking stat')
+        verbose_name_plural = _('daily booking stats')
+        unique_together = [('day', 'dining')]
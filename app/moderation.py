@@ -0,0 +1,109 @@
+import logging
+
+from django.contrib import admin
+from django.contrib.admin.models import CHANGE, LogEntry
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .bulk import bulk_changed
+from .models import Listing, Order, OrderStatus, Post
+from .stats import refresh_later
+
+logger = logging.getLogger(__name__)
+
+# Model -> {action name: ModerationAction}, shared by the admin and the moderate/ endpoints
+ACTIONS = {}
+
+
+class ModerationAction:
+    """
+    A change written to a whole queryset with one UPDATE.
+
+    Rows already holding ``values`` are skipped, and ``allowed`` narrows the
+    queryset further, e.g. to the statuses an order transition starts from.
+    ``rollup`` names a stats rollup and the timestamp picking its day, for
+    models the daily stats are built from.
+    """
+
+    def __init__(self, model, name, label, values, allowed=None, rollup=None):
+        self.model = model
+        self.name = name
+        self.label = label
+        self.values = values
+        self.allowed = allowed or {}
+        self.rollup = rollup
+        self.touch = any(field.name == 'updated_at' for field in model._meta.concrete_fields)
+
+    def run(self, queryset, user=None):
+        """Apply the action to ``queryset`` and return the number of rows changed."""
+        queryset = queryset.filter(**self.allowed).exclude(**self.values).order_by()
+        values = {**self.values, 'updated_at': timezone.now()} if self.touch else self.values
+        with transaction.atomic():
+            days = self.affected_days(queryset)
+            count = queryset.update(**values)
+            if count:
+                # Once per batch: the cache stamp bump and the audit entry
+                bulk_changed.send(sender=self.model, instances=None, created=False)
+                if self.rollup:
+                    refresh_later(self.rollup[0], *days)
+                audit(self, count, user)
+        return count
+
+    def affected_days(self, queryset):
+        if not self.rollup:
+            return []
+        return list(queryset.annotate(day=TruncDate(self.rollup[1])).values_list('day', flat=True).distinct())
+
+
+def audit(action, count, user):
+    opts = action.model._meta
+    logger.info('%s: %s %s %s by %s', action.name, count, opts.verbose_name_plural, action.values, user)
+    if user is not None and user.is_authenticated:
+        LogEntry.objects.create(
+            user_id=user.pk,
+            content_type_id=ContentType.objects.get_for_model(action.model).pk,
+            object_repr=f'{count} {opts.verbose_name_plural}'[:200],
+            action_flag=CHANGE,
+            change_message=f'{action.label}.',
+        )
+
+
+def register(model, name, label, values, **options):
+    ACTIONS.setdefault(model, {})[name] = ModerationAction(model, name, label, values, **options)
+
+
+def actions_for(model):
+    return ACTIONS.get(model, {})
+
+
+def admin_action(action):
+    def run(modeladmin, request, queryset):
+        count = action.run(queryset, request.user)
+        modeladmin.message_user(request, f'{action.label}: {count} {action.model._meta.verbose_name_plural} changed.')
+    # The admin tells actions apart by function name
+    run.__name__ = action.name
+    return admin.action(description=action.label)(run)
+
+
+def admin_actions(model):
+    """Admin actions for every moderation action registered on ``model``."""
+    return [admin_action(action) for action in actions_for(model).values()]
+
+
+register(Post, 'publish', 'Publish', {'published': True})
+register(Post, 'unpublish', 'Unpublish', {'published': False})
+
+register(Listing, 'mark_available', 'Mark available', {'available': True})
+register(Listing, 'mark_unavailable', 'Mark unavailable', {'available': False})
+register(Listing, 'put_in_use', 'Put in use', {'in_use': True})
+register(Listing, 'withdraw', 'Withdraw from use', {'in_use': False})
+
+ORDER_ROLLUP = ('orders', 'created_at')
+register(Order, 'confirm', 'Confirm', {'status': OrderStatus.CONFIRMED},
+         allowed={'status': OrderStatus.PENDING}, rollup=ORDER_ROLLUP)
+register(Order, 'complete', 'Complete', {'status': OrderStatus.COMPLETED},
+         allowed={'status': OrderStatus.CONFIRMED}, rollup=ORDER_ROLLUP)
+register(Order, 'cancel', 'Cancel', {'status': OrderStatus.CANCELLED},
+         allowed={'status__in': [OrderStatus.PENDING, OrderStatus.CONFIRMED]}, rollup=ORDER_ROLLUP)
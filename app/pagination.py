@@ -0,0 +1,142 @@
+import base64
+import datetime
+import decimal
+import json
+from operator import attrgetter
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Page number pagination that clients can switch to keyset pagination per
+    request by passing ``?cursor=`` (empty for the first page).
+
+    Keyset pages seek on the queryset ordering plus the primary key as a
+    tiebreaker, so deep pages cost the same as the first and no COUNT(*)
+    is run.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        self.model = queryset.model
+        values, reverse = self.decode_cursor(request.query_params[self.cursor_query_param])
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [(field, not descending) for field, descending in ordering]
+        if values is not None:
+            queryset = queryset.filter(self.seek_filter(ordering, values))
+        queryset = queryset.order_by(*[('-' if descending else '') + field for field, descending in ordering])
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.next_cursor = self.previous_cursor = None
+        if rows:
+            if has_more or reverse:
+                self.next_cursor = self.encode_cursor(rows[-1], reverse=False)
+            if (has_more and reverse) or (values is not None and not reverse):
+                self.previous_cursor = self.encode_cursor(rows[0], reverse=True)
+        return rows
+
+    def get_ordering(self, queryset):
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        fields = [
+            (name.lstrip('-'), name.startswith('-'))
+            for name in ordering
+            if isinstance(name, str) and name.lstrip('-') not in ('pk', 'id')
+        ]
+        # The primary key breaks ties in the direction of the leading column
+        fields.append(('pk', fields[0][1] if fields else False))
+        return fields
+
+    def seek_filter(self, ordering, values):
+        """Rows strictly after ``values`` in ``ordering``, compared as a tuple."""
+        condition = Q()
+        equal = Q()
+        for (field, descending), value in zip(ordering, values):
+            lookup = 'lt' if descending else 'gt'
+            condition |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+        return condition
+
+    def encode_cursor(self, row, reverse):
+        values = []
+        for field, _ in self.ordering:
+            value = attrgetter(field.replace('__', '.'))(row)
+            if isinstance(value, (datetime.date, datetime.time)):
+                value = value.isoformat()
+            elif isinstance(value, decimal.Decimal):
+                value = str(value)
+            values.append(value)
+        payload = json.dumps({'v': values, 'r': reverse}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None, False
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            values, reverse = payload['v'], bool(payload['r'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            # Typed as the ordering columns, so a forged cursor cannot reach the query
+            values = [self.to_python(field, value) for (field, _), value in zip(self.ordering, values)]
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def to_python(self, name, value):
+        if value is None or isinstance(value, (dict, list)):
+            raise ValueError(name)
+        opts, field = self.model._meta, None
+        try:
+            for part in name.split('__'):
+                field = opts.pk if part == 'pk' else opts.get_field(part)
+                if field.related_model is not None:
+                    opts = field.related_model._meta
+        except FieldDoesNotExist:
+            # An annotation: JSON scalars are all it can hold
+            return value
+        return field.to_python(value)
+
+    def get_cursor_link(self, cursor):
+        if cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_cursor_link(self.next_cursor),
+            'previous': self.get_cursor_link(self.previous_cursor),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['required'] = ['results']
+        return response_schema
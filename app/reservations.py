@@ -0,0 +1,61 @@
+import datetime
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from .models import BookingStatus, ItemTypes, Listing, ReservationNight
+
+# Longest stay accepted in one reservation
+MAX_NIGHTS = 60
+
+
+class DatesUnavailable(ValidationError):
+    """Another reservation holds one of the nights."""
+
+
+def nights(check_in, check_out):
+    return [check_in + datetime.timedelta(days=n) for n in range((check_out - check_in).days)]
+
+
+def check_reservation(reservation):
+    if reservation.listing.type != ItemTypes.ACCOMMODATION:
+        raise ValidationError({'listing': 'Only accommodations can be reserved.'})
+    stay = (reservation.check_out - reservation.check_in).days
+    if stay < 1:
+        raise ValidationError({'check_out': 'Check-out must be after check-in.'})
+    if stay > MAX_NIGHTS:
+        raise ValidationError({'check_out': f'Stays are limited to {MAX_NIGHTS} nights.'})
+
+
+def sync_nights(reservation):
+    """
+    Make the ReservationNight rows match ``reservation``.
+
+    Called from Reservation.save() inside its transaction. A night already
+    held by another reservation fails the unique (listing, night)
+    constraint, and DatesUnavailable rolls the whole save back.
+    """
+    ReservationNight.objects.filter(reservation=reservation).delete()
+    if reservation.status != BookingStatus.CONFIRMED:
+        return
+    check_reservation(reservation)
+    try:
+        with transaction.atomic():
+            ReservationNight.objects.bulk_create([
+                ReservationNight(listing_id=reservation.listing_id, night=night, reservation=reservation)
+                for night in nights(reservation.check_in, reservation.check_out)
+            ])
+    except IntegrityError:
+        raise DatesUnavailable({'check_in': 'The accommodation is not free for these dates.'})
+
+
+def free_accommodations(check_in, check_out, queryset=None):
+    """
+    Accommodations with no reserved night from ``check_in`` to ``check_out``.
+
+    The anti-join reads the (night, listing) index for the requested nights
+    only, so its cost follows the range asked for, not the history kept.
+    """
+    queryset = Listing.objects.all() if queryset is None else queryset
+    taken = ReservationNight.objects.filter(night__gte=check_in, night__lt=check_out).values('listing_id')
+    return queryset.filter(type=ItemTypes.ACCOMMODATION, available=True, in_use=True).exclude(pk__in=taken)
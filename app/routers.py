@@ -0,0 +1,128 @@
+import contextvars
+import hashlib
+import random
+import secrets
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from .cache import get_cache
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Routing state of the request being served; None outside requests, where
+# reads go to the primary (management commands, on_commit callbacks)
+_routing = contextvars.ContextVar('db_routing', default=None)
+
+
+class Routing:
+    def __init__(self, replica, primary):
+        self.replica = replica
+        self.primary = primary
+        self.wrote = False
+
+
+@contextmanager
+def use_primary():
+    """Send reads inside the block to the primary."""
+    routing = _routing.get()
+    if routing is None or routing.primary:
+        yield
+        return
+    routing.primary = True
+    try:
+        yield
+    finally:
+        routing.primary = False
+
+
+class ReplicaRouter:
+    """
+    Reads go to the request's replica, writes to the primary.
+
+    A write switches the rest of the request to the primary and pins the
+    client to it for REPLICA_PIN_SECONDS (see ReplicaRoutingMiddleware).
+    """
+
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if routing is None or routing.primary:
+            return 'default'
+        return routing.replica
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None:
+            routing.primary = True
+            routing.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas mirror the primary, so any two objects can be related
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Picks a replica for each safe request and keeps clients that have just
+    written on the primary, so they never read their own writes from a
+    lagging replica.
+
+    Clients are identified by their Authorization header or session cookie.
+    An anonymous client that writes gets a random REPLICA_PIN_COOKIE instead:
+    behind a proxy every client shares one remote address. The pin lives in
+    the shared cache so every worker honours it.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        cache = get_cache()
+        clients = self.client_keys(request)
+        primary = request.method not in SAFE_METHODS or bool(cache.get_many(clients))
+        routing = Routing(random.choice(settings.DATABASE_REPLICAS), primary)
+        token = _routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+
+        if routing.wrote:
+            session = response.cookies.get(settings.SESSION_COOKIE_NAME)
+            if session is not None and session.value:
+                # Logging in starts a new session; pin that one too
+                clients.append(self.pin_key('session', session.value))
+            pin = request.COOKIES.get(settings.REPLICA_PIN_COOKIE)
+            if pin or not clients:
+                # Renewed on every write, like the pin itself
+                pin = pin or secrets.token_urlsafe(16)
+                response.set_cookie(
+                    settings.REPLICA_PIN_COOKIE, pin, max_age=settings.REPLICA_PIN_SECONDS,
+                    secure=settings.SESSION_COOKIE_SECURE, httponly=True, samesite=settings.SESSION_COOKIE_SAMESITE,
+                )
+                clients.append(self.pin_key('cookie', pin))
+            cache.set_many(dict.fromkeys(clients, 1), settings.REPLICA_PIN_SECONDS)
+        return response
+
+    def pin_key(self, kind, value):
+        return f'replica-pin:{kind}:' + hashlib.md5(value.encode()).hexdigest()
+
+    def client_keys(self, request):
+        keys = []
+        authorization = request.META.get('HTTP_AUTHORIZATION')
+        if authorization:
+            keys.append(self.pin_key('auth', authorization))
+        session = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        if session:
+            keys.append(self.pin_key('session', session))
+        pin = request.COOKIES.get(settings.REPLICA_PIN_COOKIE)
+        if pin:
+            keys.append(self.pin_key('cookie', pin))
+        return keys
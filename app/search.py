@@ -0,0 +1,212 @@
+import re
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models import CharField, Value
+from django.db.models.functions import Cast, Concat, StrIndex
+from rest_framework.filters import SearchFilter
+
+from .models import Dining, Document, Listing, Post
+
+# SQLite FTS5 index shared by the searchable models. Rows are keyed by
+# rowid = object id * 8 + kind code and kept in sync by triggers, so
+# bulk_create and queryset.update() writes are indexed too.
+INDEX_TABLE = 'search_index'
+
+SOURCES = {
+    'post': {
+        'model': Post,
+        'code': 1,
+        'slug': "new.slug",
+        'visibility': "'public'",
+        'title': "new.title",
+        'body': "coalesce(new.short_desc, '') || ' ' || new.description",
+    },
+    'listing': {
+        'model': Listing,
+        'code': 2,
+        'slug': "new.slug",
+        'visibility': "'public'",
+        'title': "new.title",
+        'body': "coalesce(new.short_desc, '') || ' ' || new.description",
+    },
+    'dining': {
+        'model': Dining,
+        'code': 3,
+        'slug': "new.slug",
+        'visibility': "'public'",
+        'title': "new.title",
+        'body': "coalesce(new.short_desc, '') || ' ' || new.description || ' ' || new.location",
+    },
+    'document': {
+        'model': Document,
+        'code': 4,
+        'slug': "NULL",
+        'visibility': "new.visibility",
+        'title': "new.file_name",
+        'body': "coalesce(new.description, '')",
+    },
+}
+
+# Matches beyond this are not ranked; nobody pages that deep into search results
+RESULT_LIMIT = 500
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+_available = {}
+
+
+def kind_for_model(model):
+    for kind, source in SOURCES.items():
+        if source['model'] is model:
+            return kind
+    return None
+
+
+def index_available(using):
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    if using not in _available:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [INDEX_TABLE])
+            _available[using] = cursor.fetchone() is not None
+    return _available[using]
+
+
+def index_values(kind):
+    """The index columns of a ``new`` row of ``kind``, as SQL."""
+    source = SOURCES[kind]
+    return (
+        f"new.id * 8 + {source['code']}, '{kind}', new.id, {source['slug']}, "
+        f"{source['visibility']}, {source['title']}, {source['body']}"
+    )
+
+
+def trigger_names(kind):
+    return [f'search_index_{kind}_{suffix}' for suffix in ('ai', 'au', 'ad')]
+
+
+def create_triggers(schema_editor, kinds=None):
+    """
+    (Re)create the triggers keeping the index in sync with ``kinds``.
+
+    SQLite drops a table's triggers when a migration rebuilds the table, as
+    most AddField and AlterField operations do, so such migrations call this
+    afterwards. ``schema_editor`` may be anything with an execute(sql).
+    """
+    for kind in kinds or SOURCES:
+        table = SOURCES[kind]['model']._meta.db_table
+        code = SOURCES[kind]['code']
+        insert = (
+            f"INSERT INTO {INDEX_TABLE}(rowid, kind, object_id, slug, visibility, title, body) "
+            f"VALUES ({index_values(kind)});"
+        )
+        delete = f"DELETE FROM {INDEX_TABLE} WHERE rowid = old.id * 8 + {code};"
+        inserted, updated, deleted = trigger_names(kind)
+        for name in (inserted, updated, deleted):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        schema_editor.execute(f"CREATE TRIGGER {inserted} AFTER INSERT ON {table} BEGIN {insert} END")
+        schema_editor.execute(f"CREATE TRIGGER {updated} AFTER UPDATE ON {table} BEGIN {delete} {insert} END")
+        schema_editor.execute(f"CREATE TRIGGER {deleted} AFTER DELETE ON {table} BEGIN {delete} END")
+
+
+def missing_triggers(using='default'):
+    with connections[using].cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        existing = {row[0] for row in cursor.fetchall()}
+    return [name for kind in SOURCES for name in trigger_names(kind) if name not in existing]
+
+
+def match_expression(query):
+    """Turn free text into an FTS5 query: every word must match, as a prefix."""
+    tokens = TOKEN_RE.findall(query)
+    return ' '.join('"%s"*' % token for token in tokens)
+
+
+def search(query, kinds, using='default', limit=RESULT_LIMIT, public_only=False, snippets=False):
+    """
+    Return hits for ``query`` as dicts, best bm25 rank first.
+
+    Every hit carries kind, object_id, slug, title and score; ``snippets``
+    adds a highlighted extract, ``public_only`` drops non-public documents.
+    """
+    expression = match_expression(query)
+    if not expression:
+        return []
+    columns = [
+        'kind', 'object_id', 'slug', 'title',
+        f"bm25({INDEX_TABLE}, 0, 0, 0, 0, 10.0, 1.0) AS score",
+    ]
+    if snippets:
+        columns.append(f"snippet({INDEX_TABLE}, -1, '<mark>', '</mark>', '…', 16) AS snippet")
+    placeholders = ', '.join(['%s'] * len(kinds))
+    sql = (
+        f"SELECT {', '.join(columns)} FROM {INDEX_TABLE} "
+        f"WHERE {INDEX_TABLE} MATCH %s AND kind IN ({placeholders})"
+    )
+    if public_only:
+        sql += " AND visibility = 'public'"
+    sql += " ORDER BY score LIMIT %s"
+    with connections[using].cursor() as cursor:
+        cursor.execute(sql, [expression, *kinds, limit])
+        names = [column[0] for column in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+
+def like_search(query, kinds, limit=RESULT_LIMIT, public_only=False):
+    """Unranked LIKE fallback for :func:`search` on databases without the index."""
+    hits = []
+    for kind in kinds:
+        model = SOURCES[kind]['model']
+        title = 'file_name' if model is Document else 'title'
+        queryset = model.objects.filter(Q(**{f'{title}__icontains': query}) | Q(description__icontains=query))
+        if public_only and model is Document:
+            queryset = queryset.filter(visibility='public')
+        for row in queryset.values('pk', title, *(['slug'] if model is not Document else []))[:limit]:
+            hits.append({
+                'kind': kind, 'object_id': row['pk'], 'slug': row.get('slug'),
+                'title': row[title], 'score': None, 'snippet': None,
+            })
+    return hits[:limit]
+
+
+def rebuild_index(using='default'):
+    """Recreate the triggers and repopulate the index from the source tables."""
+    with connections[using].cursor() as cursor:
+        create_triggers(cursor)
+        cursor.execute(f"DELETE FROM {INDEX_TABLE}")
+        for kind, source in SOURCES.items():
+            table = source['model']._meta.db_table
+            cursor.execute(
+                f"INSERT INTO {INDEX_TABLE}(rowid, kind, object_id, slug, visibility, title, body) "
+                f"SELECT {index_values(kind)} FROM {table} AS new"
+            )
+        cursor.execute(f"INSERT INTO {INDEX_TABLE}({INDEX_TABLE}) VALUES ('optimize')")
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    SearchFilter answered from the FTS5 index and ordered by bm25 rank.
+
+    Falls back to the LIKE-based SearchFilter on databases without the index.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = request.query_params.get(self.search_param, '')
+        kind = kind_for_model(queryset.model)
+        using = queryset.db
+        if not terms.strip() or kind is None or not index_available(using):
+            return super().filter_queryset(request, queryset, view)
+
+        # filter_queryset runs more than once per request (validators, then the page)
+        memo = view.__dict__.setdefault('search_hits', {})
+        if (terms, kind) not in memo:
+            memo[terms, kind] = [hit['object_id'] for hit in search(terms, [kind], using=using)]
+        ids = memo[terms, kind]
+        if not ids:
+            return queryset.none()
+        # Rank by position in the comma-joined id list: one parameter, unlike CASE/WHEN
+        ranked = Value(',%s,' % ','.join(str(object_id) for object_id in ids))
+        rank = StrIndex(ranked, Concat(Value(','), Cast('pk', CharField()), Value(',')))
+        return queryset.filter(pk__in=ids).annotate(search_rank=rank).order_by('search_rank', 'pk')
@@ -1,5 +1,10 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import models
+from django.utils import timezone
+from django.urls import reverse
+from .images import ORIGINAL, image_names, load_renditions
 from .models import (
     Dining, 
     DiningBooking, 
@@ -10,13 +15,123 @@ from .models import (
     Order, 
     OrderItem, 
     Partner, 
-    Document
+    Document,
+    ItemTypes,
+    Reservation,
+    UploadSession,
 )
 
 User = get_user_model()
 
+
+def sparse_field_names(request, field_names):
+    """Return the names in ``field_names`` kept by ``?fields=`` / ``?omit=`` on a GET."""
+    params = getattr(request, 'query_params', None)
+    if params is None or request.method != 'GET':
+        return list(field_names)
+    names = list(field_names)
+    if params.get('fields'):
+        wanted = {name.strip() for name in params['fields'].split(',')}
+        names = [name for name in names if name in wanted]
+    if params.get('omit'):
+        unwanted = {name.strip() for name in params['omit'].split(',')}
+        names = [name for name in names if name not in unwanted]
+    return names
+
+
+class SparseFieldsMixin:
+    """Drops the fields a GET request did not ask for from the top-level serializer."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Nested serializers are built without a context and keep all fields
+        request = self.context.get('request')
+        if request is None:
+            return
+        kept = set(sparse_field_names(request, self.fields))
+        for name in list(self.fields):
+            if name not in kept:
+                self.fields.pop(name)
+
+
+class ImageRenditionsField(serializers.Field):
+    """
+    Size and srcset strings of an image's renditions, per format.
+
+    Renditions for every image in the response are loaded in one query the
+    first time the field is rendered.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def get_renditions(self, name):
+        root = self.root
+        if not hasattr(root, '_renditions'):
+            instance = root.instance
+            instances = [instance] if isinstance(instance, models.Model) else list(instance)
+            # Only the images this serializer renders; other image columns may be deferred
+            sources = [
+                field.source for field in self.parent.fields.values()
+                if isinstance(field, ImageRenditionsField)
+            ]
+            root._renditions = load_renditions(image_names(instances, sources))
+        return root._renditions.get(name, [])
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        request = self.context.get('request')
+        original, srcset = None, {}
+        for rendition in self.get_renditions(value.name):
+            if rendition.format == ORIGINAL:
+                original = rendition
+                continue
+            url = rendition.file.url
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            srcset.setdefault(rendition.format, []).append(f'{url} {rendition.width}w')
+        if original is None:
+            return None
+        return {
+            'width': original.width,
+            'height': original.height,
+            'srcset': {format: ', '.join(entries) for format, entries in srcset.items()},
+        }
+
+
+class ImageRenditionsMixin:
+    """
+    Adds a read-only ``<name>_renditions`` field next to each image field of
+    the top-level serializer; nested representations stay lean.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if parent is not None:
+            return fields
+        for name, field in list(fields.items()):
+            if isinstance(field, serializers.ImageField) and not field.write_only:
+                fields[f'{name}_renditions'] = ImageRenditionsField(source=field.source or name)
+        return fields
+
+
+class DocumentFileField(serializers.FileField):
+    """Accepts uploads, but links to the download action: /media/documents/ is not served."""
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        url = reverse('document-download', args=[value.instance.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+
 # User Serializer
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = UserModel
         fields = ['id', 'email', 'first_name', 'last_name', 'phone_number', 'role', 'password', 'is_active']
@@ -27,7 +142,7 @@ class UserSerializer(serializers.ModelSerializer):
         return User.objects.create_user(**validated_data)
     
 # BlogPost Serializer
-class BlogPostSerializer(serializers.ModelSerializer):
+class BlogPostSerializer(SparseFieldsMixin, ImageRenditionsMixin, serializers.ModelSerializer):
     published_by = UserSerializer(read_only=True)
     
     class Meta:
@@ -35,29 +150,49 @@ class BlogPostSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'slug', 'short_desc', 'description', 'poster', 'image', 'type', 'published', 'published_by', 'created_at', 'updated_at', 'status']
 
 # Item Serializer
-class ItemSerializer(serializers.ModelSerializer):
+class ItemSerializer(SparseFieldsMixin, ImageRenditionsMixin, serializers.ModelSerializer):
     class Meta:
         model = Listing
         fields = ['id', 'title', 'slug', 'short_desc', 'description', 'poster', 'image', 'type', 'category', 'price', 'time_frame', 'available', 'created_at']
 
-class DiningSerializer(serializers.ModelSerializer):
+class DiningSerializer(SparseFieldsMixin, ImageRenditionsMixin, serializers.ModelSerializer):
     class Meta:
         model = Dining
-        fields = ['id', 'title', 'slug', 'short_desc', 'description', 'poster', 'image', 'location', 'created_at', 'in_use', 'category']
+        fields = ['id', 'title', 'slug', 'short_desc', 'description', 'poster', 'image', 'location', 'created_at', 'in_use', 'category', 'capacity', 'opens_at', 'closes_at', 'slot_minutes']
 
-class DiningBookingSerializer(serializers.ModelSerializer):
+class DiningBookingSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = DiningBooking
-        fields = ['id', 'dining', 'user', 'booking_time', 'guests', 'created_at']
+        fields = ['id', 'dining', 'user', 'booking_time', 'guests', 'status', 'slot_start', 'created_at']
+        read_only_fields = ['status']
+
+class ReservationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    listing = serializers.SlugRelatedField(
+        slug_field='slug', queryset=Listing.objects.filter(type=ItemTypes.ACCOMMODATION)
+    )
+
+    class Meta:
+        model = Reservation
+        fields = ['id', 'listing', 'user', 'check_in', 'check_out', 'guests', 'status', 'created_at']
+        read_only_fields = ['user', 'status']
+
+    def validate(self, attrs):
+        check_in = attrs.get('check_in', getattr(self.instance, 'check_in', None))
+        check_out = attrs.get('check_out', getattr(self.instance, 'check_out', None))
+        if check_in and check_out and check_out <= check_in:
+            raise serializers.ValidationError({'check_out': 'Check-out must be after check-in.'})
+        if 'check_in' in attrs and check_in < timezone.localdate():
+            raise serializers.ValidationError({'check_in': 'Check-in cannot be in the past.'})
+        return attrs
 
 # Donation Serializer
-class DonationSerializer(serializers.ModelSerializer):
+class DonationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Donation
         fields = ['id', 'names', 'email', 'phone_number', 'amount', 'donated_at']
 
 # OrderItem Serializer
-class OrderItemSerializer(serializers.ModelSerializer):
+class OrderItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     item = ItemSerializer(read_only=True)
     
     class Meta:
@@ -65,7 +200,7 @@ class OrderItemSerializer(serializers.ModelSerializer):
         fields = ['id', 'item', 'quantity', 'price']
 
 # Order Serializer
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     items = OrderItemSerializer(many=True, read_only=True)
 
@@ -74,19 +209,66 @@ class OrderSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'status', 'total_price', 'items', 'created_at', 'updated_at']
 
 
-class PartnerSerializer(serializers.ModelSerializer):
+class CartLineSerializer(serializers.Serializer):
+    slug = serializers.SlugField()
+    quantity = serializers.IntegerField(min_value=1, max_value=1000)
+
+
+class CheckoutSerializer(serializers.Serializer):
+    """A cart of listing slugs and quantities; prices always come from the database."""
+    items = CartLineSerializer(many=True, allow_empty=False, max_length=100)
+
+    def validate_items(self, lines):
+        quantities = {}
+        for line in lines:
+            # The same listing twice is one line
+            quantities[line['slug']] = quantities.get(line['slug'], 0) + line['quantity']
+        return quantities
+
+
+class ModerationSerializer(serializers.Serializer):
+    """A moderation action and the ids of the rows it applies to."""
+    action = serializers.ChoiceField(choices=[])
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=settings.BULK_MAX_ROWS
+    )
+
+    def __init__(self, *args, actions=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['action'].choices = list(actions)
+
+
+class PartnerSerializer(SparseFieldsMixin, ImageRenditionsMixin, serializers.ModelSerializer):
     class Meta:
         model = Partner
         fields = ['id', 'name', 'logo', 'url']
 
-class DocumentSerializer(serializers.ModelSerializer):
+class DocumentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    file = DocumentFileField()
     class Meta:
         model = Document
-        fields = ['file_name', 'file', 'description', 'file_type', 'document_type']
+        fields = ['file_name', 'original_name', 'file', 'description', 'file_type', 'document_type']
+        read_only_fields = ['original_name']
 
 # Full Document Serializer for authenticated users
-class DocumentFullSerializer(serializers.ModelSerializer):
+class DocumentFullSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     uploaded_by = UserSerializer(read_only=True)
+    file = DocumentFileField()
     class Meta:
         model = Document
-        fields = ['id', 'file_name', 'file', 'file_type', 'document_type', 'visibility', 'description', 'uploaded_at', 'uploaded_by']
\ No newline at end of file
+        fields = ['id', 'file_name', 'original_name', 'file', 'file_type', 'document_type', 'visibility', 'description', 'uploaded_at', 'uploaded_by', 'size', 'sha256']
+        read_only_fields = ['original_name', 'size', 'sha256']
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    offset = serializers.IntegerField(source='received', read_only=True)
+
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'file_name', 'size', 'offset', 'document_type', 'visibility', 'description', 'document', 'created_at']
+        read_only_fields = ['document']
+
+    def validate_size(self, value):
+        if not 0 < value <= settings.UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(f'Size must be between 1 and {settings.UPLOAD_MAX_SIZE} bytes.')
+        return value
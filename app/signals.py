@@ -0,0 +1,148 @@
+import os
+
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from . import tasks
+from .bulk import bulk_changed
+from .cache import bump_version
+from .dining import release
+from .images import ORIGINAL, image_fields, image_models, image_names
+from .jobs import enqueue
+from .stats import local_day, refresh_later
+from .models import (
+    BookingStatus, Dining, DiningBooking, Document, Donation, ImageRendition, Listing, Order, OrderItem, Partner, Post,
+    UploadSession, User,
+)
+
+# Models whose changes invalidate cached API responses
+VERSIONED_MODELS = [Post, Listing, Dining, Partner, User]
+
+
+def bump_model_version(sender, **kwargs):
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    # Bump after commit so no reader can cache pre-commit rows under the new stamp
+    transaction.on_commit(lambda: bump_version(sender))
+
+
+def track_versions(models):
+    for model in models:
+        uid = f'bump_version_{model._meta.label_lower}'
+        post_save.connect(bump_model_version, sender=model, dispatch_uid=uid)
+        post_delete.connect(bump_model_version, sender=model, dispatch_uid=uid)
+
+
+track_versions(VERSIONED_MODELS)
+
+
+def enqueue_missing_renditions(model, instances):
+    names = image_names(instances)
+    rendered = ImageRendition.objects.filter(source__in=names, format=ORIGINAL).values_list('source', flat=True)
+    missing = sorted(names - set(rendered))
+    if missing:
+        enqueue(tasks.render_images, model=model._meta.label, names=missing)
+
+
+def render_images(sender, instance, **kwargs):
+    update_fields = kwargs.get('update_fields')
+    if update_fields and not {field.name for field in image_fields(sender)} & set(update_fields):
+        return
+    enqueue_missing_renditions(sender, [instance])
+
+
+for model in image_models():
+    post_save.connect(render_images, sender=model, dispatch_uid=f'render_images_{model._meta.label_lower}')
+
+
+def bulk_saved(sender, instances, **kwargs):
+    # One version bump and one render job per batch instead of one per row
+    if sender in VERSIONED_MODELS:
+        transaction.on_commit(lambda: bump_version(sender))
+    if instances and image_fields(sender):
+        enqueue_missing_renditions(sender, instances)
+
+
+bulk_changed.connect(bulk_saved, dispatch_uid='bulk_saved')
+
+
+def note_document_upload(sender, instance, **kwargs):
+    # FileField commits new uploads during save; before that they are pending
+    instance._file_uploaded = bool(instance.file) and not instance.file._committed
+
+
+def inspect_document(sender, instance, **kwargs):
+    if getattr(instance, '_file_uploaded', False):
+        enqueue(tasks.inspect_document, pk=instance.pk)
+
+
+pre_save.connect(note_document_upload, sender=Document, dispatch_uid='note_document_upload')
+post_save.connect(inspect_document, sender=Document, dispatch_uid='inspect_document')
+
+
+def remove_partial_upload(sender, instance, **kwargs):
+    try:
+        os.unlink(instance.path)
+    except FileNotFoundError:
+        pass
+
+
+post_delete.connect(remove_partial_upload, sender=UploadSession, dispatch_uid='remove_partial_upload')
+
+
+def release_dining_seats(sender, instance, **kwargs):
+    # Also runs for queryset and cascade deletes, which bypass DiningBooking.save()
+    if instance.status == BookingStatus.CONFIRMED and instance.slot_start:
+        release(instance.dining_id, instance.slot_start, instance.guests)
+
+
+post_delete.connect(release_dining_seats, sender=DiningBooking, dispatch_uid='release_dining_seats')
+
+
+# Daily rollups (app/stats.py): rebuild each day a write touches, after commit
+def refresh_donation_stats(sender, instance, **kwargs):
+    refresh_later('donations', local_day(instance.donated_at))
+
+
+def refresh_order_stats(sender, instance, **kwargs):
+    refresh_later('orders', local_day(instance.created_at))
+
+
+def refresh_order_item_stats(sender, instance, **kwargs):
+    # Missing when the order itself is being deleted; its own signal covers the day
+    created_at = Order.objects.filter(pk=instance.order_id).values_list('created_at', flat=True).first()
+    if created_at is not None:
+        refresh_later('orders', local_day(created_at))
+
+
+def note_booking_day(sender, instance, **kwargs):
+    # A booking moved to another day also changes the old day's rollup
+    old = DiningBooking.objects.filter(pk=instance.pk).values_list('booking_time', flat=True).first() if instance.pk else None
+    instance._old_stats_day = local_day(old) if old else None
+
+
+def refresh_booking_stats(sender, instance, **kwargs):
+    refresh_later('bookings', local_day(instance.booking_time), getattr(instance, '_old_stats_day', None))
+
+
+for model, receiver in ((Donation, refresh_donation_stats), (Order, refresh_order_stats),
+                        (OrderItem, refresh_order_item_stats), (DiningBooking, refresh_booking_stats)):
+    uid = f'refresh_stats_{model._meta.label_lower}'
+    post_save.connect(receiver, sender=model, dispatch_uid=uid)
+    post_delete.connect(receiver, sender=model, dispatch_uid=uid)
+pre_save.connect(note_booking_day, sender=DiningBooking, dispatch_uid='note_booking_day')
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', None)
+    if not pragmas or connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+connection_created.connect(apply_sqlite_pragmas, dispatch_uid='apply_sqlite_pragmas')
@@ -0,0 +1,126 @@
+import datetime
+import zlib
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import (
+    BookingStatus, DailyBookingStat, DailyDonationStat, DailyListingSales, DailyOrderStat,
+    DiningBooking, Donation, Order, OrderItem,
+)
+
+
+def bounds(start, end):
+    """Aware datetimes from the start of local day ``start`` to the end of ``end``."""
+    tz = timezone.get_current_timezone()
+    return (
+        datetime.datetime.combine(start, datetime.time.min, tzinfo=tz),
+        datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time.min, tzinfo=tz),
+    )
+
+
+def local_day(value):
+    return timezone.localdate(value)
+
+
+def lock_rollup(name, start, end):
+    """
+    Hold off other rebuilds of rollup ``name`` over ``start``..``end`` until
+    the transaction ends.
+
+    On PostgreSQL these are advisory locks: a one-day rebuild shares the
+    rollup's lock and holds its day's, and a longer one holds the rollup's.
+    SQLite has one writer at a time, and rebuilding() writes before it
+    reads, so the transaction already holds the database's write lock.
+    """
+    if connection.vendor != 'postgresql':
+        return
+    key = zlib.crc32(name.encode()) & 0x7fffffff
+    with connection.cursor() as cursor:
+        if start == end:
+            cursor.execute('SELECT pg_advisory_xact_lock_shared(%s, 0)', [key])
+            cursor.execute('SELECT pg_advisory_xact_lock(%s, %s)', [key, start.toordinal()])
+        else:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s, 0)', [key])
+
+
+@contextmanager
+def rebuilding(name, start, end, *models):
+    """
+    Clear the rows of ``models`` from ``start`` to ``end`` for the block to
+    rebuild, in one transaction.
+
+    The lock is taken and the old rows deleted before the source rows are
+    read. Two concurrent rebuilds of a day therefore run one after the
+    other, and the later one sees everything the earlier one committed.
+    """
+    with transaction.atomic():
+        lock_rollup(name, start, end)
+        for model in models:
+            model.objects.filter(day__range=(start, end)).delete()
+        yield
+
+
+def refresh_donations(start, end):
+    lo, hi = bounds(start, end)
+    with rebuilding('donations', start, end, DailyDonationStat):
+        groups = (
+            Donation.objects.filter(donated_at__gte=lo, donated_at__lt=hi)
+            .annotate(day=TruncDate('donated_at')).values('day')
+            .annotate(count=Count('pk'), total=Sum('amount')).order_by()
+        )
+        DailyDonationStat.objects.bulk_create([DailyDonationStat(**group) for group in groups], batch_size=500)
+
+
+def refresh_orders(start, end):
+    lo, hi = bounds(start, end)
+    with rebuilding('orders', start, end, DailyOrderStat, DailyListingSales):
+        groups = (
+            Order.objects.filter(created_at__gte=lo, created_at__lt=hi)
+            .annotate(day=TruncDate('created_at')).values('day', 'status')
+            .annotate(orders=Count('pk'), revenue=Sum('total_price')).order_by()
+        )
+        DailyOrderStat.objects.bulk_create([DailyOrderStat(**group) for group in groups], batch_size=500)
+        sales = (
+            OrderItem.objects.filter(order__created_at__gte=lo, order__created_at__lt=hi)
+            .annotate(day=TruncDate('order__created_at')).values('day', 'order__status', 'item_id')
+            .annotate(units=Sum('quantity'), sales=Sum(F('price') * F('quantity'))).order_by()
+        )
+        DailyListingSales.objects.bulk_create([
+            DailyListingSales(day=row['day'], status=row['order__status'], listing_id=row['item_id'],
+                              quantity=row['units'], revenue=row['sales'])
+            for row in sales
+        ], batch_size=500)
+
+
+def refresh_bookings(start, end):
+    lo, hi = bounds(start, end)
+    with rebuilding('bookings', start, end, DailyBookingStat):
+        groups = (
+            DiningBooking.objects.filter(booking_time__gte=lo, booking_time__lt=hi, status=BookingStatus.CONFIRMED)
+            .annotate(day=TruncDate('booking_time')).values('day', 'dining_id')
+            .annotate(bookings=Count('pk'), guests=Sum('guests')).order_by()
+        )
+        DailyBookingStat.objects.bulk_create([DailyBookingStat(**group) for group in groups], batch_size=500)
+
+
+# Rollup name -> refresh(start, end); the rollup of a day only reads that day's rows
+ROLLUPS = {
+    'donations': refresh_donations,
+    'orders': refresh_orders,
+    'bookings': refresh_bookings,
+}
+
+
+def refresh_later(name, *days):
+    """
+    Rebuild the rollups of ``days`` once the current transaction commits.
+
+    The hooks are robust: a failed rebuild is logged and left to
+    refresh_stats, and never fails the request whose write already committed.
+    """
+    for day in sorted(day for day in set(days) if day is not None):
+        transaction.on_commit(lambda day=day: ROLLUPS[name](day, day), robust=True)
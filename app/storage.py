@@ -0,0 +1,102 @@
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+
+
+def content_path(directory, digest, extension):
+    return posixpath.join(directory, digest[:2], digest + extension)
+
+
+def is_content_addressed(name):
+    """True for names ContentAddressedStorage produced: <dir>/<ab>/<abcdef...>.<ext>."""
+    parent, basename = posixpath.split(name)
+    digest = os.path.splitext(basename)[0]
+    return len(digest) == 64 and posixpath.basename(parent) == digest[:2]
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores every file under the SHA-256 of its content, keeping upload_to:
+    ``listings/photo.jpg`` becomes ``listings/3f/3fa4…e1.jpg``.
+
+    The content is hashed in the same pass that writes it to disk, so
+    uploading a file that is already stored costs no extra disk and returns
+    the existing name. The first original file name of each blob is kept in
+    MediaBlob. Because files are shared, names never change after a save
+    and there are no ``_AbC123`` suffixes.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content in _save()
+        return name
+
+    def _save(self, name, content):
+        directory, basename = posixpath.split(name.replace('\\', '/'))
+        extension = os.path.splitext(basename)[1].lower()
+        staging = self.path(directory)
+        os.makedirs(staging, exist_ok=True)
+
+        if hasattr(content, 'temporary_file_path'):
+            # Already spooled to disk by the upload handler: hash, then move it
+            temp_path, owned = content.temporary_file_path(), False
+            digest, size = self._hash_file(temp_path)
+        else:
+            temp_path, digest, size = self._stage(content, staging)
+            owned = True
+
+        final = content_path(directory, digest, extension)
+        full_path = self.path(final)
+        if os.path.exists(full_path):
+            if owned:
+                os.unlink(temp_path)
+        else:
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            try:
+                file_move_safe(temp_path, full_path, allow_overwrite=False)
+            except FileExistsError:
+                # Another request stored the same content first
+                if owned:
+                    os.unlink(temp_path)
+            else:
+                if self.file_permissions_mode is not None:
+                    os.chmod(full_path, self.file_permissions_mode)
+        self._record(final, digest, size, basename)
+        return final
+
+    def _stage(self, content, directory):
+        """Write ``content`` to a temporary file in ``directory``, hashing it on the way."""
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    size += len(chunk)
+                    fh.write(chunk)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return temp_path, digest.hexdigest(), size
+
+    def _hash_file(self, path):
+        digest = hashlib.sha256()
+        size = 0
+        with open(path, 'rb') as fh:
+            for chunk in iter(lambda: fh.read(64 * 1024), b''):
+                digest.update(chunk)
+                size += len(chunk)
+        return digest.hexdigest(), size
+
+    def _record(self, path, digest, size, original_name):
+        from .models import MediaBlob
+
+        MediaBlob.objects.get_or_create(
+            path=path, defaults={'digest': digest, 'size': size, 'original_name': original_name},
+        )
@@ -0,0 +1,31 @@
+import hashlib
+
+from django.apps import apps
+
+from .cache import bump_version
+from .images import generate_renditions
+from .jobs import job
+from .models import Document
+
+
+@job('images.render')
+def render_images(model, names):
+    if sum(generate_renditions(name) for name in names):
+        # Responses cached before the renditions existed lack them
+        bump_version(apps.get_model(model))
+
+
+@job('documents.inspect')
+def inspect_document(pk):
+    """Record the size and SHA-256 of an uploaded document."""
+    document = Document.objects.filter(pk=pk).first()
+    if document is None or not document.file:
+        return
+    digest = hashlib.sha256()
+    size = 0
+    with document.file.open('rb') as fh:
+        for chunk in fh.chunks():
+            digest.update(chunk)
+            size += len(chunk)
+    # Skip the write if the file was replaced while this job ran
+    Document.objects.filter(pk=pk, file=document.file.name).update(size=size, sha256=digest.hexdigest())
@@ -1,3 +1,1528 @@
-from django.test import TestCase
+import base64
+import datetime
+import hashlib
+import io
+import json
+import os
+import runpy
+import shutil
+import tempfile
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.admin.models import LogEntry
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, models
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from PIL import Image
+from rest_framework.test import APIClient
+
+from .models import (
+    DailyBookingStat, DailyDonationStat, DailyListingSales, DailyOrderStat, Dining, DiningBooking, DiningSlot,
+    Document, Donation, ImageRendition, Job, Listing, MediaBlob, Order, OrderItem, Post, Reservation, ReservationNight,
+    UploadSession, User,
+)
+from . import jobs, stats, tasks, uploads
+from .cache import bump_version, get_cache, get_versions, version_key
+from .checks import check_search_triggers
+from .mixins import QueryBudgetExceeded
+from .search import match_expression, missing_triggers, rebuild_index, search
+from .pagination import KeysetPagination
+from .routers import ReplicaRouter, ReplicaRoutingMiddleware, use_primary
+
+
+class LocalCacheMixin:
+    """Swaps the on-disk cache for an empty in-memory one for each test."""
+
+    def setUp(self):
+        super().setUp()
+        local = override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+        local.enable()
+        self.addCleanup(local.disable)
+        get_cache().clear()
+
+
+class TempMediaMixin:
+    """Points MEDIA_ROOT at a fresh directory for each test."""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root,
+                                  UPLOAD_SESSION_DIR=os.path.join(self.media_root, 'partial'))
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def write_media(self, name, content=b'data'):
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as fh:
+            fh.write(content)
+        return path
+
+
+def make_document(user, visibility='private', content=b'%PDF-0123456789', file_name='Report', upload_name='report.pdf'):
+    document = Document(file_name=file_name, document_type='dining', visibility=visibility, uploaded_by=user,
+                        file=SimpleUploadedFile(upload_name, content))
+    document.save()
+    return document
+
+
+def make_image(name, size=(800, 400), mode='RGB', format='JPEG'):
+    buffer = io.BytesIO()
+    Image.new(mode, size, 'red').save(buffer, format)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+@override_settings(ALLOWED_HOSTS=['*'], FILE_SERVE_MODE='sendfile')
+class MediaServingTests(LocalCacheMixin, TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.write_media('documents/secret.pdf', b'secret')
+        self.write_media('listings/hat.jpg', b'hat')
+
+    def test_public_media_is_served(self):
+        response = self.client.get('/media/listings/hat.jpg')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'hat')
+
+    def test_private_media_is_hidden(self):
+        self.assertEqual(self.client.get('/media/documents/secret.pdf').status_code, 404)
+
+    def test_private_media_cannot_be_reached_through_other_directories(self):
+        for url in [
+            '/media/x/../documents/secret.pdf',
+            '/media/./documents/secret.pdf',
+            '/media/listings/../documents/secret.pdf',
+            '/media/documents//secret.pdf',
+            '/media/../media/documents/secret.pdf',
+        ]:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_symlink_into_private_directory_is_hidden(self):
+        os.symlink(os.path.join(self.media_root, 'documents'), os.path.join(self.media_root, 'listings', 'docs'))
+        self.assertEqual(self.client.get('/media/listings/docs/secret.pdf').status_code, 404)
+
+    def test_staff_can_read_private_media(self):
+        staff = User.objects.create_user(email='staff@example.com', password='secret123', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get('/media/x/../documents/secret.pdf')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'secret')
+
+
+@override_settings(ALLOWED_HOSTS=['*'], FILE_SERVE_MODE='sendfile', JOBS_INLINE=True)
+class DocumentDownloadTests(LocalCacheMixin, TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(email='owner@example.com', password='secret123')
+        self.public = make_document(self.user, 'public', b'%PDF-public')
+        self.private = make_document(self.user, 'private', b'%PDF-private-0123456789', 'Secret', 'secret.pdf')
+        self.api = APIClient()
+
+    def test_public_download(self):
+        response = self.api.get(f'/api/documents/{self.public.pk}/download/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-public')
+        self.assertIn('attachment', response['Content-Disposition'])
+        self.assertIn('report.pdf', response['Content-Disposition'])
+        self.assertTrue(response['Cache-Control'].startswith('public'))
+
+    def test_private_document_needs_authentication(self):
+        self.assertEqual(self.api.get(f'/api/documents/{self.private.pk}/download/').status_code, 404)
+        self.assertEqual(self.api.get(f'/api/documents/{self.private.pk}/link/').status_code, 404)
+        self.assertEqual(self.api.get('/media/' + self.private.file.name).status_code, 404)
+
+    def test_private_download_is_not_shared_cached(self):
+        self.api.force_authenticate(self.user)
+        response = self.api.get(f'/api/documents/{self.private.pk}/download/', HTTP_RANGE='bytes=5-11')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'private')
+        self.assertTrue(response['Cache-Control'].startswith('private'))
+
+    def signed_url(self):
+        self.api.force_authenticate(self.user)
+        link = self.api.get(f'/api/documents/{self.private.pk}/link/').json()
+        self.api.force_authenticate(None)
+        return link['url']
+
+    def test_signed_link_skips_authentication_and_the_database(self):
+        url = self.signed_url()
+        with self.assertNumQueries(0):
+            response = self.api.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-private-0123456789')
+        self.assertIn('secret.pdf', response['Content-Disposition'])
+
+    def test_forged_or_expired_link_is_refused(self):
+        url = self.signed_url()
+        self.assertEqual(self.api.get(url[:-4] + 'abc/').status_code, 404)
+        with override_settings(DOWNLOAD_URL_MAX_AGE=-1):
+            self.assertEqual(self.api.get(url).status_code, 404)
+
+
+def cursor(values, reverse=False):
+    payload = json.dumps({'v': values, 'r': reverse}).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+@override_settings(ALLOWED_HOSTS=['*'])
+@mock.patch.object(KeysetPagination, 'page_size', 2)
+class KeysetPaginationTests(LocalCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(email='buyer@example.com', password='secret123')
+        self.orders = [Order.objects.create(user=self.user, total_price=i) for i in range(5)]
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def ids(self, response):
+        return [row['id'] for row in response.json()['results']]
+
+    def test_pages_follow_each_other(self):
+        seen = []
+        response = self.api.get('/api/orders/', {'cursor': ''})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            seen += self.ids(response)
+            if not response.json()['next']:
+                break
+            response = self.api.get(response.json()['next'])
+        self.assertEqual(sorted(seen), sorted(order.pk for order in self.orders))
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertNotIn('count', response.json())
+
+        previous = self.api.get(response.json()['previous'])
+        self.assertEqual(self.ids(previous), seen[-3:-1])
+
+    def test_invalid_cursors_are_not_found(self):
+        for value in ['abc', '!!', cursor(['abc', 1]), cursor([{'a': 1}, 1]), cursor([None, 1]),
+                      cursor([[1], 1]), cursor(['2026-01-01T00:00:00+00:00', 'x']), cursor([1])]:
+            with self.subTest(cursor=value):
+                self.assertEqual(self.api.get('/api/orders/', {'cursor': value}).status_code, 404)
+
+    def test_listing_cursor_values_are_typed(self):
+        for i in range(3):
+            Listing.objects.create(title=f'Hat {i}', description='x', price=3, slug=f'hat-{i}')
+        first = self.api.get('/api/listings/', {'cursor': ''})
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(self.api.get(first.json()['next']).status_code, 200)
+        self.assertEqual(self.api.get('/api/listings/', {'cursor': cursor([{}, 'x'])}).status_code, 404)
+
+
+@override_settings(ALLOWED_HOSTS=['*'])
+class StatsTests(LocalCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_user(email='admin@example.com', password='secret123', is_staff=True)
+        Listing.objects.create(title='Hat', description='x', price='12.50', slug='hat')
+        self.dining = Dining.objects.create(title='Ibihaza', description='x', location='Kigali')
+        self.api = APIClient()
+        self.api.force_authenticate(self.admin)
+        self.today = timezone.localdate()
+
+    def test_rollups_follow_writes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Donation.objects.create(amount='10.00')
+            Donation.objects.create(amount='5.50')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.api.post('/api/orders/checkout/', {'items': [{'slug': 'hat', 'quantity': 2}]}, format='json')
+        self.assertEqual(list(DailyDonationStat.objects.values_list('day', 'count', 'total')),
+                         [(self.today, 2, Decimal('15.50'))])
+        self.assertEqual(list(DailyOrderStat.objects.values_list('status', 'orders', 'revenue')),
+                         [('pending', 1, Decimal('25.00'))])
+        self.assertEqual(list(DailyListingSales.objects.values_list('quantity', 'revenue')), [(2, Decimal('25.00'))])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.get()
+            order.status = 'confirmed'
+            order.save()
+        self.assertEqual(list(DailyOrderStat.objects.values_list('status', 'orders')), [('confirmed', 1)])
+        self.assertEqual(list(DailyListingSales.objects.values_list('status', flat=True)), ['confirmed'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order.delete()
+        self.assertFalse(DailyOrderStat.objects.exists())
+        self.assertFalse(DailyListingSales.objects.exists())
+
+    def test_moved_booking_leaves_its_old_day(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = DiningBooking.objects.create(user=self.admin, dining=self.dining, guests=3,
+                                                   booking_time=timezone.now())
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.booking_time += datetime.timedelta(days=3)
+            booking.save()
+        self.assertEqual(list(DailyBookingStat.objects.values_list('day', 'guests')),
+                         [(timezone.localdate(booking.booking_time), 3)])
+
+    def test_rebuild_clears_the_day_before_reading_it(self):
+        Donation.objects.create(amount='1.00')
+        with CaptureQueriesContext(connection) as queries:
+            stats.refresh_donations(self.today, self.today)
+        statements = [query['sql'] for query in queries if 'SAVEPOINT' not in query['sql']]
+        # On SQLite the first write takes the lock, so no rebuild can read a stale day
+        self.assertTrue(statements[0].startswith('DELETE'), statements[0])
+        self.assertEqual(DailyDonationStat.objects.get().count, 1)
+
+    def test_failed_rebuild_does_not_fail_the_write(self):
+        with mock.patch.dict(stats.ROLLUPS, {'donations': mock.Mock(side_effect=IntegrityError)}):
+            with self.assertLogs('django', 'ERROR'):
+                with self.captureOnCommitCallbacks(execute=True):
+                    Donation.objects.create(amount='1.00')
+        self.assertEqual(Donation.objects.count(), 1)
+
+    def test_refresh_stats_rebuilds_everything(self):
+        Donation.objects.create(amount='4.00')
+        DailyDonationStat.objects.all().delete()
+        call_command('refresh_stats', '--all', stdout=io.StringIO())
+        self.assertEqual(DailyDonationStat.objects.get().total, Decimal('4.00'))
+
+    def test_stats_view(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Donation.objects.create(amount='10.00')
+            Donation.objects.create(amount='5.50')
+        response = self.api.get('/api/stats/donations/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['totals'], [{'count': 2, 'total': 15.5}])
+        self.assertEqual(self.api.get('/api/stats/nope/').status_code, 404)
+        self.assertEqual(self.api.get('/api/stats/orders/', {'start': '2020-01-01'}).status_code, 400)
+        self.assertEqual(self.api.get('/api/stats/orders/', {'start': 'soon'}).status_code, 400)
+        self.assertIn(APIClient().get('/api/stats/orders/').status_code, (401, 403))
+
+
+@override_settings(ALLOWED_HOSTS=['*'])
+class SearchTests(LocalCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        author = User.objects.create_user(email='author@example.com', password='secret123')
+        for i in range(3):
+            Post.objects.create(title=f'Umuganura feast {i}', description='Harvest', published_by=author)
+        Listing.objects.create(title='Umuganura basket', description='Woven', price=5, slug='basket')
+
+    def search(self, **params):
+        return self.client.get('/api/search/', {'q': 'umuganura', **params})
+
+    def test_ranked_results(self):
+        response = self.search()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 4)
+        self.assertEqual({hit['type'] for hit in self.search(type='listing').json()['results']}, {'listing'})
+
+    def test_limit_is_clamped(self):
+        for index in (True, False):
+            with self.subTest(index=index), mock.patch('app.views.index_available', return_value=index):
+                self.assertEqual(len(self.search(limit=-5).json()['results']), 1)
+                self.assertEqual(len(self.search(limit=0).json()['results']), 1)
+                self.assertEqual(len(self.search(limit=2).json()['results']), 2)
+                self.assertEqual(len(self.search(limit=1000).json()['results']), 4)
+
+    def test_index_follows_updates_and_deletes(self):
+        dining = Dining.objects.create(title='Ibihaza', description='Pumpkin', location='Kigali')
+        self.assertEqual([hit['object_id'] for hit in search('ibihaza', ['dining'])], [dining.pk])
+        Dining.objects.filter(pk=dining.pk).update(title='Isombe')
+        self.assertEqual(search('ibihaza', ['dining']), [])
+        dining.delete()
+        self.assertEqual(search('isombe', ['dining']), [])
+
+    def test_migrations_leave_every_trigger(self):
+        self.assertEqual(missing_triggers(), [])
+        self.assertEqual(check_search_triggers(None, databases=['default']), [])
+
+    def test_check_reports_dropped_triggers(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER search_index_dining_au')
+        warnings = check_search_triggers(None, databases=['default'])
+        self.assertEqual([warning.id for warning in warnings], ['app.W001'])
+        rebuild_index()
+        self.assertEqual(missing_triggers(), [])
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.search(limit='ten').status_code, 400)
+        self.assertEqual(self.search(type='nope').status_code, 400)
+        self.assertEqual(self.client.get('/api/search/').status_code, 400)
+
+
+@override_settings(ALLOWED_HOSTS=['*'], JOBS_INLINE=True)
+class ContentAddressedStorageTests(LocalCacheMixin, TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(email='owner@example.com', password='secret123')
+
+    def test_identical_content_is_stored_once(self):
+        first = make_document(self.user, content=b'same bytes', upload_name='Minutes.PDF')
+        second = make_document(self.user, content=b'same bytes', upload_name='copy of minutes.pdf')
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertRegex(first.file.name, r'^documents/[0-9a-f]{2}/[0-9a-f]{64}\.pdf$')
+        self.assertEqual(MediaBlob.objects.count(), 1)
+        files = [name for _, _, names in os.walk(self.media_root) for name in names]
+        self.assertEqual(len(files), 1)
+
+    def test_each_document_keeps_its_upload_name(self):
+        first = make_document(self.user, 'public', b'same bytes', upload_name='Minutes.PDF')
+        second = make_document(self.user, 'public', b'same bytes', upload_name='copy of minutes.pdf')
+        self.assertEqual(Document.objects.get(pk=first.pk).original_name, 'Minutes.PDF')
+        self.assertEqual(Document.objects.get(pk=second.pk).original_name, 'copy of minutes.pdf')
+
+        api = APIClient()
+        response = api.get(f'/api/documents/{second.pk}/download/')
+        self.assertIn('copy of minutes.pdf', response['Content-Disposition'])
+        names = {row['original_name'] for row in api.get('/api/documents/').json()['results']}
+        self.assertEqual(names, {'Minutes.PDF', 'copy of minutes.pdf'})
+
+    def test_admin_shows_the_upload_name(self):
+        document = make_document(self.user, upload_name='Budget 2026.pdf')
+        admin = User.objects.create_superuser(email='admin@example.com', password='secret123')
+        self.client.force_login(admin)
+        self.assertContains(self.client.get(f'/admin/app/document/{document.pk}/change/'), 'Budget 2026.pdf')
+        self.assertContains(self.client.get('/admin/app/document/'), 'Budget 2026.pdf')
+
+
+@override_settings(ALLOWED_HOSTS=['*'])
+class ResponseCacheTests(LocalCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            Listing.objects.create(title='Hat', description='x', price=3, slug='hat')
+
+    def test_repeated_reads_come_from_the_cache(self):
+        first = self.client.get('/api/listings/')
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/listings/')
+        self.assertEqual(first.json(), second.json())
+
+    def test_writes_invalidate_after_commit(self):
+        self.client.get('/api/listings/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Listing.objects.create(title='Mug', description='x', price=3, slug='mug')
+        self.assertEqual(self.client.get('/api/listings/').json()['count'], 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            Listing.objects.filter(slug='hat').first().delete()
+        self.assertEqual(self.client.get('/api/listings/hat/').status_code, 404)
+
+    def test_not_modified_without_queries(self):
+        etag = self.client.get('/api/listings/hat/')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/listings/hat/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_detail_last_modified_follows_the_cached_body(self):
+        listing = Listing.objects.get()
+        last_modified = self.client.get('/api/listings/hat/')['Last-Modified']
+        self.assertEqual(last_modified, http_date(listing.updated_at.timestamp()))
+        self.assertNotIn('Last-Modified', self.client.get('/api/listings/'))
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/listings/hat/', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['Last-Modified'], last_modified)
+
+        # Not yet announced by the version bump: the cached body keeps its date
+        Listing.objects.filter(pk=listing.pk).update(updated_at=listing.updated_at + datetime.timedelta(days=1))
+        self.assertEqual(self.client.get('/api/listings/hat/', HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        bump_version(Listing)
+        response = self.client.get('/api/listings/hat/', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['Last-Modified'], last_modified)
+
+    def test_etag_changes_with_the_body(self):
+        response = self.client.get('/api/listings/')
+        etag, body = response['ETag'], response.json()
+        # Committed but not yet announced by the version bump: the old body
+        # is still served, and it must keep the old ETag
+        Listing.objects.create(title='Mug', description='x', price=3, slug='mug')
+        response = self.client.get('/api/listings/')
+        self.assertEqual((response['ETag'], response.json()), (etag, body))
+        self.assertEqual(self.client.get('/api/listings/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        bump_version(Listing)
+        response = self.client.get('/api/listings/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['count'], 2)
+
+    def test_nested_models_change_the_etag(self):
+        from about.models import Team, TeamSocialMedia
+
+        with self.captureOnCommitCallbacks(execute=True):
+            team = Team.objects.create(name='Aline', role='Chef')
+        etag = self.client.get('/about/team/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            TeamSocialMedia.objects.create(team_member=team, link='https://example.com')
+        self.assertEqual(self.client.get('/about/team/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_anonymous_and_authenticated_responses_are_kept_apart(self):
+        anonymous = self.client.get('/api/listings/')['ETag']
+        self.client.force_login(User.objects.create_user(email='u@example.com', password='secret123'))
+        self.assertNotEqual(self.client.get('/api/listings/')['ETag'], anonymous)
+
+    def test_each_query_string_is_cached_apart(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Listing.objects.create(title='Mug', description='x', price=3, slug='mug')
+        self.assertEqual(self.client.get('/api/listings/', {'slug': 'mug'}).json()['count'], 1)
+        self.assertEqual(self.client.get('/api/listings/').json()['count'], 2)
+
+    def test_errors_are_not_cached(self):
+        self.assertEqual(self.client.get('/api/listings/mug/').status_code, 404)
+        # Visible without waiting for the version bump
+        Listing.objects.create(title='Mug', description='x', price=3, slug='mug')
+        self.assertEqual(self.client.get('/api/listings/mug/').status_code, 200)
+
+    def test_evicted_stamps_never_revive_old_entries(self):
+        before = get_versions([Listing])
+        get_cache().delete(version_key(Listing))
+        after = get_versions([Listing])
+        self.assertNotEqual(after, before)
+        self.assertEqual(get_versions([Listing]), after)
+
+
+@override_settings(ALLOWED_HOSTS=['*'])
+class SparseFieldsTests(LocalCacheMixin, TestCase):
+    def selected_sql(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, [query['sql'] for query in queries if query['sql'].startswith('SELECT')]
+
+    def test_unrequested_columns_are_not_read(self):
+        Listing.objects.create(title='Hat', description='A very long description', price=3, slug='hat')
+        response, statements = self.selected_sql('/api/listings/?fields=title,slug')
+        self.assertEqual(response.json()['results'], [{'title': 'Hat', 'slug': 'hat'}])
+        self.assertNotIn('"description"', statements[-1])
+
+    def test_display_fields_keep_their_column(self):
+        from about.models import SocialMedia
+
+        for network in ('facebook', 'instagram', 'twitter'):
+            SocialMedia.objects.create(name=network, link=f'https://{network}.com/urugo')
+        response, statements = self.selected_sql('/about/social-media/?fields=name_display')
+        self.assertEqual(len(response.json()['results']), 3)
+        # One page query and one count: no per-row load of a deferred column
+        self.assertEqual(len(statements), 2)
+
+
+@override_settings(ALLOWED_HOSTS=['*'])
+class CheckoutTests(LocalCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(email='buyer@example.com', password='secret123')
+        Listing.objects.create(title='Hat', description='x', price='12.50', slug='hat')
+        Listing.objects.create(title='Mug', description='x', price='3.00', slug='mug')
+        Listing.objects.create(title='Old', description='x', price='3.00', slug='old', available=False)
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def checkout(self, items, **data):
+        return self.api.post('/api/orders/checkout/', {'items': items, **data}, format='json')
+
+    def test_prices_come_from_the_database(self):
+        response = self.checkout([{'slug': 'hat', 'quantity': 2}, {'slug': 'mug', 'quantity': 1},
+                                  {'slug': 'hat', 'quantity': 1}], total_price='0.01', user=999)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['total_price'], '40.50')
+        self.assertEqual(
+            sorted((item['item']['slug'], item['quantity'], item['price']) for item in response.json()['items']),
+            [('hat', 3, '12.50'), ('mug', 1, '3.00')],
+        )
+        order = Order.objects.get()
+        self.assertEqual(order.user, self.user)
+        self.assertEqual(order.total_price, Decimal('40.50'))
+        self.assertEqual(int(response['X-Query-Count']), 7)
+
+    def test_unavailable_listings_write_nothing(self):
+        response = self.checkout([{'slug': 'hat', 'quantity': 1}, {'slug': 'old', 'quantity': 1},
+                                  {'slug': 'nope', 'quantity': 1}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['items'], ['Unknown or unavailable listing: nope',
+                                                    'Unknown or unavailable listing: old'])
+        self.assertFalse(Order.objects.exists())
+
+    def test_invalid_carts(self):
+        for items in ([], [{'slug': 'hat', 'quantity': 0}], [{'slug': 'hat', 'quantity': 1001}],
+                      [{'slug': 'hat'}], [{'slug': 'hat', 'quantity': 1}] * 101):
+            with self.subTest(items=items):
+                self.assertEqual(self.checkout(items).status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+    def test_failed_items_roll_back_the_order(self):
+        with mock.patch.object(OrderItem.objects, 'bulk_create', side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                self.checkout([{'slug': 'hat', 'quantity': 1}])
+        self.assertFalse(Order.objects.exists())
+
+    def test_anonymous_checkout_is_refused(self):
+        response = APIClient().post('/api/orders/checkout/', {'items': [{'slug': 'hat', 'quantity': 1}]},
+                                    format='json')
+        self.assertIn(response.status_code, (401, 403))
+        self.assertFalse(Order.objects.exists())
+
+
+@override_settings(ALLOWED_HOSTS=['*'])
+class DiningAvailabilityTests(LocalCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(email='guest@example.com', password='secret123')
+        self.dining = Dining.objects.create(title='Ibihaza', description='x', location='Kigali', capacity=10,
+                                            opens_at=datetime.time(12), closes_at=datetime.time(15), slot_minutes=90)
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.tomorrow = timezone.localdate() + datetime.timedelta(days=1)
+
+    def at(self, hour, minute=0):
+        return timezone.make_aware(datetime.datetime.combine(self.tomorrow, datetime.time(hour, minute)))
+
+    def book(self, hour, minute=0, guests=1, dining=None):
+        dining = dining or self.dining
+        return self.api.post('/api/dining-bookings/', {
+            'dining': dining.pk, 'user': self.user.pk, 'booking_time': self.at(hour, minute).isoformat(),
+            'guests': guests,
+        }, format='json')
+
+    def booked(self):
+        return dict(DiningSlot.objects.values_list('start', 'booked'))
+
+    def test_bookings_fill_their_slot(self):
+        response = self.book(12, 30, guests=6)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['slot_start'], self.at(12).isoformat().replace('+00:00', 'Z'))
+        self.assertEqual(self.book(13, guests=4).status_code, 201)
+
+        response = self.book(13, 10, guests=1)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json(), {'booking_time': ['Not enough free seats at this time.']})
+        self.assertEqual(self.booked(), {self.at(12): 10})
+        self.assertEqual(DiningBooking.objects.count(), 2)
+
+    def test_seats_taken_after_the_check_are_not_oversold(self):
+        # Another booking committed between this one's checks and its UPDATE
+        DiningSlot.objects.create(dining=self.dining, start=self.at(12), booked=8)
+        self.assertEqual(self.book(12, guests=3).status_code, 409)
+        self.assertFalse(DiningBooking.objects.exists())
+        self.assertEqual(self.booked(), {self.at(12): 8})
+
+    def test_rejected_bookings(self):
+        self.assertEqual(self.book(16).json(), {'booking_time': ['Outside of the opening hours.']})
+        self.assertEqual(self.book(13, guests=11).json(), {'guests': ['At most 10 guests per booking.']})
+        self.assertFalse(DiningSlot.objects.filter(booked__gt=0).exists())
+
+    def test_changes_move_the_seats(self):
+        url = f'/api/dining-bookings/{self.book(12, guests=4).json()["id"]}/'
+
+        self.assertEqual(self.api.patch(url, {'guests': 7}, format='json').status_code, 200)
+        self.assertEqual(self.booked(), {self.at(12): 7})
+        self.assertEqual(self.api.patch(url, {'guests': 11}, format='json').status_code, 400)
+        self.assertEqual(self.booked(), {self.at(12): 7})
+
+        moved = self.api.patch(url, {'booking_time': self.at(13, 30).isoformat()}, format='json')
+        self.assertEqual(moved.status_code, 200)
+        self.assertEqual(self.booked(), {self.at(12): 0, self.at(13, 30): 7})
+
+        for _ in range(2):
+            response = self.api.post(url + 'cancel/')
+            self.assertEqual(response.json()['status'], 'cancelled')
+            self.assertEqual(self.booked(), {self.at(12): 0, self.at(13, 30): 0})
+
+    def test_deleting_a_booking_frees_its_seats(self):
+        booking = self.book(12, guests=4).json()['id']
+        self.assertEqual(self.api.delete(f'/api/dining-bookings/{booking}/').status_code, 204)
+        self.assertEqual(self.booked(), {self.at(12): 0})
+
+    def test_availability(self):
+        self.book(12, guests=10)
+        self.book(13, 30, guests=1)
+        response = self.api.get(f'/api/dining/{self.dining.slug}/availability/', {'days': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(int(response['X-Query-Count']), 2)
+        self.assertEqual(response.json()['days'][-1], {
+            'date': self.tomorrow.isoformat(),
+            'slots': [
+                {'start': '%sT12:00:00Z' % self.tomorrow, 'booked': 10, 'free': 0},
+                {'start': '%sT13:30:00Z' % self.tomorrow, 'booked': 1, 'free': 9},
+            ],
+        })
+
+    def test_dining_without_capacity_takes_any_party(self):
+        free = Dining.objects.create(title='Free', description='x', location='Kigali')
+        response = self.book(3, 17, guests=60, dining=free)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.booked()[self.at(3)], 60)
+
+
+@override_settings(ALLOWED_HOSTS=['*'])
+class ReservationTests(LocalCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(email='guest@example.com', password='secret123')
+        self.room_a = Listing.objects.create(title='Room A', description='x', price=10, type='accommodation',
+                                             category='family', slug='room-a')
+        Listing.objects.create(title='Room B', description='x', price=10, type='accommodation',
+                               category='single', slug='room-b')
+        Listing.objects.create(title='Hat', description='x', price=10, slug='hat')
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def date(self, offset):
+        return timezone.localdate() + datetime.timedelta(days=offset)
+
+    def day(self, offset):
+        return self.date(offset).isoformat()
+
+    def reserve(self, listing, check_in, check_out, api=None):
+        return (api or self.api).post('/api/reservations/', {
+            'listing': listing, 'check_in': self.day(check_in), 'check_out': self.day(check_out),
+        }, format='json')
+
+    def vacant(self, check_in, check_out, **params):
+        response = self.api.get('/api/listings/vacant/',
+                                {'check_in': self.day(check_in), 'check_out': self.day(check_out), **params})
+        self.assertEqual(response.status_code, 200)
+        return [row['slug'] for row in response.json()['results']]
+
+    def test_overlapping_stays_are_refused(self):
+        self.assertEqual(self.reserve('room-a', 1, 4).status_code, 201)
+        self.assertEqual(ReservationNight.objects.count(), 3)
+
+        response = self.reserve('room-a', 3, 5)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json(), {'check_in': ['The accommodation is not free for these dates.']})
+        self.assertEqual(Reservation.objects.count(), 1)
+
+        # Check-out morning is the next guest's check-in
+        self.assertEqual(self.reserve('room-a', 4, 6).status_code, 201)
+        self.assertEqual(ReservationNight.objects.count(), 5)
+
+    def test_nights_claimed_elsewhere_roll_the_reservation_back(self):
+        other = Reservation.objects.create(listing=self.room_a, user=self.user, check_in=self.date(10),
+                                           check_out=self.date(11))
+        self.assertEqual(self.reserve('room-a', 8, 12).status_code, 409)
+        self.assertEqual(list(Reservation.objects.all()), [other])
+        self.assertEqual(list(ReservationNight.objects.values_list('reservation', flat=True)), [other.pk])
+
+    def test_invalid_stays(self):
+        cases = [
+            (('hat', 1, 2), {'listing': ['Object with slug=hat does not exist.']}),
+            (('room-b', 3, 2), {'check_out': ['Check-out must be after check-in.']}),
+            (('room-b', -3, 2), {'check_in': ['Check-in cannot be in the past.']}),
+            (('room-b', 1, 90), {'check_out': ['Stays are limited to 60 nights.']}),
+        ]
+        for args, errors in cases:
+            with self.subTest(args=args):
+                response = self.reserve(*args)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), errors)
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_vacant_accommodations(self):
+        self.reserve('room-a', 1, 4)
+        self.assertEqual(self.vacant(2, 3), ['room-b'])
+        self.assertEqual(self.vacant(4, 6), ['room-a', 'room-b'])
+        self.assertEqual(self.vacant(4, 6, category='single'), ['room-b'])
+        response = self.api.get('/api/listings/vacant/', {'check_in': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_cancel_and_move_free_the_nights(self):
+        first = self.reserve('room-a', 1, 4).json()['id']
+        second = self.reserve('room-a', 4, 6).json()['id']
+
+        self.assertEqual(self.api.post(f'/api/reservations/{first}/cancel/').json()['status'], 'cancelled')
+        self.assertEqual(self.vacant(2, 3), ['room-a', 'room-b'])
+
+        response = self.api.patch(f'/api/reservations/{second}/', {'check_in': self.day(1)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(ReservationNight.objects.filter(reservation=second).count(), 5)
+        self.assertEqual(self.vacant(2, 3), ['room-b'])
+
+    def test_guests_only_see_their_own_stays(self):
+        reservation = self.reserve('room-a', 1, 4).json()['id']
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user(email='other@example.com', password='secret123'))
+        self.assertEqual(other.get('/api/reservations/').json()['results'], [])
+        self.assertEqual(other.post(f'/api/reservations/{reservation}/cancel/').status_code, 404)
+        self.assertEqual(ReservationNight.objects.count(), 3)
+
+
+@override_settings(ALLOWED_HOSTS=['*'], JOBS_INLINE=True, UPLOAD_CHUNK_MAX_SIZE=1000)
+class ChunkedUploadTests(LocalCacheMixin, TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(email='uploader@example.com', password='secret123')
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.data = os.urandom(2500)
+
+    def start(self, size=None, file_name='video.mp4'):
+        response = self.api.post('/api/uploads/', {
+            'file_name': file_name, 'size': len(self.data) if size is None else size, 'document_type': 'dining',
+            'visibility': 'private',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.json()['id']
+
+    def put(self, session, start, end, body=None, total=None, **extra):
+        body = self.data[start:end + 1] if body is None else body
+        total = len(self.data) if total is None else total
+        return self.api.generic('PUT', f'/api/uploads/{session}/', body,
+                                content_type='application/offset+octet-stream',
+                                HTTP_CONTENT_RANGE=f'bytes {start}-{end}/{total}', **extra)
+
+    def upload(self, session):
+        for start in range(0, len(self.data), 1000):
+            self.assertEqual(self.put(session, start, min(start + 999, len(self.data) - 1)).status_code, 200)
+        return self.api.post(f'/api/uploads/{session}/finalize/')
+
+    def partial_files(self):
+        return os.listdir(os.path.join(self.media_root, 'partial'))
+
+    def test_chunks_resume_at_the_offset(self):
+        session = self.start()
+        self.assertEqual(self.put(session, 0, 999).json(), {'offset': 1000})
+        self.assertEqual(self.put(session, 0, 999).status_code, 409)
+        self.assertEqual(self.api.get(f'/api/uploads/{session}/').json()['offset'], 1000)
+        self.assertEqual(self.api.post(f'/api/uploads/{session}/finalize/').json(),
+                         {'error': 'Upload incomplete', 'offset': 1000})
+
+        self.assertEqual(self.put(session, 1000, 2100).status_code, 413)
+        self.assertEqual(self.put(session, 1000, 1999, total=9).status_code, 400)
+        self.assertEqual(self.put(session, 1000, 1999, body=self.data[1000:1500]).status_code, 400)
+        self.assertEqual(self.put(session, 1000, 1999, CONTENT_LENGTH='1e3').status_code, 400)
+        self.assertEqual(self.put(session, 1000, 1999).json(), {'offset': 2000})
+
+    def test_finalize_stores_the_document_once(self):
+        session = self.start()
+        response = self.upload(session)
+        self.assertEqual(response.status_code, 201)
+        document = Document.objects.get()
+        self.assertEqual(response.json()['id'], document.pk)
+        self.assertEqual(document.sha256, hashlib.sha256(self.data).hexdigest())
+        self.assertEqual((document.size, document.file_type, document.original_name), (2500, 'mp4', 'video.mp4'))
+        with document.file.open('rb') as fh:
+            self.assertEqual(fh.read(), self.data)
+        self.assertEqual(self.partial_files(), [])
+
+        again = self.api.post(f'/api/uploads/{session}/finalize/')
+        self.assertEqual(again.json()['id'], document.pk)
+        self.assertEqual(Document.objects.count(), 1)
+        self.assertEqual(self.put(session, 0, 999).status_code, 409)
+
+    def test_same_content_shares_a_blob(self):
+        self.upload(self.start())
+        self.assertEqual(self.upload(self.start(file_name='copy.mp4')).status_code, 201)
+        self.assertEqual(Document.objects.count(), 2)
+        self.assertEqual(MediaBlob.objects.count(), 1)
+        self.assertEqual(self.partial_files(), [])
+
+    def test_stale_offsets_do_not_count(self):
+        session = UploadSession.objects.get(pk=self.start())
+        # A concurrent request wrote the first chunk after this one read the session
+        UploadSession.objects.filter(pk=session.pk).update(received=1000)
+        with self.assertRaises(uploads.UploadConflict):
+            uploads.write_chunk(session, 0, 1000, io.BytesIO(self.data[:1000]))
+        self.assertEqual(UploadSession.objects.get(pk=session.pk).received, 1000)
+
+    def test_sessions_belong_to_their_user(self):
+        session = self.start()
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user(email='other@example.com', password='secret123'))
+        self.assertEqual(other.get(f'/api/uploads/{session}/').status_code, 404)
+        self.assertEqual(other.post(f'/api/uploads/{session}/finalize/').status_code, 404)
+        self.assertIn(APIClient().post('/api/uploads/', {}).status_code, (401, 403))
+
+    def test_invalid_sizes(self):
+        for size in (0, settings.UPLOAD_MAX_SIZE + 1):
+            response = self.api.post('/api/uploads/', {'file_name': 'x.pdf', 'size': size, 'document_type': 'dining'},
+                                     format='json')
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_abandoned_sessions_are_purged(self):
+        session = self.start(size=10)
+        self.put(session, 0, 4, body=b'12345', total=10)
+        self.assertEqual(len(self.partial_files()), 1)
+        UploadSession.objects.filter(pk=session).update(updated_at=timezone.now() - datetime.timedelta(days=2))
+        call_command('purge_uploads', stdout=io.StringIO())
+        self.assertEqual(self.partial_files(), [])
+        self.assertFalse(UploadSession.objects.exists())
+
+
+@override_settings(ALLOWED_HOSTS=['*'])
+class BulkEndpointTests(LocalCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_user(email='admin@example.com', password='secret123', is_staff=True)
+        Listing.objects.create(title='Red Hat', description='x', price=1)
+        self.api = APIClient()
+        self.api.force_authenticate(self.admin)
+
+    def test_create_allocates_slugs_in_one_batch(self):
+        self.assertEqual(len(self.api.get('/api/listings/').json()['results']), 1)
+        rows = [{'title': 'Red Hat', 'description': 'a', 'price': '5.00'}] * 3 + [
+            {'title': 'Blue', 'description': 'b', 'price': '2', 'slug': 'blue'}
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.api.post('/api/listings/bulk/', rows, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([row['slug'] for row in response.json()], ['red-hat-2', 'red-hat-3', 'red-hat-4', 'blue'])
+        self.assertEqual(int(response['X-Query-Count']), 5)
+        # The cached list is invalidated and the search index follows
+        self.assertEqual(len(self.api.get('/api/listings/').json()['results']), 5)
+        self.assertEqual(len(search('Blue', ['listing'])), 1)
+
+    def test_one_bad_row_rejects_the_batch(self):
+        Listing.objects.create(title='Blue', description='b', price=2, slug='blue')
+        rows = [
+            {'title': 'ok', 'description': 'a', 'price': '1'},
+            {'title': 'x'},
+            {'title': 'y', 'description': 'c', 'price': '1', 'slug': 'blue'},
+            {'title': 'z', 'description': 'c', 'price': '1', 'slug': 'n1'},
+            {'title': 'z', 'description': 'c', 'price': '1', 'slug': 'n1'},
+        ]
+        response = self.api.post('/api/listings/bulk/', rows, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'], [
+            {},
+            {'description': ['This field is required.'], 'price': ['This field is required.']},
+            {'slug': ['This slug is already in use.']},
+            {},
+            {'slug': ['This slug is already in use.']},
+        ])
+        self.assertEqual(Listing.objects.count(), 2)
+
+    def test_update_and_delete(self):
+        first = Listing.objects.get()
+        second = Listing.objects.create(title='Mug', description='x', price=3, slug='mug')
+        response = self.api.patch('/api/listings/bulk/', [
+            {'id': first.pk, 'price': '9.50'}, {'id': second.pk, 'title': 'Renamed', 'slug': 'renamed'},
+        ], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(row['title'], row['slug'], row['price']) for row in response.json()],
+                         [('Red Hat', 'red-hat', '9.50'), ('Renamed', 'renamed', '3.00')])
+        self.assertEqual(int(response['X-Query-Count']), 5)
+
+        response = self.api.patch('/api/listings/bulk/', [
+            {'id': first.pk, 'slug': 'renamed'}, {'id': 9999, 'price': '1'}, {'id': second.pk, 'price': 'abc'},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'], [
+            {'slug': ['This slug is already in use.']},
+            {'id': ['Unknown or repeated id.']},
+            {'price': ['A valid number is required.']},
+        ])
+        self.assertEqual(Listing.objects.get(pk=first.pk).slug, 'red-hat')
+
+        response = self.api.delete('/api/listings/bulk/', [first.pk, second.pk, 12345], format='json')
+        self.assertEqual(response.json(), {'deleted': 2})
+        self.assertFalse(Listing.objects.exists())
+
+    def test_malformed_ids_are_reported_per_row(self):
+        listing = Listing.objects.get()
+        response = self.api.patch('/api/listings/bulk/', [
+            {'id': [listing.pk], 'price': '1'}, {'id': True, 'price': '1'}, {'id': listing.pk, 'price': '2'},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'], [
+            {'id': ['A valid integer is required.']}, {'id': ['A valid integer is required.']}, {},
+        ])
+
+        response = self.api.delete('/api/listings/bulk/', [{'id': listing.pk}, listing.pk, '1'], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'], [
+            {'id': ['A valid integer is required.']}, {}, {'id': ['A valid integer is required.']},
+        ])
+        self.assertEqual(Listing.objects.get().price, 1)
+
+    def test_posts_and_dining(self):
+        response = self.api.post('/api/blog-posts/bulk/', [{'title': 'Hello', 'description': 'd'}] * 2, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([(row['slug'], row['published_by']['email']) for row in response.json()],
+                         [('hello', 'admin@example.com'), ('hello-2', 'admin@example.com')])
+        response = self.api.post('/api/dining/bulk/', [{'title': 'Ibihaza', 'description': 'd', 'location': 'K'}],
+                                 format='json')
+        self.assertEqual(response.json()[0]['slug'], 'ibihaza')
+
+    def test_staff_only_and_bounded(self):
+        plain = APIClient()
+        plain.force_authenticate(User.objects.create_user(email='plain@example.com', password='secret123'))
+        self.assertEqual(plain.post('/api/dining/bulk/', [{}], format='json').status_code, 403)
+        self.assertIn(APIClient().post('/api/dining/bulk/', [], format='json').status_code, (401, 403))
+        self.assertEqual(self.api.post('/api/dining/bulk/', {}, format='json').json(),
+                         {'error': 'Expected a non-empty list'})
+        with override_settings(BULK_MAX_ROWS=2):
+            self.assertEqual(self.api.delete('/api/listings/bulk/', [1, 2, 3], format='json').status_code, 400)
+        self.assertTrue(Listing.objects.exists())
+
+
+@override_settings(ALLOWED_HOSTS=['*'], QUERY_BUDGET_ENFORCE=True)
+class ModerationTests(LocalCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_user(email='admin@example.com', password='secret123', is_staff=True,
+                                              is_superuser=True)
+        self.user = User.objects.create_user(email='buyer@example.com', password='secret123')
+        self.posts = [Post.objects.create(title=f'Post {i}', description='x', published_by=self.admin)
+                      for i in range(4)]
+        self.api = APIClient()
+        self.api.force_authenticate(self.admin)
+
+    def moderate(self, path, action, rows):
+        return self.api.post(f'/api/{path}/moderate/', {'action': action, 'ids': [row.pk for row in rows]},
+                             format='json')
+
+    def test_one_update_per_batch(self):
+        ContentType.objects.clear_cache()
+        before = get_versions([Post])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.moderate('blog-posts', 'publish', self.posts[:3])
+        self.assertEqual(response.json(), {'action': 'publish', 'changed': 3})
+        self.assertEqual(int(response['X-Query-Count']), 5)
+        self.assertNotEqual(get_versions([Post]), before)
+        self.assertEqual(list(Post.objects.order_by('pk').values_list('published', flat=True)),
+                         [True, True, True, False])
+
+        # Rows already in the target state are not counted again
+        self.assertEqual(self.moderate('blog-posts', 'publish', self.posts).json()['changed'], 1)
+        self.assertEqual(list(LogEntry.objects.values_list('object_repr', 'change_message')),
+                         [('1 Events/Blog', 'Publish.'), ('3 Events/Blog', 'Publish.')])
+
+    def test_order_transitions_and_rollups(self):
+        orders = [Order.objects.create(user=self.user, total_price=5) for _ in range(3)]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.moderate('orders', 'confirm', orders[:2])
+        self.assertEqual(response.json()['changed'], 2)
+        self.assertEqual(sorted(DailyOrderStat.objects.values_list('status', 'orders')),
+                         [('confirmed', 2), ('pending', 1)])
+
+        self.assertEqual(self.moderate('orders', 'complete', orders).json()['changed'], 2)
+        self.assertEqual(self.moderate('orders', 'cancel', orders).json()['changed'], 1)
+        self.assertEqual(list(Order.objects.order_by('pk').values_list('status', flat=True)),
+                         ['completed', 'completed', 'cancelled'])
+
+    def test_invalid_requests(self):
+        response = self.api.post('/api/blog-posts/moderate/', {'action': 'nuke', 'ids': []}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'action': ['"nuke" is not a valid choice.'],
+                                           'ids': ['This list may not be empty.']})
+        plain = APIClient()
+        plain.force_authenticate(self.user)
+        self.assertEqual(plain.post('/api/blog-posts/moderate/', {'action': 'publish', 'ids': [1]},
+                                    format='json').status_code, 403)
+        self.assertFalse(Post.objects.filter(published=True).exists())
+
+    def test_admin_action(self):
+        Post.objects.update(published=True)
+        self.client.force_login(self.admin)
+        response = self.client.post('/admin/app/post/', {
+            'action': 'unpublish', '_selected_action': [post.pk for post in self.posts],
+        }, follow=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Post.objects.filter(published=True).exists())
+        self.assertEqual([str(message) for message in response.context['messages']],
+                         ['Unpublish: 4 Events/Blog changed.'])
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(LocalCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.factory = RequestFactory()
+        self.router = ReplicaRouter()
+
+    def serve(self, request, write=False, primary_block=False):
+        """Run ``request`` through the middleware and return the database its reads used."""
+        used = []
+
+        def view(request):
+            if write:
+                self.router.db_for_write(Listing)
+            if primary_block:
+                with use_primary():
+                    used.append(self.router.db_for_read(Listing))
+            used.append(self.router.db_for_read(Listing))
+            return HttpResponse()
+
+        self.response = ReplicaRoutingMiddleware(view)(request)
+        return used
+
+    def test_safe_requests_read_from_a_replica(self):
+        self.assertEqual(self.serve(self.factory.get('/')), ['replica'])
+        self.assertEqual(self.serve(self.factory.get('/'), primary_block=True), ['default', 'replica'])
+        self.assertEqual(self.serve(self.factory.post('/')), ['default'])
+        # A request that wrote nothing pins nobody
+        self.assertEqual(self.serve(self.factory.get('/')), ['replica'])
+
+    def test_writers_read_their_writes(self):
+        token = {'HTTP_AUTHORIZATION': 'Bearer abc'}
+        self.serve(self.factory.post('/', **token), write=True)
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, self.response.cookies)
+        self.assertEqual(self.serve(self.factory.get('/', **token)), ['default'])
+        self.assertEqual(self.serve(self.factory.get('/', HTTP_AUTHORIZATION='Bearer xyz')), ['replica'])
+
+        get_cache().clear()
+        self.assertEqual(self.serve(self.factory.get('/', **token)), ['replica'])
+
+    def test_anonymous_writers_are_pinned_by_cookie(self):
+        self.assertEqual(self.serve(self.factory.get('/'), write=True), ['default'])
+        pin = self.response.cookies[settings.REPLICA_PIN_COOKIE]
+        self.assertEqual(pin['max-age'], settings.REPLICA_PIN_SECONDS)
+        self.factory.cookies[settings.REPLICA_PIN_COOKIE] = pin.value
+        self.assertEqual(self.serve(self.factory.get('/')), ['default'])
+        # Other anonymous clients behind the same proxy address are not pinned
+        self.factory.cookies.clear()
+        self.assertEqual(self.serve(self.factory.get('/')), ['replica'])
+        # A forged cookie pins nobody
+        self.factory.cookies[settings.REPLICA_PIN_COOKIE] = 'forged'
+        self.assertEqual(self.serve(self.factory.get('/')), ['replica'])
+
+    def test_anonymous_pin_is_renewed_by_each_write(self):
+        self.serve(self.factory.post('/'), write=True)
+        pin = self.response.cookies[settings.REPLICA_PIN_COOKIE].value
+        self.factory.cookies[settings.REPLICA_PIN_COOKIE] = pin
+        self.serve(self.factory.post('/'), write=True)
+        self.assertEqual(self.response.cookies[settings.REPLICA_PIN_COOKIE].value, pin)
+
+    def test_outside_requests_use_the_primary(self):
+        self.assertEqual(self.router.db_for_read(Listing), 'default')
+        self.assertFalse(self.router.allow_migrate('replica', 'app'))
+        self.assertTrue(self.router.allow_migrate('default', 'app'))
+
+
+@override_settings(ALLOWED_HOSTS=['*'])
+class QueryBudgetTests(LocalCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='secret123')
+        self.api = APIClient()
+        self.api.force_authenticate(self.admin)
+
+    def add_orders(self, count):
+        start = Listing.objects.count()
+        for i in range(start, start + count):
+            listing = Listing.objects.create(title=f'Hat {i}', description='x', price=3)
+            order = Order.objects.create(user=self.admin, total_price=3)
+            OrderItem.objects.create(order=order, item=listing, quantity=1, price=3)
+            Post.objects.create(title=f'Post {i}', description='x', published_by=self.admin)
+
+    def query_count(self, url):
+        response = self.api.get(url)
+        self.assertEqual(response.status_code, 200)
+        return int(response['X-Query-Count'])
+
+    def test_nested_lists_do_not_grow_with_the_page(self):
+        self.add_orders(1)
+        counts = [self.query_count(url) for url in ('/api/orders/', '/api/blog-posts/', '/api/order-items/')]
+        self.add_orders(4)
+        self.assertEqual([self.query_count(url) for url in ('/api/orders/?a', '/api/blog-posts/?a',
+                                                             '/api/order-items/?a')], counts)
+
+    def test_every_list_endpoint_is_within_budget(self):
+        self.add_orders(3)
+        out = io.StringIO()
+        call_command('check_query_budgets', stdout=out)
+        self.assertIn('All list endpoints within budget', out.getvalue())
+
+    def test_repeated_runs_measure_the_queries(self):
+        self.add_orders(1)
+        runs = []
+        for _ in range(2):
+            out = io.StringIO()
+            call_command('check_query_budgets', stdout=out)
+            runs.append(out.getvalue())
+        self.assertEqual(runs[0], runs[1])
+        self.assertNotIn(': 0 / 0 queries', runs[1])
+
+    @override_settings(QUERY_BUDGET_ENFORCE=True)
+    def test_enforced_budgets_fail_the_request(self):
+        from .views import OrderViewSet
+
+        self.add_orders(1)
+        self.assertEqual(self.api.get('/api/orders/')['X-Query-Budget'], '3')
+        with mock.patch.dict(OrderViewSet.query_budget, {'list': 1}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.api.get('/api/orders/?a')
+
+
+class IndexAdvisorTests(LocalCacheMixin, TestCase):
+    def advise(self):
+        out = io.StringIO()
+        call_command('advise_indexes', stdout=out)
+        return out.getvalue()
+
+    def test_declared_lookups_are_indexed(self):
+        output = self.advise()
+        self.assertEqual([line for line in output.splitlines() if line.startswith('  +')], [])
+
+    def test_plans_are_measured_without_keeping_the_index(self):
+        from .management.commands.advise_indexes import Proposal
+
+        proposal = Proposal(Order, ['total_price'], None, '/api/orders/', None, ['total_price'])
+        before = connection.introspection.get_constraints(connection.cursor(), Order._meta.db_table)
+        self.assertRegex(proposal.index.name, r'^app_order_total_p_[0-9a-f]{6}_idx$')
+        with mock.patch('app.management.commands.advise_indexes.Command.collect_proposals',
+                        return_value=[proposal]):
+            output = self.advise()
+        self.assertIn(f'+ {proposal.describe()}', output)
+        self.assertIn('USE TEMP B-TREE FOR ORDER BY', output)
+        self.assertEqual(connection.introspection.get_constraints(connection.cursor(), Order._meta.db_table), before)
+
+        partial = Proposal(Order, ['total_price'], models.Q(status='pending'), '/api/orders/', None, [])
+        self.assertNotEqual(partial.index.name, proposal.index.name)
+
+
+@override_settings(ALLOWED_HOSTS=['*'], JOBS_INLINE=True, IMAGE_RENDITION_WIDTHS=[320, 640, 1280])
+class ImageRenditionTests(LocalCacheMixin, TempMediaMixin, TestCase):
+    def add_listing(self, slug, **images):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Listing.objects.create(title=slug, description='x', price=1, slug=slug, **images)
+
+    def test_renditions_are_never_upscaled(self):
+        listing = self.add_listing('hat', poster=make_image('poster.jpg'))
+        renditions = ImageRendition.objects.filter(source=listing.poster.name)
+        self.assertEqual(sorted(renditions.values_list('format', 'width', 'height')), [
+            ('jpeg', 320, 160), ('jpeg', 640, 320), ('original', 800, 400), ('webp', 320, 160), ('webp', 640, 320),
+        ])
+        for rendition in renditions.exclude(format='original'):
+            with Image.open(rendition.file.path) as image:
+                self.assertEqual(image.size, (rendition.width, rendition.height))
+
+    def test_transparent_images_get_jpeg_renditions(self):
+        listing = self.add_listing('logo', image=make_image('logo.png', (400, 200), 'RGBA', 'PNG'))
+        jpeg = ImageRendition.objects.get(source=listing.image.name, format='jpeg')
+        with Image.open(jpeg.file.path) as image:
+            self.assertEqual((image.format, image.mode), ('JPEG', 'RGB'))
+
+    def test_unreadable_images_are_skipped(self):
+        with self.assertLogs('app.images', 'WARNING'):
+            listing = self.add_listing('broken', poster=SimpleUploadedFile('broken.jpg', b'not an image'))
+        self.assertFalse(ImageRendition.objects.filter(source=listing.poster.name).exists())
+
+    def test_oversized_images_are_skipped(self):
+        # Pillow refuses images over twice MAX_IMAGE_PIXELS outright
+        with mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 1000), self.assertLogs('app.images', 'WARNING'):
+            listing = self.add_listing('huge', poster=make_image('huge.jpg'))
+        self.assertFalse(ImageRendition.objects.filter(source=listing.poster.name).exists())
+
+    def test_serializers_list_renditions_in_one_query(self):
+        self.add_listing('hat-0', poster=make_image('poster.jpg'))
+        response = self.client.get('/api/listings/')
+        renditions = response.json()['results'][0]['poster_renditions']
+        self.assertEqual((renditions['width'], renditions['height']), (800, 400))
+        self.assertEqual(sorted(renditions['srcset']), ['jpeg', 'webp'])
+        self.assertRegex(renditions['srcset']['webp'], r'^http://testserver/media/renditions/\S+ 320w, \S+ 640w$')
+        self.assertIsNone(response.json()['results'][0]['image_renditions'])
+
+        for i in range(1, 4):
+            self.add_listing(f'hat-{i}', poster=make_image('poster.jpg', (700 + i, 300)))
+        again = self.client.get('/api/listings/?page=1')
+        self.assertEqual(len(again.json()['results']), 4)
+        self.assertEqual(again['X-Query-Count'], response['X-Query-Count'])
+
+    def test_nested_listings_stay_lean(self):
+        user = User.objects.create_user(email='buyer@example.com', password='secret123')
+        order = Order.objects.create(user=user, total_price=1)
+        OrderItem.objects.create(order=order, item=self.add_listing('hat', poster=make_image('poster.jpg')),
+                                 quantity=1, price=1)
+        api = APIClient()
+        api.force_authenticate(user)
+        item = api.get('/api/orders/').json()['results'][0]['items'][0]['item']
+        self.assertNotIn('poster_renditions', item)
+
+
+@override_settings(ALLOWED_HOSTS=['*'], JOBS_INLINE=False, JOB_RETRY_DELAY=30)
+class BackgroundJobTests(LocalCacheMixin, TempMediaMixin, TestCase):
+    def run_jobs(self):
+        out = io.StringIO()
+        call_command('run_jobs', '--once', stdout=out)
+        return out.getvalue()
+
+    def test_uploads_are_processed_off_request(self):
+        listing = Listing.objects.create(title='Hat', description='x', price=1, slug='hat',
+                                         poster=make_image('poster.jpg'))
+        job = Job.objects.get()
+        self.assertEqual((job.name, job.status, job.payload),
+                         ('images.render', 'queued', {'model': 'app.Listing', 'names': [listing.poster.name]}))
+        self.assertFalse(ImageRendition.objects.exists())
+
+        self.assertIn('1 jobs done, 0 failed', self.run_jobs())
+        self.assertEqual(Job.objects.get().status, 'done')
+        self.assertTrue(ImageRendition.objects.filter(source=listing.poster.name).exists())
+
+        # Images that already have renditions are not queued again
+        listing.title = 'Red hat'
+        listing.save()
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_document_inspection(self):
+        user = User.objects.create_user(email='owner@example.com', password='secret123')
+        document = Document.objects.create(file_name='Notes', document_type='dining', uploaded_by=user,
+                                           file='documents/notes.txt')
+        self.write_media('documents/notes.txt', b'hello world')
+        document.file_name = 'Renamed'
+        document.save()
+        self.assertFalse(Job.objects.exists())
+
+        jobs.enqueue(tasks.inspect_document, pk=document.pk)
+        self.run_jobs()
+        document.refresh_from_db()
+        self.assertEqual((document.size, document.sha256), (11, hashlib.sha256(b'hello world').hexdigest()))
+
+    def test_failed_jobs_back_off_then_give_up(self):
+        failing = mock.Mock(side_effect=ValueError('boom'))
+        with mock.patch.dict(jobs.REGISTRY, {'documents.inspect': failing}), self.assertLogs('app.jobs', 'WARNING'):
+            job = jobs.enqueue(tasks.inspect_document, pk=1)
+            self.assertFalse(jobs.run(jobs.claim()))
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), ('queued', 1))
+            self.assertGreaterEqual(job.run_after - job.updated_at, datetime.timedelta(seconds=29))
+            self.assertEqual(job.last_error.splitlines()[-1], 'ValueError: boom')
+            self.assertIsNone(jobs.claim())
+
+            Job.objects.filter(pk=job.pk).update(run_after=job.created_at, attempts=job.max_attempts - 1)
+            self.assertFalse(jobs.run(jobs.claim()))
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), ('failed', job.max_attempts))
+        self.assertEqual(failing.call_count, 2)
+
+    def test_jobs_are_claimed_once(self):
+        job = jobs.enqueue(tasks.inspect_document, pk=1)
+        claimed = jobs.claim()
+        self.assertEqual((claimed.pk, claimed.status, claimed.attempts), (job.pk, 'running', 1))
+        self.assertIsNone(jobs.claim())
+
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - datetime.timedelta(hours=1))
+        self.assertEqual(jobs.requeue_stale(), 1)
+        self.assertEqual(jobs.claim().pk, job.pk)
+
+    def test_inline_jobs_run_after_commit(self):
+        with override_settings(JOBS_INLINE=True):
+            with self.captureOnCommitCallbacks() as callbacks:
+                listing = Listing.objects.create(title='Hat', description='x', price=1, slug='hat',
+                                                 poster=make_image('poster.jpg'))
+            self.assertFalse(ImageRendition.objects.exists())
+            for callback in callbacks:
+                callback()
+        self.assertEqual(Job.objects.get().status, 'done')
+        self.assertTrue(ImageRendition.objects.filter(source=listing.poster.name).exists())
+
+
+@override_settings(ALLOWED_HOSTS=['*'], FILE_SERVE_MODE='sendfile')
+class FileDeliveryTests(LocalCacheMixin, TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.write_media('blog/plain.txt', b'0123456789')
+        self.url = '/media/blog/plain.txt'
+
+    def test_ranges(self):
+        response = self.client.get(self.url)
+        self.assertEqual((response['Content-Length'], response['Accept-Ranges']), ('10', 'bytes'))
+        cases = [('bytes=2-4', b'234', 'bytes 2-4/10'), ('bytes=-3', b'789', 'bytes 7-9/10'),
+                 ('bytes=8-', b'89', 'bytes 8-9/10'), ('bytes=5-99', b'56789', 'bytes 5-9/10')]
+        for header, body, content_range in cases:
+            with self.subTest(range=header):
+                response = self.client.get(self.url, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(b''.join(response.streaming_content), body)
+                self.assertEqual(response['Content-Range'], content_range)
+                self.assertEqual(response['Content-Length'], str(len(body)))
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE='bytes=20-').status_code, 416)
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE='bytes=0-1,4-5').status_code, 200)
+
+    def test_conditional_requests(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE='bytes=2-4', HTTP_IF_RANGE='"other"').status_code, 200)
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE='bytes=2-4', HTTP_IF_RANGE=etag).status_code, 206)
+
+    def test_content_addressed_files_are_immutable(self):
+        listing = Listing.objects.create(title='Hat', description='x', price=1, slug='hat',
+                                         poster=SimpleUploadedFile('hat.txt', b'hat'))
+        response = self.client.get(listing.poster.url)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(response['ETag'], '"%s"' % hashlib.sha256(b'hat').hexdigest())
+        self.assertEqual(self.client.get(self.url)['Cache-Control'], settings.FILE_CACHE_CONTROL)
+
+    def test_methods_and_missing_files(self):
+        self.assertEqual(self.client.head(self.url).status_code, 200)
+        self.assertEqual(self.client.post(self.url).status_code, 405)
+        self.assertEqual(self.client.get('/media/nope.jpg').status_code, 404)
+        self.assertEqual(self.client.get('/media/blog').status_code, 404)
+
+    def test_proxy_offload(self):
+        with override_settings(FILE_SERVE_MODE='x-accel'):
+            response = self.client.get(self.url)
+            self.assertEqual(response['X-Accel-Redirect'], '/internal/media/blog/plain.txt')
+            self.assertEqual(response.content, b'')
+        with override_settings(FILE_SERVE_MODE='x-sendfile'):
+            response = self.client.get(self.url)
+            self.assertEqual(response['X-Sendfile'], os.path.join(self.media_root, 'blog', 'plain.txt'))
+
+    def test_static_files(self):
+        static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, static_root, ignore_errors=True)
+        with open(os.path.join(static_root, 'site.css'), 'wb') as fh:
+            fh.write(b'body {}')
+        with override_settings(STATIC_ROOT=static_root):
+            response = self.client.get('/static/site.css')
+            self.assertEqual(b''.join(response.streaming_content), b'body {}')
+            self.assertEqual(response['Content-Type'], 'text/css')
+            self.assertNotEqual(self.client.get('/static/../api/settings.py').status_code, 200)
+
+
+@override_settings(ALLOWED_HOSTS=['*'])
+class AdminChangelistTests(LocalCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='secret123')
+        self.client.force_login(self.admin)
+        self.dining = Dining.objects.create(title='Ibihaza', description='x', location='Kigali')
+        self.add_rows(1)
+
+    def add_rows(self, count):
+        start = User.objects.count()
+        for i in range(start, start + count):
+            user = User.objects.create_user(email=f'guest{i}@example.com', password='secret123')
+            room = Listing.objects.create(title=f'Room {i}', description='x', price=10, type='accommodation',
+                                          slug=f'room-{i}')
+            order = Order.objects.create(user=user, total_price=10)
+            OrderItem.objects.create(order=order, item=room, quantity=1, price=10)
+            DiningBooking.objects.create(dining=self.dining, user=user, guests=2, booking_time=timezone.now())
+            Reservation.objects.create(listing=room, user=user, check_in=timezone.localdate(),
+                                       check_out=timezone.localdate() + datetime.timedelta(days=1))
+            Document.objects.create(file_name=f'Doc {i}', document_type='dining', uploaded_by=user,
+                                    file=f'documents/doc-{i}.pdf')
+
+    def changelist_queries(self, model):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/admin/app/{model}/')
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_queries_do_not_grow_with_the_page(self):
+        models = ['order', 'diningbooking', 'reservation', 'document', 'user', 'post', 'listing']
+        before = [self.changelist_queries(model) for model in models]
+        self.add_rows(4)
+        self.assertEqual([self.changelist_queries(model) for model in models], before)
+
+    def test_check_admin_queries(self):
+        out = io.StringIO()
+        call_command('check_admin_queries', stdout=out)
+        self.assertNotIn('over budget', out.getvalue())
+
+    def test_forms_do_not_list_whole_tables(self):
+        order = Order.objects.get()
+        response = self.client.get(f'/admin/app/order/{order.pk}/change/')
+        self.assertEqual(response.status_code, 200)
+        # The user select only holds the current choice; the rest load on demand
+        self.assertNotContains(response, 'admin@example.com</option>')
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertEqual(str(order.items.get()), f'{order.items.get().item.title} x 1')
+
+
+def load_settings(**environ):
+    """Evaluate api/settings.py with only the given database variables set."""
+    keep = {key: value for key, value in os.environ.items()
+            if not key.startswith(('DB_', 'SQLITE_', 'GUNICORN_'))}
+    with mock.patch.dict(os.environ, {**keep, **environ}, clear=True):
+        return runpy.run_path(os.path.join(settings.BASE_DIR, 'api', 'settings.py'))
+
+
+class DatabaseSettingsTests(SimpleTestCase):
+    def test_sqlite_is_the_default(self):
+        databases = load_settings()['DATABASES']
+        self.assertEqual(list(databases), ['default'])
+        self.assertEqual(databases['default']['ENGINE'], 'django.db.backends.sqlite3')
+
+    def test_pooled_postgresql(self):
+        databases = load_settings(DB_ENGINE='postgresql', GUNICORN_THREADS='8')['DATABASES']
+        default = databases['default']
+        self.assertEqual(default['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual(default['OPTIONS']['pool']['max_size'], 8)
+        # Pooling needs CONN_MAX_AGE = 0; the pool's own check replaces broken connections
+        self.assertNotIn('CONN_MAX_AGE', default)
+        self.assertTrue(default['CONN_HEALTH_CHECKS'])
+
+    def test_persistent_postgresql_connections(self):
+        default = load_settings(DB_ENGINE='postgresql', DB_POOL='0', DB_CONN_MAX_AGE='60')['DATABASES']['default']
+        self.assertNotIn('pool', default['OPTIONS'])
+        self.assertEqual((default['CONN_MAX_AGE'], default['CONN_HEALTH_CHECKS']), (60, True))
+
+    def test_replicas_copy_the_primary(self):
+        loaded = load_settings(DB_ENGINE='postgresql', DB_REPLICA_HOSTS='replica-a:6432, replica-b')
+        databases = loaded['DATABASES']
+        self.assertEqual(loaded['DATABASE_REPLICAS'], ['replica1', 'replica2'])
+        self.assertEqual((databases['replica1']['HOST'], databases['replica1']['PORT']), ('replica-a', '6432'))
+        self.assertEqual((databases['replica2']['HOST'], databases['replica2']['PORT']), ('replica-b', '5432'))
+        self.assertEqual(databases['replica1']['OPTIONS'], databases['default']['OPTIONS'])
+        self.assertIsNot(databases['replica1']['OPTIONS'], databases['default']['OPTIONS'])
+        self.assertEqual(databases['replica2']['TEST'], {'MIRROR': 'default'})
+
+
+class SQLiteProfileTests(LocalCacheMixin, TestCase):
+    def test_profile_settings(self):
+        loaded = load_settings(SQLITE_PROFILE='1')
+        default = loaded['DATABASES']['default']
+        self.assertEqual(default['OPTIONS'], {'transaction_mode': 'IMMEDIATE', 'timeout': 5})
+        self.assertTrue(default['CONN_HEALTH_CHECKS'])
+        self.assertEqual(loaded['SQLITE_PRAGMAS']['journal_mode'], 'WAL')
+        self.assertNotIn('SQLITE_PRAGMAS', load_settings())
+
+    def test_pragmas_apply_to_new_connections(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        pragmas = {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 5000}
+        wrapper = DatabaseWrapper({**connection.settings_dict, 'NAME': os.path.join(directory, 'profile.sqlite3')},
+                                  alias='profile')
+        with override_settings(SQLITE_PRAGMAS=pragmas):
+            wrapper.ensure_connection()
+        self.addCleanup(wrapper.close)
+        with wrapper.cursor() as cursor:
+            values = []
+            for name in pragmas:
+                cursor.execute(f'PRAGMA {name}')
+                values.append(cursor.fetchone()[0])
+        # synchronous=NORMAL reads back as 1
+        self.assertEqual(values, ['wal', 1, 5000])
+
+    def test_maintenance(self):
+        out = io.StringIO()
+        call_command('sqlite_maintenance', stdout=out)
+        output = out.getvalue()
+        self.assertIn('PRAGMA optimize done', output)
+        self.assertIn('Search index segments merged', output)
+        self.assertIn('Maintenance complete', output)
+
+
+class FullTextSearchTests(LocalCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        Listing.objects.create(title='Woven basket', description='Made in Kigali', price=5, slug='basket')
+        Listing.objects.create(title='Kigali map', description='Paper', price=1, slug='map')
+        Listing.objects.create(title='Mug', description='Ceramic', price=3, slug='mug')
+
+    def slugs(self, query, **params):
+        response = self.client.get('/api/listings/', {'search': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [row['slug'] for row in response.json()['results']]
+
+    def test_titles_rank_above_descriptions(self):
+        self.assertEqual(self.slugs('kigali'), ['map', 'basket'])
+        self.assertEqual(self.slugs('KIG'), ['map', 'basket'])
+        self.assertEqual(self.slugs('woven kigali'), ['basket'])
+        self.assertEqual(self.slugs('teapot'), [])
+
+    def test_punctuation_is_not_query_syntax(self):
+        self.assertEqual(match_expression('bas"ket* OR (mug'), '"bas"* "ket"* "OR"* "mug"*')
+        self.assertEqual(match_expression('"*()'), '')
+        self.assertEqual(self.slugs('mug)'), ['mug'])
+        self.assertEqual(self.slugs('"*'), [])
+
+    def test_falls_back_to_like_without_the_index(self):
+        with mock.patch('app.search.index_available', return_value=False):
+            self.assertEqual(sorted(self.slugs('kigali', x=1)), ['basket', 'map'])
@@ -0,0 +1,112 @@
+import os
+import re
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from . import tasks
+from .jobs import enqueue
+from .models import Document, UploadSession
+from .storage import is_content_addressed
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+# Bytes read from the request per write
+BLOCK_SIZE = 256 * 1024
+
+
+class UploadConflict(Exception):
+    """The chunk does not start where the session expects the next one."""
+
+
+class PartialFile(File):
+    """An assembled upload; storages move a file with temporary_file_path() instead of copying it."""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def parse_content_range(header):
+    """Return (start, end, total) from ``bytes start-end/total``, or None."""
+    match = CONTENT_RANGE_RE.match(header or '')
+    if not match:
+        return None
+    start, end, total = map(int, match.groups())
+    return (start, end, total) if start <= end < total else None
+
+
+def write_chunk(session, start, length, stream):
+    """
+    Write ``length`` bytes of ``stream`` into the session's file at ``start``.
+
+    The request body goes to disk block by block with pwrite(), so a chunk is
+    never held in memory. Bytes received before the client dropped are kept
+    and count towards the offset. Returns the new offset.
+    """
+    if start != session.received:
+        raise UploadConflict
+    os.makedirs(settings.UPLOAD_SESSION_DIR, exist_ok=True)
+    fd = os.open(session.path, os.O_WRONLY | os.O_CREAT, 0o600)
+    written = 0
+    try:
+        while written < length:
+            try:
+                block = stream.read(min(BLOCK_SIZE, length - written))
+            except OSError:
+                break
+            if not block:
+                break
+            os.pwrite(fd, block, start + written)
+            written += len(block)
+    finally:
+        os.close(fd)
+
+    # Conditional, so of two requests racing for the same offset only one counts
+    offset = start + written
+    moved = UploadSession.objects.filter(pk=session.pk, received=start, document=None).update(
+        received=offset, updated_at=timezone.now(),
+    )
+    if not moved:
+        raise UploadConflict
+    session.received = offset
+    return offset
+
+
+def finalize(session):
+    """
+    Store the assembled file and create its Document.
+
+    The part file is handed to the storage as a temporary file, so it is
+    hashed in one streaming pass and renamed into place, never copied.
+    Finalizing twice returns the same Document.
+    """
+    if session.document_id is not None:
+        return session.document
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session.pk)
+        if session.document_id is not None:
+            return session.document
+        document = Document(
+            file_name=session.file_name,
+            original_name=session.file_name,
+            document_type=session.document_type,
+            visibility=session.visibility,
+            description=session.description,
+            uploaded_by_id=session.user_id,
+            size=session.size,
+        )
+        with open(session.path, 'rb') as fh:
+            document.file.save(session.file_name, PartialFile(fh), save=False)
+        if is_content_addressed(document.file.name):
+            document.sha256 = os.path.splitext(os.path.basename(document.file.name))[0]
+        document.save()
+        if not document.sha256:
+            enqueue(tasks.inspect_document, pk=document.pk)
+        session.document = document
+        session.save(update_fields=['document', 'updated_at'])
+    # Left behind when the same content was already stored
+    if os.path.exists(session.path):
+        os.unlink(session.path)
+    return document
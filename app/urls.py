@@ -3,6 +3,7 @@ from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
     DiningBookingViewSet,
+    ReservationViewSet,
     LogoutView,
     UserViewSet,
     BlogPostViewSet,
@@ -15,6 +16,10 @@ from .views import (
     PartnerViewSet,
     DiningViewSet,
     DocumentViewSet,
+    UploadSessionViewSet,
+    SearchView,
+    StatsView,
+    serve_signed_download,
 )
 
 # Initialize router
@@ -26,11 +31,13 @@ router.register(r'blog-posts', BlogPostViewSet)
 router.register(r'listings', ItemViewSet)
 router.register(r'dining', DiningViewSet)
 router.register(r'dining-bookings', DiningBookingViewSet)
+router.register(r'reservations', ReservationViewSet)
 router.register(r'donations', DonationViewSet)
 router.register(r'orders', OrderViewSet)
 router.register(r'order-items', OrderItemViewSet)
 router.register(r'partners', PartnerViewSet)
 router.register(r'documents', DocumentViewSet)
+router.register(r'uploads', UploadSessionViewSet)
 
 # URL patterns
 urlpatterns = [
@@ -39,4 +46,7 @@ urlpatterns = [
     path('login/', LoginView.as_view(), name='login'),
     path('logout/', LogoutView.as_view(), name='logout'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('search/', SearchView.as_view(), name='search'),
+    path('stats/<str:kind>/', StatsView.as_view(), name='stats'),
+    path('downloads/<str:token>/', serve_signed_download, name='signed-download'),
 ]
\ No newline at end of file
@@ -1,4 +1,9 @@
-from rest_framework import viewsets, status
+import datetime
+import os
+
+from rest_framework import mixins, viewsets, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, ValidationError as APIValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.views import APIView
@@ -7,14 +12,32 @@ from rest_framework.permissions import AllowAny, IsAuthenticatedOrReadOnly
 from django.contrib.auth import authenticate
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
-from rest_framework.pagination import PageNumberPagination
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
 from rest_framework_simplejwt.exceptions import TokenError
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+from django.db import transaction
+from django.utils import timezone
+from django.db.models import Prefetch
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import Http404
+from django.urls import reverse
+from django.utils._os import safe_join
+from django.views.decorators.http import require_safe
+from .files import media_path, serve_file, sign_download, unsign_download
+from .dining import SlotFull, availability
+from .reservations import DatesUnavailable, free_accommodations
+from .uploads import UploadConflict, finalize as finalize_upload, parse_content_range, write_chunk
+from .pagination import KeysetPagination
+from .search import SOURCES as SEARCH_SOURCES, FullTextSearchFilter, index_available, like_search, search
+from .mixins import (
+    BulkMixin, CachedResponseMixin, ConditionalGetMixin, DeferFieldsMixin, ModerationMixin, QueryBudgetMixin,
+)
 from .models import (
-    Dining, DiningBooking, User, Post, Listing, Donation, Order, OrderItem, Partner, Document
+    BookingStatus, Dining, DiningBooking, User, Post, Listing, Donation, Order, OrderItem, Partner, Document,
+    Reservation, UploadSession, DailyBookingStat, DailyDonationStat, DailyListingSales, DailyOrderStat,
 )
 from .serializers import (
     DiningBookingSerializer,
@@ -27,20 +50,58 @@ from .serializers import (
     OrderItemSerializer,
     PartnerSerializer,
     DocumentSerializer,
+    UploadSessionSerializer,
+    CheckoutSerializer,
+    ReservationSerializer,
 )
-class DocumentViewSet(viewsets.ModelViewSet):
-    queryset = Document.objects.all().order_by('-uploaded_at')
+class DocumentViewSet(QueryBudgetMixin, DeferFieldsMixin, viewsets.ModelViewSet):
+    queryset = Document.objects.select_related('uploaded_by').order_by('-uploaded_at')
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, OrderingFilter]
     filterset_fields = ['document_type', 'visibility']
     search_fields = ['file_name', 'description']
     ordering_fields = ['uploaded_at']
+    query_budget = {'list': 3, 'retrieve': 1, 'download': 1, 'link': 1}
 
     def get_queryset(self):
         user = self.request.user
         if user.is_authenticated:
-            return Document.objects.all().order_by('-uploaded_at')
-        return Document.objects.filter(visibility='public').order_by('-uploaded_at')
+            return self.queryset.all()
+        return self.queryset.filter(visibility='public')
+
+    def download_name(self, document):
+        if document.original_name:
+            return document.original_name
+        # file_name is a title; give the download the stored file's extension
+        extension = os.path.splitext(document.file.name)[1]
+        if extension and not document.file_name.lower().endswith(extension.lower()):
+            return document.file_name + extension
+        return document.file_name
+
+    @action(detail=True)
+    def download(self, request, pk=None):
+        # get_object() applies the visibility filter of get_queryset()
+        document = self.get_object()
+        if not document.file:
+            raise Http404('Document has no file')
+        public = document.visibility == 'public'
+        return serve_file(
+            request, default_storage.path(document.file.name), document.file.name,
+            settings.MEDIA_ACCEL_PREFIX, settings.FILE_CACHE_CONTROL if public else 'private, no-cache',
+            private=not public, filename=self.download_name(document), as_attachment=True,
+        )
+
+    @action(detail=True)
+    def link(self, request, pk=None):
+        # A signed URL, so repeated downloads skip authentication and the database
+        document = self.get_object()
+        if not document.file:
+            raise Http404('Document has no file')
+        token = sign_download(document.file.name, self.download_name(document))
+        return Response({
+            'url': request.build_absolute_uri(reverse('signed-download', args=[token])),
+            'expires_in': settings.DOWNLOAD_URL_MAX_AGE,
+        })
 
     def get_serializer_class(self):
         user = self.request.user
@@ -52,6 +113,72 @@ class DocumentViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(uploaded_by=self.request.user)
 
+# Upload Session ViewSet
+class UploadSessionViewSet(QueryBudgetMixin, mixins.CreateModelMixin, mixins.RetrieveModelMixin,
+                           mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    Resumable document uploads.
+
+    POST creates a session for a file of ``size`` bytes. Each chunk is a PUT
+    of raw bytes with ``Content-Range: bytes <start>-<end>/<size>``, starting
+    at the session's ``offset``; after a dropped connection, GET the session
+    and resume from its offset. POST finalize/ creates the Document.
+    """
+    queryset = UploadSession.objects.all()
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsAuthenticated]
+    query_budget = {'retrieve': 1, 'update': 2, 'finalize': 11}
+
+    def get_queryset(self):
+        return self.queryset.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    def update(self, request, pk=None):
+        session = self.get_object()
+        if session.document_id is not None:
+            return Response({'error': 'Upload already finalized'}, status=status.HTTP_409_CONFLICT)
+        content_range = parse_content_range(request.headers.get('Content-Range'))
+        if content_range is None or content_range[2] != session.size:
+            return Response(
+                {'error': f'Content-Range must be "bytes <start>-<end>/{session.size}"'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        start, end, _ = content_range
+        length = end - start + 1
+        if length > settings.UPLOAD_CHUNK_MAX_SIZE:
+            return Response(
+                {'error': f'Chunks are limited to {settings.UPLOAD_CHUNK_MAX_SIZE} bytes'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = None
+        if content_length != length:
+            return Response({'error': 'Content-Length does not match Content-Range'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            # Read the raw body: request.data would buffer the whole chunk
+            offset = write_chunk(session, start, length, request._request)
+        except UploadConflict:
+            session.refresh_from_db(fields=['received'])
+            return Response({'error': 'Chunk does not start at the offset', 'offset': session.received},
+                            status=status.HTTP_409_CONFLICT)
+        if offset != start + length:
+            return Response({'error': 'Incomplete chunk', 'offset': offset}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'offset': offset})
+
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, pk=None):
+        session = self.get_object()
+        if session.received != session.size:
+            return Response({'error': 'Upload incomplete', 'offset': session.received}, status=status.HTTP_409_CONFLICT)
+        from .serializers import DocumentFullSerializer
+        document = finalize_upload(session)
+        serializer = DocumentFullSerializer(document, context=self.get_serializer_context())
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
 # User Registration View
 @method_decorator(csrf_exempt, name='dispatch')
 class RegisterView(APIView):
@@ -174,7 +301,7 @@ class LogoutView(APIView):
             )
 
 # User ViewSet
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(QueryBudgetMixin, DeferFieldsMixin, viewsets.ModelViewSet):
     queryset = User.objects.all().order_by('date_joined')
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
@@ -182,45 +309,85 @@ class UserViewSet(viewsets.ModelViewSet):
     filterset_fields = ['role', 'is_active']
     search_fields = ['email', 'first_name', 'last_name']
     ordering_fields = ['date_joined']
+    query_budget = {'list': 2, 'retrieve': 1}
 
 # BlogPost ViewSet
-class BlogPostViewSet(viewsets.ModelViewSet):
-    queryset = Post.objects.all().order_by('created_at')
+class BlogPostViewSet(QueryBudgetMixin, BulkMixin, ModerationMixin, ConditionalGetMixin, CachedResponseMixin, DeferFieldsMixin, viewsets.ModelViewSet):
+    queryset = Post.objects.select_related('published_by').order_by('created_at')
     serializer_class = BlogPostSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, OrderingFilter]
     filterset_fields = ['type', 'slug', 'status', 'published_by']
     search_fields = ['title', 'slug', 'description']
     ordering_fields = ['created_at', 'updated_at']
+    query_budget = {'list': 5, 'retrieve': 3, 'bulk': 6, 'moderate': 5}
     lookup_field = 'slug'
+    cache_models = (User,)
 
     def perform_create(self, serializer):
         serializer.save(published_by=self.request.user)
 
+    def get_bulk_defaults(self):
+        return {'published_by': self.request.user}
+
 # Item ViewSet
-class ItemViewSet(viewsets.ModelViewSet):
+class ItemViewSet(QueryBudgetMixin, BulkMixin, ModerationMixin, ConditionalGetMixin, CachedResponseMixin, DeferFieldsMixin, viewsets.ModelViewSet):
     queryset = Listing.objects.all().order_by('created_at')
     serializer_class = ItemSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, OrderingFilter]
     filterset_fields = ['type', 'slug', 'available']
     search_fields = ['title', 'slug', 'description']
     ordering_fields = ['price', 'created_at']
-    pagination_class = PageNumberPagination
+    query_budget = {'list': 5, 'retrieve': 3, 'bulk': 8, 'vacant': 5, 'moderate': 5}
+    pagination_class = KeysetPagination
     lookup_field = 'slug'
 
-class DiningViewSet(viewsets.ModelViewSet):
+    @action(detail=False)
+    def vacant(self, request):
+        """Accommodations free for every night from ``check_in`` to ``check_out`` (optionally by ``category``)."""
+        try:
+            check_in = datetime.date.fromisoformat(request.query_params.get('check_in', ''))
+            check_out = datetime.date.fromisoformat(request.query_params.get('check_out', ''))
+        except ValueError:
+            return Response({'error': 'check_in and check_out must be YYYY-MM-DD dates'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if check_out <= check_in:
+            return Response({'error': 'check_out must be after check_in'}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = free_accommodations(check_in, check_out, self.get_queryset())
+        if request.query_params.get('category'):
+            queryset = queryset.filter(category=request.query_params['category'])
+        page = self.paginate_queryset(self.filter_queryset(queryset))
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+class DiningViewSet(QueryBudgetMixin, BulkMixin, ConditionalGetMixin, CachedResponseMixin, DeferFieldsMixin, viewsets.ModelViewSet):
     queryset = Dining.objects.all().order_by('created_at')
     serializer_class = DiningSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, OrderingFilter]
     filterset_fields = ['title', 'slug',]
     search_fields = ['title', 'slug', 'location']
     ordering_fields = ['id']
+    query_budget = {'list': 5, 'retrieve': 3, 'bulk': 6, 'availability': 2}
     lookup_field = 'slug'
 
+    @action(detail=True)
+    def availability(self, request, slug=None):
+        """Booked and free seats per slot for the next ``days`` days (default 7, at most 31)."""
+        dining = self.get_object()
+        try:
+            days = min(max(int(request.query_params.get('days', 7)), 1), 31)
+        except ValueError:
+            days = 7
+        return Response({
+            'dining': dining.slug,
+            'capacity': dining.capacity,
+            'slot_minutes': dining.slot_minutes,
+            'days': availability(dining, days),
+        })
+
 # Donation ViewSet
-class DonationViewSet(viewsets.ModelViewSet):
+class DonationViewSet(QueryBudgetMixin, DeferFieldsMixin, viewsets.ModelViewSet):
     queryset = Donation.objects.all().order_by('donated_at')
     serializer_class = DonationSerializer
     permission_classes = [IsAuthenticated]
@@ -228,31 +395,64 @@ class DonationViewSet(viewsets.ModelViewSet):
     filterset_fields = ['amount', 'email']
     search_fields = ['names', 'email']
     ordering_fields = ['donated_at']
+    query_budget = {'list': 2, 'retrieve': 1}
 
 # Order ViewSet
-class OrderViewSet(viewsets.ModelViewSet):
-    queryset = Order.objects.all().order_by('created_at')
+class OrderViewSet(QueryBudgetMixin, ModerationMixin, DeferFieldsMixin, viewsets.ModelViewSet):
+    queryset = Order.objects.select_related('user').prefetch_related(
+        Prefetch('items', queryset=OrderItem.objects.select_related('item'))
+    ).order_by('created_at')
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['status', 'user']
     search_fields = ['user__email']
     ordering_fields = ['created_at', 'total_price']
+    query_budget = {'list': 3, 'retrieve': 2, 'checkout': 7, 'moderate': 6}
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    @action(detail=False, methods=['post'])
+    def checkout(self, request):
+        """Create an order and its items from a cart, pricing it server-side in one transaction."""
+        cart = CheckoutSerializer(data=request.data)
+        cart.is_valid(raise_exception=True)
+        quantities = cart.validated_data['items']
+
+        listings = {
+            listing.slug: listing
+            for listing in Listing.objects.filter(slug__in=quantities, available=True, in_use=True)
+        }
+        missing = sorted(set(quantities) - set(listings))
+        if missing:
+            return Response({'items': [f'Unknown or unavailable listing: {slug}' for slug in missing]},
+                            status=status.HTTP_400_BAD_REQUEST)
+        total = sum(listings[slug].price * quantity for slug, quantity in quantities.items())
+        if total >= 10 ** 8:
+            return Response({'items': ['Order total is too large']}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            order = Order.objects.create(user=request.user, total_price=total)
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, item=listings[slug], quantity=quantity, price=listings[slug].price)
+                for slug, quantity in quantities.items()
+            ])
+        order = self.get_queryset().get(pk=order.pk)
+        return Response(self.get_serializer(order).data, status=status.HTTP_201_CREATED)
+
 # OrderItem ViewSet
-class OrderItemViewSet(viewsets.ModelViewSet):
-    queryset = OrderItem.objects.all().order_by('id')
+class OrderItemViewSet(QueryBudgetMixin, DeferFieldsMixin, viewsets.ModelViewSet):
+    queryset = OrderItem.objects.select_related('item').order_by('id')
     serializer_class = OrderItemSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['order', 'item']
     search_fields = ['item__name']
     ordering_fields = ['quantity', 'price']
+    query_budget = {'list': 2, 'retrieve': 1}
 
-class PartnerViewSet(viewsets.ModelViewSet):
+class PartnerViewSet(QueryBudgetMixin, CachedResponseMixin, DeferFieldsMixin, viewsets.ModelViewSet):
     queryset = Partner.objects.all().order_by('id')
     serializer_class = PartnerSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
@@ -260,9 +460,25 @@ class PartnerViewSet(viewsets.ModelViewSet):
     filterset_fields = ['name']
     search_fields = ['name']
     ordering_fields = ['id']
+    query_budget = {'list': 3, 'retrieve': 2}
+
+
+class Unavailable(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Not available at this time.'
+
+
+def save_booking(save):
+    # Booking models check themselves and take their seats or nights in save()
+    try:
+        return save()
+    except (SlotFull, DatesUnavailable) as exc:
+        raise Unavailable(exc.message_dict)
+    except ValidationError as exc:
+        raise APIValidationError(exc.message_dict)
 
 
-class DiningBookingViewSet(viewsets.ModelViewSet):
+class DiningBookingViewSet(QueryBudgetMixin, DeferFieldsMixin, viewsets.ModelViewSet):
     queryset = DiningBooking.objects.all().order_by('booking_time')
     serializer_class = DiningBookingSerializer
     permission_classes = [IsAuthenticated]
@@ -270,3 +486,172 @@ class DiningBookingViewSet(viewsets.ModelViewSet):
     filterset_fields = ['dining', 'user']
     search_fields = ['dining__name', 'user__email']
     ordering_fields = ['date', 'booking_time']
+    query_budget = {'list': 2, 'retrieve': 1}
+
+    def perform_create(self, serializer):
+        save_booking(serializer.save)
+
+    def perform_update(self, serializer):
+        save_booking(serializer.save)
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        booking = self.get_object()
+        if booking.status != BookingStatus.CANCELLED:
+            booking.status = BookingStatus.CANCELLED
+            booking.save(update_fields=['status'])
+        return Response(self.get_serializer(booking).data)
+
+
+# Reservation ViewSet
+class ReservationViewSet(QueryBudgetMixin, DeferFieldsMixin, viewsets.ModelViewSet):
+    queryset = Reservation.objects.select_related('listing').order_by('check_in')
+    serializer_class = ReservationSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_fields = ['listing__slug', 'status']
+    ordering_fields = ['check_in', 'created_at']
+    query_budget = {'list': 2, 'retrieve': 1}
+
+    def get_queryset(self):
+        # Staff see every stay, guests their own
+        if self.request.user.is_staff:
+            return self.queryset.all()
+        return self.queryset.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        save_booking(lambda: serializer.save(user=self.request.user))
+
+    def perform_update(self, serializer):
+        save_booking(serializer.save)
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        reservation = self.get_object()
+        if reservation.status != BookingStatus.CANCELLED:
+            reservation.status = BookingStatus.CANCELLED
+            reservation.save(update_fields=['status', 'updated_at'])
+        return Response(self.get_serializer(reservation).data)
+
+
+# Site-wide Search View
+class SearchView(APIView):
+    """Ranked search over blog posts, listings, dining and documents in one index lookup"""
+    permission_classes = [AllowAny]
+    max_limit = 50
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'The q parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        kinds = list(SEARCH_SOURCES)
+        if request.query_params.get('type'):
+            kinds = [kind for kind in request.query_params['type'].split(',') if kind in SEARCH_SOURCES]
+            if not kinds:
+                return Response(
+                    {'error': f'type must be one of: {", ".join(SEARCH_SOURCES)}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 20)), self.max_limit))
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Anonymous users only see public documents, as in DocumentViewSet
+        public_only = not request.user.is_authenticated
+        if index_available('default'):
+            hits = search(query, kinds, limit=limit, public_only=public_only, snippets=True)
+        else:
+            hits = like_search(query, kinds, limit=limit, public_only=public_only)
+
+        return Response({
+            'results': [
+                {
+                    'type': hit['kind'],
+                    'id': hit['object_id'],
+                    'slug': hit['slug'],
+                    'title': hit['title'],
+                    'snippet': hit['snippet'],
+                    # bm25 is lower-is-better; expose it as higher-is-better
+                    'score': None if hit['score'] is None else -hit['score'],
+                }
+                for hit in hits
+            ]
+        })
+
+
+# Stats View
+class StatsView(APIView):
+    """
+    Daily rollups for dashboards, read from the Daily*Stat tables.
+
+    ``start`` and ``end`` (YYYY-MM-DD, default the last 30 days) bound the
+    rows; ``totals`` sums them over the range per dimension.
+    """
+    permission_classes = [IsAdminUser]
+    max_days = 366
+    # Name -> (rollup model, dimensions, measures)
+    rollups = {
+        'donations': (DailyDonationStat, [], ['count', 'total']),
+        'orders': (DailyOrderStat, ['status'], ['orders', 'revenue']),
+        'listings': (DailyListingSales, ['status', 'listing__slug'], ['quantity', 'revenue']),
+        'bookings': (DailyBookingStat, ['dining__slug'], ['bookings', 'guests']),
+    }
+
+    def get(self, request, kind):
+        if kind not in self.rollups:
+            return Response({'error': f'Stats are available for: {", ".join(self.rollups)}'},
+                            status=status.HTTP_404_NOT_FOUND)
+        model, dimensions, measures = self.rollups[kind]
+        try:
+            end = datetime.date.fromisoformat(request.query_params.get('end') or timezone.localdate().isoformat())
+            start = datetime.date.fromisoformat(
+                request.query_params.get('start') or (end - datetime.timedelta(days=29)).isoformat()
+            )
+        except ValueError:
+            return Response({'error': 'start and end must be YYYY-MM-DD dates'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 <= (end - start).days < self.max_days:
+            return Response({'error': f'The range must be 1 to {self.max_days} days'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        rows = list(
+            model.objects.filter(day__range=(start, end))
+            .values('day', *dimensions, *measures).order_by('day', *dimensions)
+        )
+        totals = {}
+        for row in rows:
+            key = tuple(row[dimension] for dimension in dimensions)
+            total = totals.setdefault(key, {**{d: row[d] for d in dimensions}, **{m: 0 for m in measures}})
+            for measure in measures:
+                total[measure] += row[measure]
+        return Response({'start': start, 'end': end, 'rows': rows, 'totals': list(totals.values())})
+
+
+# Media and static files, delivered without django.conf.urls.static
+@require_safe
+def serve_media(request, path):
+    # Staff keep the links in the admin; everyone else goes through the API
+    name, path = media_path(path, private=request.user.is_staff)
+    return serve_file(
+        request, path, name,
+        settings.MEDIA_ACCEL_PREFIX, settings.FILE_CACHE_CONTROL,
+    )
+
+
+@require_safe
+def serve_static(request, path):
+    return serve_file(
+        request, safe_join(settings.STATIC_ROOT, path), path,
+        settings.STATIC_ACCEL_PREFIX, settings.FILE_CACHE_CONTROL,
+    )
+
+
+@require_safe
+def serve_signed_download(request, token):
+    name, filename = unsign_download(token)
+    return serve_file(
+        request, default_storage.path(name), name,
+        settings.MEDIA_ACCEL_PREFIX, 'private, no-cache',
+        private=True, filename=filename, as_attachment=True,
+    )
@@ -0,0 +1,14 @@
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+
+# Threaded workers; each worker process opens its own database pool sized
+# to this value (see DB_POOL_SIZE in api/settings.py)
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+
+# Recycle workers now and then so pooled connections and memory are renewed
+max_requests = 1000
+max_requests_jitter = 100